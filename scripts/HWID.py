@@ -1,27 +1,84 @@
 
-import os, sys, uuid, json, webbrowser, socket, tkinter as tk
+from __future__ import annotations
+
+import os, sys, uuid, json, socket
+import array
+import base64
+import hashlib
+import random
+import struct
 import threading
 import time
+import http.client
+from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
-from tkinter import ttk
-from tkinter import messagebox
 
-# ttkbootstrap for themed UI (optional)
-# If missing, we still allow a CLI-mode output so the HWID can be obtained
-# without requiring any extra packages.
+# GUI and optional third-party modules are imported on first use, so the
+# headless modes (--service, --activate, --probe, --cli) start without tkinter,
+# ttkbootstrap, pyperclip or requests. _load_gui() binds the GUI
+# names below; _load_requests() binds `requests`. asyncio is imported inside
+# the asyncio-engine functions for the same reason; the module-level import
+# below only exists for annotations and linters (typing itself costs startup).
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import asyncio
+tk = ttk = messagebox = webbrowser = None
+Style = Button = Label = Entry = Combobox = None
 HAS_TTKBOOTSTRAP = False
-try:
-    from ttkbootstrap import Style  # type: ignore
-    from ttkbootstrap.widgets import Button, Label, Entry, Combobox  # type: ignore
-    HAS_TTKBOOTSTRAP = True
-except Exception:
-    # Fallback widgets for type annotations and to keep imports working.
-    # Note: the full GUI experience requires ttkbootstrap.
-    Style = object  # type: ignore
-    Button = ttk.Button  # type: ignore
-    Label = ttk.Label  # type: ignore
-    Entry = ttk.Entry  # type: ignore
-    Combobox = ttk.Combobox  # type: ignore
+pyperclip = None
+HAS_PYPERCLIP = False
+requests = None
+HAS_REQUESTS = None  # unknown until the first HTTP call
+
+def _load_gui() -> bool:
+    """Import the GUI stack and define the widget classes. Returns False when
+    tkinter or ttkbootstrap is unavailable (main() then falls back to CLI)."""
+    global tk, ttk, messagebox, webbrowser, Style, Button, Label, Entry, Combobox, HAS_TTKBOOTSTRAP
+    global pyperclip, HAS_PYPERCLIP
+    if tk is not None:
+        return HAS_TTKBOOTSTRAP
+    try:
+        import tkinter as _tk
+        from tkinter import ttk as _ttk, messagebox as _messagebox
+    except Exception:
+        return False
+    import webbrowser as _webbrowser
+    tk, ttk, messagebox, webbrowser = _tk, _ttk, _messagebox, _webbrowser
+
+    # ttkbootstrap for themed UI (optional)
+    # If missing, we still allow a CLI-mode output so the HWID can be obtained
+    # without requiring any extra packages.
+    try:
+        from ttkbootstrap import Style as _Style  # type: ignore
+        from ttkbootstrap.widgets import Button as _Button, Label as _Label, Entry as _Entry, Combobox as _Combobox  # type: ignore
+        Style, Button, Label, Entry, Combobox = _Style, _Button, _Label, _Entry, _Combobox
+        HAS_TTKBOOTSTRAP = True
+    except Exception:
+        # Fallback widgets for type annotations and to keep imports working.
+        # Note: the full GUI experience requires ttkbootstrap.
+        Style = object  # type: ignore
+        Button, Label, Entry, Combobox = ttk.Button, ttk.Label, ttk.Entry, ttk.Combobox  # type: ignore
+
+    # Optional clipboard
+    try:
+        import pyperclip as _pyperclip
+        pyperclip, HAS_PYPERCLIP = _pyperclip, True
+    except Exception:
+        HAS_PYPERCLIP = False
+
+    _define_widgets()
+    return HAS_TTKBOOTSTRAP
+
+def _load_requests():
+    """Optional requests for HTTP calls; None when it is not installed."""
+    global requests, HAS_REQUESTS
+    if HAS_REQUESTS is None:
+        try:
+            import requests as _requests
+        except Exception:
+            _requests = None
+        requests, HAS_REQUESTS = _requests, _requests is not None
+    return requests
 
 def cli_main() -> int:
     hwid = get_hwid()
@@ -35,28 +92,7 @@ def cli_main() -> int:
     print(hwid, flush=True)
     return 0
 
-# Optional clipboard
-try:
-    import pyperclip
-    HAS_PYPERCLIP = True
-except Exception:
-    HAS_PYPERCLIP = False
-
-# Optional Pillow for high-quality logo resize
-try:
-    from PIL import Image, ImageTk
-    HAS_PIL = True
-except Exception:
-    HAS_PIL = False
-
-# Optional requests for HTTP probe
-try:
-    import requests
-    HAS_REQUESTS = True
-except Exception:
-    HAS_REQUESTS = False
-
-from urllib.request import urlopen, Request as UrlRequest
+from urllib.parse import urlsplit, parse_qs
 
 APP_NAME = "AInside License Tool"
 REGISTER_URL = "https://ainside.me/register"
@@ -64,14 +100,14 @@ SUPPORT_URL = "https://ainside.me/contact"
 ACCOUNT_URL = "https://ainside.me/account"
 CONFIG_FILE = "platform_probe.json"
 API_BASE = os.environ.get("AINSIDE_API_BASE", "https://ainside.me/api")
-HEARTBEAT_URL = "https://odlxhgatqyodxdessxts.supabase.co/functions/v1/client-heartbeat"
-LICENSE_ACTIVATE_URL = "https://odlxhgatqyodxdessxts.supabase.co/functions/v1/license-activate"
-LICENSE_CHECK_URL = "https://odlxhgatqyodxdessxts.supabase.co/functions/v1/license-check"
+FUNCTIONS_BASE = os.environ.get("AINSIDE_FUNCTIONS_BASE", "https://odlxhgatqyodxdessxts.supabase.co/functions/v1").rstrip("/")
+HEARTBEAT_URL = f"{FUNCTIONS_BASE}/client-heartbeat"
+LICENSE_ACTIVATE_URL = f"{FUNCTIONS_BASE}/license-activate"
+LICENSE_CHECK_URL = f"{FUNCTIONS_BASE}/license-check"
 AUTH_DIR = os.path.join(os.path.expanduser("~"), ".ainside_tool")
 AUTH_FILE = os.path.join(AUTH_DIR, "auth.json")
-
-# ensure auth dir exists
-os.makedirs(AUTH_DIR, exist_ok=True)
+PROOF_FILE = os.path.join(AUTH_DIR, "license_proof.json")
+SHM_FILE = os.path.join(AUTH_DIR, "license_snapshot.bin")
 
 # --------- Brand assets resolution ---------
 def resource_path(rel_path: str) -> str:
@@ -105,7 +141,22 @@ def copy_to_clipboard(widget, text: str):
         return False
 
 # --------- Config for status probe ---------
-def load_probe_config():
+PROBE_TARGET_KEYS = ("mode", "url", "method", "timeout", "expected_status", "tcp_host", "tcp_port")
+
+def probe_target_name(target) -> str:
+    if (target.get("mode") or "http").lower() == "tcp":
+        return f'{target.get("tcp_host") or "127.0.0.1"}:{target.get("tcp_port") or 8787}'
+    parts = urlsplit(target.get("url") or "")
+    return (parts.netloc + parts.path) or "platform"
+
+def load_probe_config(path: str = CONFIG_FILE):
+    """Probe settings from platform_probe.json. The top-level keys describe one
+    target (the original format); an optional "targets" list describes several,
+    each inheriting the top-level values it does not set and named by "name"
+    (default: host:port or the URL). The result always carries a non-empty
+    "targets" list; "max_workers" bounds how many are probed at once.
+    "service_snapshot" is the local service's shared snapshot file, where the
+    GUI picks up the service's license-check round-trip times."""
     defaults = {
         "mode": "http",               # "http" or "tcp"
         "url": "http://127.0.0.1:8787/health",
@@ -113,17 +164,32 @@ def load_probe_config():
         "timeout": 1.5,
         "expected_status": [200, 204],
         "tcp_host": "127.0.0.1",
-        "tcp_port": 8787
+        "tcp_port": 8787,
+        "max_workers": 4,
+        "service_snapshot": SHM_FILE  # service's shared snapshot, for license-check RTTs in the GUI; "" disables
     }
+    listed = None
     try:
-        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+        with open(path, "r", encoding="utf-8") as f:
             user = json.load(f)
-            defaults.update({k: v for k, v in user.items() if v is not None})
+            defaults.update({k: v for k, v in user.items() if v is not None and k != "targets"})
+            listed = user.get("targets")
     except Exception:
         pass
+    base = {k: defaults[k] for k in PROBE_TARGET_KEYS}
+    targets = []
+    for entry in (listed if isinstance(listed, list) and listed else [{}]):
+        if not isinstance(entry, dict):
+            continue
+        target = dict(base)
+        target.update({k: v for k, v in entry.items() if v is not None})
+        target["name"] = str(target.get("name") or probe_target_name(target))
+        targets.append(target)
+    defaults["targets"] = targets or [dict(base, name=probe_target_name(base))]
     return defaults
 
 def platform_is_online(cfg) -> bool:
+    """Probe one target (a load_probe_config target, or the config itself)."""
     mode = (cfg.get("mode") or "http").lower()
     timeout = float(cfg.get("timeout") or 1.5)
     if mode == "tcp":
@@ -138,19 +204,28 @@ def platform_is_online(cfg) -> bool:
         url = cfg.get("url") or "http://127.0.0.1:8787/health"
         method = (cfg.get("method") or "GET").upper()
         expected = cfg.get("expected_status") or [200, 204]
+        expected = {int(s) for s in (expected if isinstance(expected, (list, tuple)) else [expected])}
         try:
-            if HAS_REQUESTS:
+            if _load_requests() is not None:
                 resp = requests.request(method, url, timeout=timeout)
                 return int(resp.status_code) in expected
             else:
+                from urllib.request import urlopen, Request as UrlRequest
+                from urllib.error import HTTPError
                 req = UrlRequest(url, method=method)
-                with urlopen(req, timeout=timeout) as resp:
-                    return int(resp.status) in expected
+                try:
+                    with urlopen(req, timeout=timeout) as resp:
+                        return int(resp.status) in expected
+                except HTTPError as e:
+                    return int(e.code) in expected  # e.g. a target expected to answer 401
         except Exception:
             return False
 
 # --------- DPI scaling ---------
+UI_SCALE = 1.0  # dpi / 96, picks the @1x/@1.5x/@2x asset variants
+
 def set_dpi_awareness(root: tk.Tk):
+    global UI_SCALE
     try:
         if sys.platform.startswith("win"):
             import ctypes
@@ -172,6 +247,7 @@ def set_dpi_awareness(root: tk.Tk):
                 except Exception:
                     dpi = 96
             scale = dpi / 96.0
+            UI_SCALE = scale
             try:
                 root.tk.call('tk', 'scaling', scale)
             except Exception:
@@ -179,96 +255,100 @@ def set_dpi_awareness(root: tk.Tk):
         else:
             env_scale = os.environ.get("TK_SCALING")
             if env_scale:
-                root.tk.call('tk', 'scaling', float(env_scale))
+                UI_SCALE = float(env_scale)
+                root.tk.call('tk', 'scaling', UI_SCALE)
     except Exception:
         pass
 
 # --------- Logo handling ---------
+# Icons and theme logos are prebuilt by scripts/build-assets.py for every DPI
+# scale, so loading one is a plain tk.PhotoImage read: no resizing or
+# recoloring at startup.
+ASSET_SCALES = (1, 1.5, 2)
+THEME_LOGOS = {"Dark": "logo_white", "Light": "logo_dark"}
+
+def asset_scale(scale: float = None) -> float:
+    """Smallest prebuilt scale that covers the display (largest one above 2x)."""
+    scale = UI_SCALE if scale is None else scale
+    return next((s for s in ASSET_SCALES if s >= scale - 0.05), ASSET_SCALES[-1])
+
+def logo_variant_path(name: str, max_width=300, scale: float = None):
+    """Path of the prebuilt <name>_w<max_width>@<scale>x.png, falling back to the
+    nearest other scale; None when the asset pipeline has not produced it."""
+    wanted = asset_scale(scale)
+    for s in sorted(ASSET_SCALES, key=lambda s: (abs(s - wanted), -s)):
+        path = resource_path(f"{name}_w{int(max_width)}@{s:g}x.png")
+        if os.path.exists(path):
+            return path
+    return None
+
+IMAGE_CACHE_SIZE = 16
+
+class _ImageCache:
+    """Process-wide bounded LRU of decoded tk.PhotoImage objects keyed by
+    (asset, theme, max_width, DPI scale), so a theme or language switch
+    reuses the image instead of reading and decoding the PNG again. Missing
+    assets are cached too (as None) so the text fallback skips the disk."""
+
+    _MISSING = object()
+
+    def __init__(self, capacity: int = IMAGE_CACHE_SIZE):
+        from collections import OrderedDict
+        self.capacity = max(1, int(capacity))
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key, loader):
+        with self._lock:
+            img = self._items.get(key)
+            if img is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return None if img is self._MISSING else img
+            self.misses += 1
+        img = loader()
+        with self._lock:
+            self._items[key] = self._MISSING if img is None else img
+            self._items.move_to_end(key)
+            # Evicted images stay alive while a widget still holds a reference (ui["logo_img"]).
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+        return img
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+IMAGE_CACHE = _ImageCache()
+
 def load_logo(max_width=300):
-    logo_path = resource_path("logo_white.png")
-    if HAS_PIL and os.path.exists(logo_path):
-        try:
-            img = Image.open(logo_path).convert("RGBA")
-            w, h = img.size
-            if w > max_width:
-                ratio = max_width / float(w)
-                new_size = (int(w * ratio), int(h * ratio))
-                img = img.resize(new_size, Image.LANCZOS)
-            return ImageTk.PhotoImage(img)
-        except Exception:
-            pass
-    try:
-        return tk.PhotoImage(file=logo_path)
-    except Exception:
-        return None
+    return generate_theme_logo("Dark", max_width=max_width)  # same cache entry as the Dark theme
 
-def load_logo_path(rel_path: str, max_width=300):
-    """Load a specific logo asset by relative path within assets/.
-    Falls back gracefully if the asset is missing.
+def load_logo_path(rel_path: str, max_width=300, theme=None):
+    """Load a prebuilt logo variant by its base name within assets/
+    (e.g. "logo_white.png"), through IMAGE_CACHE. Returns None if the asset
+    is missing.
     """
-    logo_path = resource_path(rel_path)
-    if HAS_PIL and os.path.exists(logo_path):
+    name = os.path.splitext(rel_path)[0]
+    scale = asset_scale()
+
+    def load():
+        path = logo_variant_path(name, max_width, scale)
+        if path is None:
+            return None
         try:
-            img = Image.open(logo_path).convert("RGBA")
-            w, h = img.size
-            if w > max_width:
-                ratio = max_width / float(w)
-                new_size = (int(w * ratio), int(h * ratio))
-                img = img.resize(new_size, Image.LANCZOS)
-            return ImageTk.PhotoImage(img)
+            return tk.PhotoImage(file=path)
         except Exception:
-            pass
-    try:
-        if os.path.exists(logo_path):
-            return tk.PhotoImage(file=logo_path)
-    except Exception:
-        pass
-    return None
+            return None
 
-def _make_mono_from_alpha(base_img, rgb_color=(17, 17, 17)):
-    """Given an RGBA image (white logo on transparent), create a solid-color
-    version using the alpha mask, preserving alpha, with the provided RGB color."""
-    try:
-        if base_img.mode != "RGBA":
-            base_img = base_img.convert("RGBA")
-        r, g, b = rgb_color
-        color_img = Image.new("RGBA", base_img.size, (r, g, b, 255))
-        alpha = base_img.split()[-1]
-        color_img.putalpha(alpha)
-        return color_img
-    except Exception:
-        return None
+    return IMAGE_CACHE.get_or_load((name, theme, int(max_width), scale), load)
 
 def generate_theme_logo(theme_key: str, max_width=300):
-    """Return an ImageTk.PhotoImage suitable for the current theme.
-    - Dark: prefers logo_white.png
-    - Light: prefers logo_dark.png, and if missing, recolors logo_white.png to dark.
-    """
-    is_dark = (theme_key == "Dark")
-    if is_dark:
-        # Prefer the white logo as-is
-        return load_logo_path("logo_white.png", max_width=max_width)
-    # Light theme: try a dark asset first
-    dark_img = load_logo_path("logo_dark.png", max_width=max_width)
-    if dark_img is not None:
-        return dark_img
-    # If missing and PIL available, recolor white logo to dark
-    if HAS_PIL:
-        src_path = resource_path("logo_white.png")
-        if os.path.exists(src_path):
-            try:
-                img = Image.open(src_path).convert("RGBA")
-                w, h = img.size
-                if w > max_width:
-                    ratio = max_width / float(w)
-                    img = img.resize((int(w * ratio), int(h * ratio)), Image.LANCZOS)
-                mono = _make_mono_from_alpha(img, rgb_color=(17, 17, 17))  # near-black
-                if mono is not None:
-                    return ImageTk.PhotoImage(mono)
-            except Exception:
-                pass
-    # Last resort: None (caller will show text fallback)
-    return None
+    """Return a tk.PhotoImage of the logo colored for the theme
+    (white on Dark, near-black on Light), or None (caller shows text)."""
+    return load_logo_path(THEME_LOGOS.get(theme_key, "logo_white") + ".png", max_width=max_width, theme=theme_key)
 
 def set_window_icon(root: tk.Tk):
     ico_path = resource_path("app_icon.ico")
@@ -278,10 +358,10 @@ def set_window_icon(root: tk.Tk):
     except Exception:
         pass
     try:
-        png_path = resource_path("icon_512.png")
-        if os.path.exists(png_path):
-            icon_png = tk.PhotoImage(file=png_path)
-            root.iconphoto(True, icon_png)
+        # Several sizes: the window manager picks the title-bar and taskbar ones.
+        icons = [tk.PhotoImage(file=p) for p in (resource_path(f"icon_{n}.png") for n in (16, 32, 48, 256)) if os.path.exists(p)]
+        if icons:
+            root.iconphoto(True, *icons)
     except Exception:
         pass
 
@@ -302,6 +382,7 @@ TEXTS = {
         "status": "Platform Status",
         "connected": "● Online",
         "disconnected": "● Offline",
+        "degraded": "● Degraded",
         "lang": "Language",
         "en": "English",
         "he": "עברית",
@@ -329,6 +410,7 @@ TEXTS = {
         "status": "Estado de la Plataforma",
         "connected": "● En línea",
         "disconnected": "● Fuera de línea",
+        "degraded": "● Degradado",
         "lang": "Idioma",
         "en": "English",
         "he": "עברית",
@@ -356,6 +438,7 @@ TEXTS = {
         "status": "סטטוס הפלטפורמה",
         "connected": "● מחובר",
         "disconnected": "● מנותק",
+        "degraded": "● חלקי",
         "lang": "שפה",
         "en": "English",
         "he": "עברית",
@@ -395,7 +478,7 @@ def update_theme_assets(theme_key: str, ui, style: Style):
     except Exception:
         pass
 
-    # Choose appropriate logo (or recolor fallback for Light theme)
+    # Pre-colored logo asset for the theme (built by build-assets.py)
     img = generate_theme_logo(theme_key, max_width=300)
 
     # If no image available, show text fallback; otherwise set and persist image ref
@@ -445,8 +528,13 @@ def auth_load():
     except Exception:
         return None
 
+def _ensure_auth_dir():
+    # Created on first write, not at import, so --cli/--service stay read-only until needed.
+    os.makedirs(AUTH_DIR, exist_ok=True)
+
 def auth_save(data: dict):
     try:
+        _ensure_auth_dir()
         with open(AUTH_FILE, "w", encoding="utf-8") as f:
             json.dump(data, f)
         return True
@@ -460,10 +548,195 @@ def auth_unlink():
     except Exception:
         pass
 
+# Last signed license proof, kept so a restarted service can answer /status
+# immediately and a network blip does not drop a still-valid proof.
+def _proof_is_fresh(payload, now_ms: float = None) -> bool:
+    try:
+        return float(payload["exp"]) > (time.time() * 1000 if now_ms is None else now_ms)
+    except Exception:
+        return False
+
+def proof_load(hwid: str):
+    try:
+        with open(PROOF_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return None
+    payload = data.get("payload") if isinstance(data, dict) else None
+    if not isinstance(payload, dict) or str(payload.get("hwid")) != str(hwid):
+        return None
+    if not data.get("payloadJson") or not data.get("signature") or not _proof_is_fresh(payload):
+        return None
+    return data
+
+def proof_save(data: dict):
+    """Write atomically (temp file + os.replace) so a crash never leaves a torn file."""
+    tmp = f"{PROOF_FILE}.{os.getpid()}.tmp"
+    try:
+        _ensure_auth_dir()
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, PROOF_FILE)
+        return True
+    except Exception:
+        try:
+            os.remove(tmp)
+        except Exception:
+            pass
+        return False
+
+def proof_clear():
+    try:
+        if os.path.exists(PROOF_FILE):
+            os.remove(PROOF_FILE)
+    except Exception:
+        pass
+
+# --------- Pooled HTTP client (license-check, heartbeat, account API) ---------
+_IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+
+class _HttpPool:
+    """Shared keep-alive connections so periodic calls to the same host skip
+    the TCP + TLS handshake. Uses a requests.Session when requests is
+    installed, otherwise a small http.client pool with the same limits."""
+
+    def __init__(self, per_host: int = 4, connect_timeout: float = 5.0, idle_timeout: float = 45.0, ca_file=None):
+        self.per_host = max(1, int(per_host))
+        self.connect_timeout = float(connect_timeout)
+        self.idle_timeout = float(idle_timeout)
+        self.ca_file = ca_file or None
+        self._lock = threading.Lock()
+        self._idle = {}   # (scheme, host, port) -> [(conn, last_used), ...]
+        self._slots = {}  # (scheme, host, port) -> BoundedSemaphore(per_host)
+        self._session = None
+        self._ssl_ctx = None
+
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                from requests.adapters import HTTPAdapter
+                sess = requests.Session()
+                adapter = HTTPAdapter(pool_connections=8, pool_maxsize=self.per_host, pool_block=True, max_retries=0)
+                sess.mount("https://", adapter)
+                sess.mount("http://", adapter)
+                self._session = sess
+            return self._session
+
+    def requests_kwargs(self, timeout: float) -> dict:
+        return {"timeout": (self.connect_timeout, timeout), "verify": (self.ca_file or True)}
+
+    def _ssl_context(self):
+        if self._ssl_ctx is None:
+            import ssl
+            self._ssl_ctx = ssl.create_default_context(cafile=self.ca_file)
+        return self._ssl_ctx
+
+    def _slot(self, key):
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = threading.BoundedSemaphore(self.per_host)
+            return slot
+
+    def _checkout(self, key):
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key) or []
+            while idle:
+                conn, last_used = idle.pop()
+                if now - last_used < self.idle_timeout and not self._dropped(conn):
+                    return conn, True
+                conn.close()
+        scheme, host, port = key
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(host, port, timeout=self.connect_timeout, context=self._ssl_context())
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.connect_timeout)
+        conn.connect()
+        return conn, False
+
+    @staticmethod
+    def _dropped(conn) -> bool:
+        """True when the server already closed an idle connection (its keep-alive
+        timeout may be shorter than ours). An idle socket is never readable unless
+        the peer sent EOF, a reset or stray data; any of those makes it unusable.
+        Same check as urllib3's is_connection_dropped."""
+        import select
+        sock = conn.sock
+        if sock is None:
+            return True
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+            return bool(readable)
+        except (OSError, ValueError):
+            return True
+
+    def _checkin(self, key, conn):
+        with self._lock:
+            self._idle.setdefault(key, []).append((conn, time.monotonic()))
+
+    def request(self, method: str, url: str, headers=None, body=None, timeout: float = 6.0):
+        """http.client path: returns (status, raw_bytes); raises on network errors."""
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        key = (scheme, parts.hostname or "", parts.port or (443 if scheme == "https" else 80))
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        slot = self._slot(key)
+        if not slot.acquire(timeout=timeout):
+            raise TimeoutError(f"connection pool exhausted for {key[1]}")
+        try:
+            for attempt in (0, 1):
+                conn, reused = self._checkout(key)
+                sent = False
+                try:
+                    conn.sock.settimeout(timeout)
+                    conn.request(method, target, body=body, headers=headers or {})
+                    sent = True
+                    resp = conn.getresponse()
+                    raw = resp.read()
+                except (ConnectionResetError, ConnectionAbortedError, BrokenPipeError, http.client.BadStatusLine):
+                    conn.close()
+                    # The server may drop an idle keep-alive socket first; retry once on a fresh one.
+                    # Once a POST is on the wire the server may have acted on it (activation,
+                    # license-check), so only requests that were not fully sent or are
+                    # idempotent are repeated.
+                    if reused and attempt == 0 and (not sent or method.upper() in _IDEMPOTENT_METHODS):
+                        continue
+                    raise
+                except Exception:
+                    conn.close()
+                    raise
+                if resp.will_close:
+                    conn.close()
+                else:
+                    self._checkin(key, conn)
+                return resp.status, raw
+        finally:
+            slot.release()
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                for conn, _ in idle:
+                    conn.close()
+            self._idle.clear()
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+HTTP_POOL = _HttpPool(
+    per_host=int(os.environ.get("AINSIDE_HTTP_POOL_SIZE", "4")),
+    connect_timeout=float(os.environ.get("AINSIDE_HTTP_CONNECT_TIMEOUT", "5")),
+    idle_timeout=float(os.environ.get("AINSIDE_HTTP_IDLE_TIMEOUT", "45")),
+    ca_file=os.environ.get("AINSIDE_HTTP_CA_FILE"),
+)
+
 def http_request(method: str, url: str, headers=None, payload=None, timeout=6.0):
     headers = headers or {}
-    if HAS_REQUESTS:
-        resp = requests.request(method, url, json=payload, headers=headers, timeout=timeout)
+    if _load_requests() is not None:
+        resp = HTTP_POOL.session().request(method, url, json=payload, headers=headers, **HTTP_POOL.requests_kwargs(timeout))
         try:
             data = resp.json()
         except Exception:
@@ -472,13 +745,12 @@ def http_request(method: str, url: str, headers=None, payload=None, timeout=6.0)
     else:
         try:
             body = json.dumps(payload).encode("utf-8") if payload is not None else None
-            req = UrlRequest(url, method=method, headers={"Content-Type": "application/json", **headers}, data=body)
-            with urlopen(req, timeout=timeout) as resp:
-                txt = resp.read().decode("utf-8", errors="ignore")
-                try:
-                    return resp.status, json.loads(txt)
-                except Exception:
-                    return resp.status, {"text": txt}
+            status, raw = HTTP_POOL.request(method, url, headers={"Content-Type": "application/json", **headers}, body=body, timeout=timeout)
+            txt = raw.decode("utf-8", errors="ignore")
+            try:
+                return status, json.loads(txt)
+            except Exception:
+                return status, {"text": txt}
         except Exception as e:
             return 0, {"error": str(e)}
 
@@ -507,134 +779,1530 @@ def activate_device(order_id: str, email: str, hwid: str) -> dict:
         _auth_set_device_secret(str(data.get("deviceSecret")))
     return data
 
-def license_check(hwid: str, device_secret: str) -> dict:
-    payload = {"hwid": hwid, "deviceSecret": device_secret, "nonce": base64_urlsafe_random(12)}
-    status, data = http_request("POST", LICENSE_CHECK_URL, payload=payload, timeout=8.0)
+def _license_check_payload(hwid: str, device_secret: str) -> dict:
+    return {"hwid": hwid, "deviceSecret": device_secret, "nonce": base64_urlsafe_random(12)}
+
+def _license_check_result(status: int, data) -> dict:
     if status != 200:
         raise RuntimeError((data or {}).get("error") or (data or {}).get("reason") or f"license-check failed ({status})")
     return data
 
+def license_check(hwid: str, device_secret: str) -> dict:
+    payload = _license_check_payload(hwid, device_secret)
+    status, data = http_request("POST", LICENSE_CHECK_URL, payload=payload, timeout=8.0)
+    return _license_check_result(status, data)
+
+async def _async_http_request(method: str, url: str, headers=None, payload=None, timeout=6.0):
+    """Non-blocking counterpart of http_request for the asyncio engine (stdlib only).
+    Returns (status, data) like http_request; network errors return (0, {"error": ...})."""
+    import asyncio
+    parts = urlsplit(url)
+    secure = parts.scheme == "https"
+    host = parts.hostname or ""
+    port = parts.port or (443 if secure else 80)
+    target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    req_headers = {
+        "Host": parts.netloc,
+        "User-Agent": "AInside-HWID",
+        "Accept": "application/json",
+        "Content-Type": "application/json",
+        "Content-Length": str(len(body)),
+        "Connection": "close",
+        **(headers or {}),
+    }
+    head = f"{method} {target} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in req_headers.items()) + "\r\n"
+
+    async def exchange():
+        ssl_ctx = None
+        if secure:
+            import ssl
+            ssl_ctx = ssl.create_default_context()
+        reader, writer = await asyncio.open_connection(host, port, ssl=ssl_ctx, server_hostname=(host if secure else None))
+        try:
+            writer.write(head.encode("latin-1") + body)
+            await writer.drain()
+            status_line = await reader.readline()
+            status = int(status_line.split()[1])
+            resp_headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                resp_headers[name.strip().lower()] = value.strip()
+            if "chunked" in resp_headers.get("transfer-encoding", "").lower():
+                chunks = []
+                while True:
+                    size = int(((await reader.readline()).split(b";")[0].strip() or b"0"), 16)
+                    if size == 0:
+                        break
+                    chunks.append(await reader.readexactly(size))
+                    await reader.readexactly(2)
+                raw = b"".join(chunks)
+            elif "content-length" in resp_headers:
+                raw = await reader.readexactly(int(resp_headers["content-length"]))
+            else:
+                raw = await reader.read()
+            return status, raw
+        finally:
+            writer.close()
+
+    try:
+        status, raw = await asyncio.wait_for(exchange(), timeout)
+    except Exception as e:
+        return 0, {"error": str(e) or type(e).__name__}
+    txt = raw.decode("utf-8", errors="ignore")
+    try:
+        return status, json.loads(txt)
+    except Exception:
+        return status, {"status": status, "text": txt}
+
+async def _async_license_check(hwid: str, device_secret: str) -> dict:
+    payload = _license_check_payload(hwid, device_secret)
+    status, data = await _async_http_request("POST", LICENSE_CHECK_URL, payload=payload, timeout=8.0)
+    return _license_check_result(status, data)
+
 
 # --------- Local License Service (for TradeStation DLL/strategy) ---------
+class _LicenseSnapshot:
+    """Immutable license state plus its pre-encoded /status body and ETag.
+    Never mutated after construction; every change produces a new snapshot."""
+    __slots__ = ("allowed", "reason", "hwid", "last_check_ts", "payload", "payload_json",
+                 "signature", "alg", "status_body", "status_etag",
+                 "compact_body", "compact_etag", "binary_body", "binary_etag", "seq", "check_ms")
+    _FIELDS = ("allowed", "reason", "hwid", "last_check_ts", "payload", "payload_json", "signature", "alg", "seq")
+
+    def __init__(self, allowed=False, reason="not_checked", hwid="", last_check_ts=0,
+                 payload=None, payload_json=None, signature=None, alg=None, seq=0, check_ms=None):
+        init = object.__setattr__
+        init(self, "seq", seq)  # publish counter; not part of the response bodies
+        # RTT of the license-check this publish came from; None for any other
+        # publish (not in _FIELDS, so replace() never carries it over).
+        init(self, "check_ms", check_ms)
+        init(self, "allowed", allowed)
+        init(self, "reason", reason)
+        init(self, "hwid", hwid)
+        init(self, "last_check_ts", last_check_ts)
+        init(self, "payload", payload)
+        init(self, "payload_json", payload_json)
+        init(self, "signature", signature)
+        init(self, "alg", alg)
+        body = _build_status_body(self)
+        init(self, "status_body", body)
+        init(self, "status_etag", _strong_etag(body))
+        body = _build_compact_body(self)
+        init(self, "compact_body", body)
+        init(self, "compact_etag", _strong_etag(body))
+        body = _build_binary_frame(self)
+        init(self, "binary_body", body)
+        init(self, "binary_etag", _strong_etag(body))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("_LicenseSnapshot is immutable")
+
+    def replace(self, **changes) -> "_LicenseSnapshot":
+        fields = {name: getattr(self, name) for name in self._FIELDS}
+        fields.update(changes)
+        return _LicenseSnapshot(**fields)
+
 class _LicenseState:
+    """Holder of the current _LicenseSnapshot.
+    Readers just load `.current` (one attribute read, no lock), so they never
+    block each other or see a half-updated state. Writers build the new
+    snapshot, JSON encoding included, outside any lock and publish it with a
+    single reference swap; write_lock only guards that compare-and-swap."""
+
     def __init__(self):
-        self.lock = threading.Lock()
-        self.allowed = False
-        self.reason = "not_checked"
-        self.last_check_ts = 0
-        self.hwid = ""
-        self.payload = None
-        self.payload_json = None
-        self.signature = None
-        self.alg = None
+        self.write_lock = threading.Lock()
+        self.current = _LicenseSnapshot()
+        self._listeners = []
+
+    def subscribe(self, fn):
+        """Call fn(snapshot) after every publish, in publish order. Listeners
+        run on the writer's thread and must be quick."""
+        with self.write_lock:
+            self._listeners.append(fn)
+            snap = self.current
+        fn(snap)
+
+    def publish(self, **changes) -> _LicenseSnapshot:
+        while True:
+            base = self.current
+            snap = base.replace(seq=base.seq + 1, **changes)
+            with self.write_lock:
+                if self.current is base:
+                    self.current = snap
+                    for fn in self._listeners:
+                        try:
+                            fn(snap)
+                        except Exception:
+                            pass
+                    return snap
+            # another writer got in first; rebuild on top of its snapshot
+
+def _strong_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def _payload_json_b64u(state):
+    try:
+        if isinstance(state.payload_json, str) and state.payload_json:
+            return base64.urlsafe_b64encode(state.payload_json.encode("utf-8")).decode("ascii").rstrip("=")
+    except Exception:
+        pass
+    return None
+
+def _build_status_body(state) -> bytes:
+    payload_json_b64u = _payload_json_b64u(state)
+    obj = {
+        "allowed": state.allowed,
+        "reason": state.reason,
+        "hwid": state.hwid,
+        "lastCheckTs": state.last_check_ts,
+        "license": {
+            "payload": state.payload,
+            "payloadJson": state.payload_json,
+            "payloadJsonB64u": payload_json_b64u,
+            "signature": state.signature,
+            "alg": state.alg,
+        },
+    }
+    return json.dumps(obj).encode("utf-8")
+
+def _build_compact_body(state) -> bytes:
+    """?profile=compact: only what the DLL verifier reads, no whitespace."""
+    obj = {"alg": state.alg, "payloadJsonB64u": _payload_json_b64u(state), "signature": state.signature}
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+BINARY_FRAME_MAGIC = b"AIL1"
+
+def _build_binary_frame(state) -> bytes:
+    """?profile=binary: length-prefixed frame, little-endian:
+        "AIL1" | u16 len + alg (ASCII) | u32 len + payloadJson (signed UTF-8 bytes)
+               | u16 len + signature (raw bytes, base64url-decoded)
+    Lengths are 0 when there is no proof."""
+    alg = (state.alg or "").encode("ascii", errors="ignore")
+    payload = state.payload_json.encode("utf-8") if isinstance(state.payload_json, str) else b""
+    sig = b""
+    if isinstance(state.signature, str) and state.signature:
+        try:
+            sig = base64.urlsafe_b64decode(state.signature + "=" * (-len(state.signature) % 4))
+        except Exception:
+            sig = b""
+    return b"".join((
+        BINARY_FRAME_MAGIC,
+        struct.pack("<H", len(alg)), alg,
+        struct.pack("<I", len(payload)), payload,
+        struct.pack("<H", len(sig)), sig,
+    ))
+
+def _parse_binary_frame(data: bytes) -> dict:
+    """Inverse of _build_binary_frame; raises ValueError on a malformed frame."""
+    try:
+        if data[:4] != BINARY_FRAME_MAGIC:
+            raise ValueError("bad magic")
+        pos = 4
+        (n,) = struct.unpack_from("<H", data, pos); pos += 2
+        alg = data[pos:pos + n].decode("ascii"); pos += n
+        (n,) = struct.unpack_from("<I", data, pos); pos += 4
+        payload_json = data[pos:pos + n]; pos += n
+        (n,) = struct.unpack_from("<H", data, pos); pos += 2
+        signature = data[pos:pos + n]; pos += n
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"malformed frame: {e}")
+    if pos != len(data):
+        raise ValueError("malformed frame: length mismatch")
+    return {"alg": alg, "payloadJson": payload_json, "signature": signature}
 
 LICENSE_STATE = _LicenseState()
+# Sequence numbers restart at 1 in every process. Cursors handed to clients
+# (X-License-Seq, SSE ids) are "<boot>:<seq>" so one kept across a service
+# restart is recognised as stale instead of silently matching a new seq.
+BOOT_ID = os.urandom(4).hex()
+
+WATCH_CHECK_SECONDS = 1.0  # how often a waiting SSE/long-poll client is checked for EOF
+
+class _StateWaiters:
+    """Wakes long-poll and SSE clients when LICENSE_STATE publishes, for both
+    the threaded handler (Condition) and the asyncio engine (per-waiter Event)."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._async = set()  # {(loop, asyncio.Event)}
+
+    def notify(self, snap):
+        with self._cond:
+            self._cond.notify_all()
+        for loop, event in list(self._async):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # loop already closed
+
+    def wait_for_change(self, since: int, timeout: float, gone=None) -> _LicenseSnapshot:
+        """Block until a snapshot newer than since is published or timeout
+        passes. gone() is checked every WATCH_CHECK_SECONDS; once it reports
+        the client has left, ConnectionAbortedError is raised."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while LICENSE_STATE.current.seq <= since:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(min(remaining, WATCH_CHECK_SECONDS) if gone else remaining)
+                if gone is not None and gone():
+                    raise ConnectionAbortedError("client closed the connection")
+        return LICENSE_STATE.current
+
+    async def async_wait_for_change(self, since: int, timeout: float, gone=None) -> _LicenseSnapshot:
+        import asyncio
+        token = (asyncio.get_running_loop(), asyncio.Event())
+        self._async.add(token)
+        try:
+            deadline = time.monotonic() + timeout
+            while LICENSE_STATE.current.seq <= since:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(token[1].wait(), min(remaining, WATCH_CHECK_SECONDS) if gone else remaining)
+                    token[1].clear()
+                except asyncio.TimeoutError:
+                    if not gone:
+                        break
+                if gone is not None and gone():
+                    raise ConnectionAbortedError("client closed the connection")
+        finally:
+            self._async.discard(token)
+        return LICENSE_STATE.current
+
+LICENSE_WAITERS = _StateWaiters()
+LICENSE_STATE.subscribe(LICENSE_WAITERS.notify)
+
+
+# --------- Shared-memory snapshot (zero-HTTP reads for local consumers) ---------
+# The service mirrors the current binary frame (see _build_binary_frame) into a
+# memory-mapped file guarded by a seqlock, so a local consumer can map it once
+# and read the signed proof with plain memory loads. HTTP stays the fallback.
+#
+# Layout, little-endian:
+#   0  "AILS"    magic
+#   4  u32       layout version (1)
+#   8  u64       seq: odd while a write is in progress, +2 per publish
+#   16 u32       frame length
+#   20 u32       round-trip time of the license-check behind this publish, in
+#                microseconds; 0 when the publish did not come from one
+#   24 ...       frame bytes
+# Readers: load seq (retry if odd), copy the frame, load seq again; the copy is
+# valid only if both loads match. Native readers need acquire loads on seq.
+_SHM_MAGIC = b"AILS"
+_SHM_VERSION = 2  # 2: license-check RTT at offset 20
+_SHM_HEADER = struct.Struct("<4sIQII")
+_SHM_SIZE = 16384
+
+class SharedSnapshotWriter:
+    def __init__(self, path: str = SHM_FILE, size: int = _SHM_SIZE):
+        import mmap
+        self.path = path
+        self.size = size
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        mode = "r+b" if os.path.exists(path) else "w+b"
+        self._file = open(path, mode)
+        if os.fstat(self._file.fileno()).st_size < size:
+            self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        magic, version, seq, _, _ = _SHM_HEADER.unpack_from(self._mm, 0)
+        # Keep seq monotonic across restarts so readers never see it go back.
+        self.seq = (seq + 1) & ~1 if (magic == _SHM_MAGIC and version == _SHM_VERSION) else 0
+        _SHM_HEADER.pack_into(self._mm, 0, _SHM_MAGIC, _SHM_VERSION, self.seq, 0, 0)
+
+    def publish(self, frame: bytes, check_us: int = 0) -> bool:
+        if len(frame) > self.size - _SHM_HEADER.size:
+            return False
+        mm = self._mm
+        start = _SHM_HEADER.size
+        struct.pack_into("<Q", mm, 8, self.seq + 1)  # odd: write in progress
+        struct.pack_into("<II", mm, 16, len(frame), max(0, min(int(check_us), 0xFFFFFFFF)))
+        mm[start:start + len(frame)] = frame
+        self.seq += 2
+        struct.pack_into("<Q", mm, 8, self.seq)
+        return True
+
+    def close(self):
+        try:
+            self._mm.close()
+            self._file.close()
+        except Exception:
+            pass
+
+class SharedSnapshotReader:
+    """Python reader for the shared snapshot; map once, then read() per check."""
+
+    def __init__(self, path: str = SHM_FILE):
+        import mmap
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, _, _ = _SHM_HEADER.unpack_from(self._mm, 0)
+        if magic != _SHM_MAGIC or version != _SHM_VERSION:
+            self.close()
+            raise ValueError("not an AInside license snapshot")
+
+    def read(self, retries: int = 1000):
+        """Return (publish_number, frame dict), or None if nothing has been published
+        yet or no consistent copy was seen."""
+        mm = self._mm
+        start = _SHM_HEADER.size
+        for _ in range(retries):
+            (seq1,) = struct.unpack_from("<Q", mm, 8)
+            if seq1 & 1:
+                continue
+            (n,) = struct.unpack_from("<I", mm, 16)
+            if n > len(mm) - start:
+                continue
+            data = mm[start:start + n]
+            (seq2,) = struct.unpack_from("<Q", mm, 8)
+            if seq1 == seq2:
+                if not n:
+                    return None  # writer attached but nothing published yet
+                try:
+                    return seq1 // 2, _parse_binary_frame(data)
+                except ValueError:
+                    return None
+        return None
+
+    def last_check(self, retries: int = 1000):
+        """(publish_number, license-check RTT in ms or None) from the header, or None."""
+        mm = self._mm
+        for _ in range(retries):
+            (seq1,) = struct.unpack_from("<Q", mm, 8)
+            if seq1 & 1:
+                continue
+            (check_us,) = struct.unpack_from("<I", mm, 20)
+            (seq2,) = struct.unpack_from("<Q", mm, 8)
+            if seq1 == seq2:
+                return seq1 // 2, (check_us / 1000.0 if check_us else None)
+        return None
+
+    def close(self):
+        try:
+            self._mm.close()
+            self._file.close()
+        except Exception:
+            pass
+
+def _attach_shared_snapshot(path: str = SHM_FILE):
+    """Mirror every LICENSE_STATE publish into the shared snapshot file."""
+    try:
+        writer = SharedSnapshotWriter(path)
+    except Exception as e:
+        print(f"[WARN] Shared snapshot disabled: {e}", flush=True)
+        return None
+    def mirror(snap):
+        writer.publish(snap.binary_body, int(snap.check_ms * 1000) if snap.check_ms else 0)
+
+    LICENSE_STATE.subscribe(mirror)
+    return writer
+
+def _publish_license_state(allowed: bool, reason: str, payload=None, payload_json=None, signature=None, alg=None,
+                           check_ms=None):
+    return LICENSE_STATE.publish(
+        check_ms=check_ms,
+        allowed=allowed,
+        reason=reason,
+        payload=payload,
+        payload_json=payload_json,
+        signature=signature,
+        alg=alg,
+        last_check_ts=int(time.time()),
+    )
+
+def _apply_license_check(data, persist: bool = True, check_ms=None):
+    """Publish the outcome of a successful license-check round-trip and keep
+    the signed proof on disk for warm starts."""
+    payload = data.get("payload") if isinstance(data, dict) else None
+    payload_json = data.get("payloadJson") if isinstance(data, dict) else None
+    signature = data.get("signature") if isinstance(data, dict) else None
+    alg = data.get("alg") if isinstance(data, dict) else None
+
+    allowed = bool(payload and payload.get("allowed"))
+    reason = (payload or {}).get("reason") or "unknown"
+
+    _publish_license_state(allowed, reason, payload, payload_json, signature, alg, check_ms)
+    if persist:
+        _persist_license_proof(data)
+    return payload
+
+def _persist_license_proof(data):
+    """Keep a fresh signed proof on disk for warm starts (blocking: fsync)."""
+    if not isinstance(data, dict):
+        return
+    payload, payload_json, signature = data.get("payload"), data.get("payloadJson"), data.get("signature")
+    if payload_json and signature and _proof_is_fresh(payload):
+        proof_save({"payload": payload, "payloadJson": payload_json, "signature": signature, "alg": data.get("alg")})
+
+def _publish_license_error(reason: str):
+    """Stale-while-revalidate: keep serving the last signed proof until its own
+    exp while refreshes fail; only then report the error."""
+    snap = LICENSE_STATE.current
+    if snap.signature and _proof_is_fresh(snap.payload):
+        return
+    _publish_license_state(False, reason)
+
+def _publish_not_activated():
+    proof_clear()
+    _publish_license_state(False, "not_activated")
+
+class _RefreshScheduler:
+    """Decides how long the poll loop waits before the next license-check.
+
+    - After a good proof: wait ttl_fraction of its remaining lifetime, but
+      always leave early_margin seconds before exp for retries.
+    - After an error: exponential backoff with jitter, still capped so the
+      retry lands before the current proof expires.
+    The lifetime is taken as exp - ts from the signed payload and anchored to
+    the local monotonic clock when the proof arrives, so clock skew between
+    this PC and the server does not matter.
+    """
+
+    def __init__(self, ttl_fraction: float = 0.6, early_margin: float = 12.0, min_delay: float = 2.0,
+                 max_delay: float = 300.0, default_delay: float = 25.0, not_activated_delay: float = 3.0,
+                 error_base: float = 2.0, error_max: float = 120.0):
+        self.ttl_fraction = ttl_fraction
+        self.early_margin = early_margin
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.default_delay = default_delay
+        self.not_activated_delay = not_activated_delay
+        self.error_base = error_base
+        self.error_max = error_max
+        self.errors = 0
+        self.expires_at = None  # time.monotonic() deadline of the current proof
+
+    @staticmethod
+    def _proof_ttl(payload) -> float:
+        try:
+            return (float(payload["exp"]) - float(payload["ts"])) / 1000.0
+        except Exception:
+            return 0.0
+
+    def _time_left(self, now: float) -> float:
+        return (self.expires_at - now) if self.expires_at is not None else 0.0
+
+    def _cap_before_expiry(self, delay: float, now: float) -> float:
+        left = self._time_left(now)
+        if left > 0:
+            delay = min(delay, left - self.early_margin)
+        return max(self.min_delay, delay)
+
+    def on_success(self, payload, now: float = None) -> float:
+        now = time.monotonic() if now is None else now
+        self.errors = 0
+        ttl = self._proof_ttl(payload)
+        if ttl <= 0:
+            self.expires_at = None
+            return self.default_delay
+        self.expires_at = now + ttl
+        delay = min(self.max_delay, ttl * self.ttl_fraction)
+        # +/-10% so a fleet that started together does not refresh in lockstep
+        delay *= random.uniform(0.9, 1.1)
+        return self._cap_before_expiry(delay, now)
+
+    def on_error(self, now: float = None) -> float:
+        now = time.monotonic() if now is None else now
+        self.errors += 1
+        backoff = min(self.error_max, self.error_base * (2 ** (self.errors - 1)))
+        delay = random.uniform(backoff / 2.0, backoff)
+        return self._cap_before_expiry(delay, now)
+
+    def on_not_activated(self) -> float:
+        self.errors = 0
+        self.expires_at = None
+        return self.not_activated_delay
+
+ON_DEMAND_MARGIN_MS = 15000
+ON_DEMAND_MIN_INTERVAL = 5.0
+ON_DEMAND_WAIT = 2.0
+
+def _on_demand_action(snap: _LicenseSnapshot, now_ms: float = None):
+    """What a /status read should do about the current proof: None while it
+    has more than ON_DEMAND_MARGIN_MS left, "refresh" (serve it, refresh in
+    the background) when it is close to exp, "wait" once it has expired."""
+    if not snap.signature or not isinstance(snap.payload, dict):
+        return None
+    try:
+        left = float(snap.payload["exp"]) - (time.time() * 1000.0 if now_ms is None else now_ms)
+    except Exception:
+        return None
+    if left > ON_DEMAND_MARGIN_MS:
+        return None
+    return "refresh" if left > 0 else "wait"
 
-def _json_response(handler: BaseHTTPRequestHandler, status: int, obj: dict):
-    raw = json.dumps(obj).encode("utf-8")
-    handler.send_response(status)
-    handler.send_header("Content-Type", "application/json")
-    handler.send_header("Cache-Control", "no-store")
-    handler.send_header("Content-Length", str(len(raw)))
-    handler.end_headers()
-    handler.wfile.write(raw)
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class _SingleFlight:
+    """At most one call of fn in progress; callers arriving meanwhile share
+    the in-flight call instead of starting their own."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flight = None
+        self.started_at = float("-inf")
+
+    @property
+    def busy(self) -> bool:
+        return self._flight is not None
+
+    def _claim(self):
+        with self._lock:
+            if self._flight is not None:
+                return self._flight, False
+            self._flight = _Flight()
+            self.started_at = time.monotonic()
+            return self._flight, True
+
+    def _run(self, flight: _Flight, fn):
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                self._flight = None
+            flight.done.set()
+
+    def do(self, fn):
+        """Run fn (or join the call already running) and return its result."""
+        flight, owner = self._claim()
+        if owner:
+            self._run(flight, fn)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def start(self, fn) -> _Flight:
+        """Start fn on a background thread unless a call is already running."""
+        flight, owner = self._claim()
+        if owner:
+            threading.Thread(target=self._run, args=(flight, fn), daemon=True).start()
+        return flight
+
+class _AsyncSingleFlight:
+    """_SingleFlight for the asyncio engine: the shared call is a Task."""
+
+    def __init__(self):
+        self._task = None
+        self.started_at = float("-inf")
+
+    @property
+    def busy(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, coro_fn) -> asyncio.Future:
+        import asyncio
+        if not self.busy:
+            self._task = asyncio.ensure_future(coro_fn())
+            # Background refreshes nobody awaited must not log "never retrieved".
+            self._task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self.started_at = time.monotonic()
+        return self._task
+
+    async def do(self, coro_fn):
+        import asyncio
+        # shield: a waiter being cancelled must not cancel the shared call
+        return await asyncio.shield(self.start(coro_fn))
+
+class _OnDemandRefresher:
+    """Refresh triggered by /status reads instead of the poll timer, so a
+    proof that is about to expire (poll loop asleep in backoff, PC resumed
+    from sleep) is renewed by exactly one upstream call. Readers keep getting
+    the still-valid proof; only readers of an expired proof wait, and never
+    longer than `wait` seconds."""
+
+    def __init__(self, flight: _SingleFlight, refresh, min_interval: float = ON_DEMAND_MIN_INTERVAL,
+                 wait: float = ON_DEMAND_WAIT):
+        self.flight = flight
+        self.refresh = refresh
+        self.min_interval = min_interval
+        self.wait = wait
+
+    def _should_start(self) -> bool:
+        # Joining a running refresh is free; starting a new one is rate limited
+        # so an unreachable upstream is not hammered by every read.
+        return self.flight.busy or time.monotonic() - self.flight.started_at >= self.min_interval
+
+    def on_read(self, snap: _LicenseSnapshot):
+        action = _on_demand_action(snap)
+        if action is None or not self._should_start():
+            return
+        if not self.flight.busy:
+            METRICS.inc("ainside_on_demand_refresh_total", (("trigger", action),))
+        flight = self.flight.start(self.refresh)
+        if action == "wait":
+            flight.done.wait(self.wait)
+
+class _AsyncOnDemandRefresher(_OnDemandRefresher):
+    async def on_read(self, snap: _LicenseSnapshot):
+        import asyncio
+        action = _on_demand_action(snap)
+        if action is None or not self._should_start():
+            return
+        if not self.flight.busy:
+            METRICS.inc("ainside_on_demand_refresh_total", (("trigger", action),))
+        task = self.flight.start(self.refresh)
+        if action == "wait":
+            await asyncio.wait({task}, timeout=self.wait)
+
+class _Metrics:
+    """Prometheus text-format counters, gauges and histograms.
+
+    Writes go to one of a fixed set of lock-striped shards picked by thread id,
+    so request threads almost never contend; a scrape sums the shards.
+    Gauges that are only ever overwritten live in a plain dict.
+    """
+
+    LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, shards: int = 16):
+        self._shards = [(threading.Lock(), {}, {}) for _ in range(max(1, shards))]
+        self._gauges = {}
+        self._meta = {}  # name -> (type, help, buckets)
+
+    def describe(self, name: str, kind: str, help_text: str, buckets=None):
+        self._meta[name] = (kind, help_text, tuple(buckets or self.LATENCY_BUCKETS) if kind == "histogram" else None)
+
+    def _shard(self):
+        return self._shards[threading.get_ident() % len(self._shards)]
+
+    def inc(self, name: str, labels=(), value: float = 1):
+        lock, counters, _ = self._shard()
+        key = (name, labels)
+        with lock:
+            counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels=()):
+        buckets = self._meta[name][2]
+        lock, _, histograms = self._shard()
+        key = (name, labels)
+        with lock:
+            h = histograms.get(key)
+            if h is None:
+                h = histograms[key] = [0] * (len(buckets) + 2)  # per-bucket counts, +Inf, sum
+            i = 0
+            while i < len(buckets) and value > buckets[i]:
+                i += 1
+            h[i] += 1
+            h[-1] += value
+
+    def set(self, name: str, value: float, labels=()):
+        self._gauges[(name, labels)] = value
+
+    @staticmethod
+    def _labels(labels, extra=()) -> str:
+        pairs = tuple(labels) + tuple(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join('%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs) + "}"
+
+    @staticmethod
+    def _num(value) -> str:
+        return repr(float(value)) if isinstance(value, float) else str(value)
+
+    def render(self, extra_gauges=()) -> bytes:
+        counters, histograms = {}, {}
+        for lock, c, h in self._shards:
+            with lock:
+                for key, v in c.items():
+                    counters[key] = counters.get(key, 0) + v
+                for key, v in h.items():
+                    acc = histograms.get(key)
+                    histograms[key] = list(v) if acc is None else [a + b for a, b in zip(acc, v)]
+        gauges = dict(self._gauges)
+        for name, value, labels in extra_gauges:
+            gauges[(name, labels)] = value
+
+        series = {}  # name -> [(label text, lines)], so histogram buckets stay in le order
+        for (name, labels), v in list(counters.items()) + list(gauges.items()):
+            text = self._labels(labels)
+            series.setdefault(name, []).append((text, [f"{name}{text} {self._num(v)}"]))
+        for (name, labels), h in histograms.items():
+            buckets = self._meta[name][2]
+            text = self._labels(labels)
+            lines = []
+            cumulative = 0
+            for le, n in zip(buckets, h):
+                cumulative += n
+                lines.append(f"{name}_bucket{self._labels(labels, (('le', repr(le)),))} {cumulative}")
+            cumulative += h[len(buckets)]
+            lines.append(f"{name}_bucket{self._labels(labels, (('le', '+Inf'),))} {cumulative}")
+            lines.append(f"{name}_sum{text} {self._num(h[-1])}")
+            lines.append(f"{name}_count{text} {cumulative}")
+            series.setdefault(name, []).append((text, lines))
+
+        out = []
+        for name in sorted(series):
+            kind, help_text, _ = self._meta.get(name, ("untyped", "", None))
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            for _, lines in sorted(series[name], key=lambda item: item[0]):
+                out.extend(lines)
+        return ("\n".join(out) + "\n").encode("utf-8")
+
+METRICS = _Metrics()
+METRICS.describe("ainside_http_requests_total", "counter", "Local service requests by path and status code.")
+METRICS.describe("ainside_http_request_duration_seconds", "histogram", "Local service request latency by path.")
+METRICS.describe("ainside_http_connections_in_flight", "gauge", "Client connections currently open.")
+METRICS.describe("ainside_http_watchers_in_flight", "gauge", "SSE streams and long-polls currently waiting for a change.")
+METRICS.describe("ainside_license_check_duration_seconds", "histogram", "Upstream license-check round-trip time.",
+                 buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0))
+METRICS.describe("ainside_license_check_total", "counter", "Upstream license-check calls by outcome (allowed, denied, error).")
+METRICS.describe("ainside_license_check_errors_total", "counter", "Failed license-check calls by reason.")
+METRICS.describe("ainside_license_check_denied_total", "counter", "license-check answers with allowed=false by reason.")
+METRICS.describe("ainside_on_demand_refresh_total", "counter", "Refreshes started by /status reads, by trigger.")
+METRICS.describe("ainside_poll_iterations_total", "counter", "Poll loop iterations.")
+METRICS.describe("ainside_poll_iteration_duration_seconds", "histogram", "Time spent in one poll loop refresh.",
+                 buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0))
+METRICS.describe("ainside_poll_next_delay_seconds", "gauge", "Delay the scheduler chose before the next poll.")
+METRICS.describe("ainside_poll_last_run_timestamp_seconds", "gauge", "Unix time of the last poll loop iteration.")
+METRICS.describe("ainside_license_allowed", "gauge", "1 if the published state allows trading.")
+METRICS.describe("ainside_license_state_seq", "gauge", "Sequence number of the published license state.")
+METRICS.describe("ainside_proof_age_seconds", "gauge", "Seconds since the served proof was signed (now - ts).")
+METRICS.describe("ainside_proof_ttl_remaining_seconds", "gauge", "Seconds until the served proof expires (exp - now); negative once expired.")
+METRICS.describe("ainside_proof_lifetime_seconds", "gauge", "Lifetime of the served proof (exp - ts).")
+
+LATENCY_HISTORY_SIZE = 120  # ~6 min of status probes at the GUI's 3.2 s interval
+
+class _LatencyRing:
+    """Fixed-size ring of recent round-trip times in milliseconds.
+
+    Backed by one array("d") allocated up front: append() overwrites a slot
+    and advances the write position under a lock, so probe, heartbeat and
+    license-check threads record samples without growing any container.
+    Readers copy the filled part out in chronological order.
+    """
+
+    def __init__(self, capacity: int = LATENCY_HISTORY_SIZE):
+        self.capacity = max(1, int(capacity))
+        self._buf = array.array("d", bytes(8 * self.capacity))
+        self._next = 0
+        self.total = 0  # samples ever appended
+        self._lock = threading.Lock()
+
+    def append(self, ms: float):
+        with self._lock:
+            self._buf[self._next] = ms
+            self._next = self._next + 1 if self._next + 1 < self.capacity else 0
+            self.total += 1
+
+    def last(self):
+        with self._lock:
+            return self._buf[self._next - 1] if self.total else None
+
+    def values(self) -> list:
+        with self._lock:
+            if self.total < self.capacity:
+                return self._buf[:self._next].tolist()
+            return self._buf[self._next:].tolist() + self._buf[:self._next].tolist()
+
+    def stats(self):
+        """(min, avg, p95, count) of the samples held, or None when empty."""
+        values = sorted(self.values())
+        if not values:
+            return None
+        p95 = values[max(0, -(-95 * len(values) // 100) - 1)]
+        return values[0], sum(values) / len(values), p95, len(values)
+
+LATENCY = {
+    "probe": _LatencyRing(),          # status probe rounds that reached the platform (GUI)
+    "license_check": _LatencyRing(),  # upstream license-check calls (service; the GUI reads the shared snapshot)
+    "heartbeat": _LatencyRing(),      # client-heartbeat calls that got an answer
+}
+
+_METRIC_PATHS = ("/status/stream", "/status", "/health", "/hwid", "/metrics", "/debug/profile")
+
+def _metrics_path_label(path: str) -> str:
+    # Bounded label set: query strings and unknown paths must not create series.
+    route = urlsplit(path).path
+    return route if route in _METRIC_PATHS else "other"
+
+def _metrics_error_reason(e: Exception) -> str:
+    msg = str(e)
+    if msg and len(msg) <= 40 and all(c.isalnum() or c in "_-" for c in msg):
+        return msg  # server error codes such as invalid_device
+    return type(e).__name__
+
+def _record_license_check(started: float, data=None, error: Exception = None):
+    """Record one license-check round-trip; returns its RTT in ms."""
+    elapsed = time.perf_counter() - started
+    METRICS.observe("ainside_license_check_duration_seconds", elapsed)
+    if error is not None:
+        METRICS.inc("ainside_license_check_total", (("outcome", "error"),))
+        METRICS.inc("ainside_license_check_errors_total", (("reason", _metrics_error_reason(error)),))
+        return elapsed * 1000.0
+    LATENCY["license_check"].append(elapsed * 1000.0)
+    payload = data.get("payload") if isinstance(data, dict) else None
+    if payload and payload.get("allowed"):
+        METRICS.inc("ainside_license_check_total", (("outcome", "allowed"),))
+    else:
+        METRICS.inc("ainside_license_check_total", (("outcome", "denied"),))
+        METRICS.inc("ainside_license_check_denied_total", (("reason", str((payload or {}).get("reason") or "unknown")),))
+    return elapsed * 1000.0
+
+def _record_poll_iteration(started: float, delay: float):
+    METRICS.inc("ainside_poll_iterations_total")
+    METRICS.observe("ainside_poll_iteration_duration_seconds", time.perf_counter() - started)
+    METRICS.set("ainside_poll_next_delay_seconds", float(delay))
+    METRICS.set("ainside_poll_last_run_timestamp_seconds", float(int(time.time())))
+
+def _record_http_request(path: str, status: int, started: float = None):
+    label = _metrics_path_label(path)
+    METRICS.inc("ainside_http_requests_total", (("path", label), ("status", str(status))))
+    if started is not None:
+        METRICS.observe("ainside_http_request_duration_seconds", time.perf_counter() - started, (("path", label),))
+
+def _proof_gauges(snap: _LicenseSnapshot, now_ms: float = None):
+    now_ms = time.time() * 1000.0 if now_ms is None else now_ms
+    gauges = [
+        ("ainside_license_allowed", 1 if snap.allowed else 0, ()),
+        ("ainside_license_state_seq", snap.seq, ()),
+    ]
+    try:
+        ts, exp = float(snap.payload["ts"]), float(snap.payload["exp"])
+    except Exception:
+        return gauges
+    gauges += [
+        ("ainside_proof_age_seconds", (now_ms - ts) / 1000.0, ()),
+        ("ainside_proof_ttl_remaining_seconds", (exp - now_ms) / 1000.0, ()),
+        ("ainside_proof_lifetime_seconds", (exp - ts) / 1000.0, ()),
+    ]
+    return gauges
+
+def _json_body(obj: dict) -> bytes:
+    return json.dumps(obj).encode("utf-8")
+
+def _etag_matches(if_none_match, etag: str) -> bool:
+    if not if_none_match or not etag:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+LONG_POLL_MAX_MS = 60000
+SSE_HEARTBEAT_SECONDS = 15.0
+
+def _too_many_watchers():
+    """503 for an SSE/long-poll request when every watcher slot is taken."""
+    return 503, [("Content-Type", "application/json"), ("Retry-After", "1")], _json_body({"error": "too_many_watchers"})
+
+def _long_poll_params(path: str):
+    """(since, wait_seconds) for /status?wait=<ms>[&since=<seq>], else (None, 0).
+    Without since, the client waits for the next change after the current state."""
+    if not path.startswith("/status") or path.startswith("/status/stream"):
+        return None, 0.0
+    query = parse_qs(urlsplit(path).query)
+    try:
+        wait_ms = int((query.get("wait") or ["0"])[0])
+    except ValueError:
+        wait_ms = 0
+    if wait_ms <= 0:
+        return None, 0.0
+    since = _parse_cursor((query.get("since") or [None])[0])
+    if since is None:
+        since = LICENSE_STATE.current.seq
+    return since, min(wait_ms, LONG_POLL_MAX_MS) / 1000.0
+
+def _sse_profile(path: str):
+    """Body attribute for /status/stream?profile=..., or None if unsupported."""
+    profile = (parse_qs(urlsplit(path).query).get("profile") or ["full"])[0]
+    return {"full": "status_body", "compact": "compact_body"}.get(profile)
+
+def _format_cursor(seq: int) -> str:
+    return f"{BOOT_ID}:{seq}"
+
+def _parse_cursor(raw):
+    """Seq a client already has, from "<boot>:<seq>" (or a bare seq), else None.
+    A cursor from another boot, or ahead of the current seq, maps to -1 so the
+    client is answered with the current state right away."""
+    if raw is None:
+        return None
+    boot, _, seq = str(raw).strip().rpartition(":")
+    try:
+        seq = int(seq)
+    except ValueError:
+        return None
+    if (boot and boot != BOOT_ID) or seq > LICENSE_STATE.current.seq:
+        return -1
+    return seq
+
+def _sse_last_id(path: str, last_event_id) -> int:
+    for raw in (last_event_id, (parse_qs(urlsplit(path).query).get("since") or [None])[0]):
+        last = _parse_cursor(raw)
+        if last is not None:
+            return last
+    return -1
+
+def _sse_event(snap: _LicenseSnapshot, body: bytes) -> bytes:
+    return b"id: %s\nevent: status\ndata: %s\n\n" % (_format_cursor(snap.seq).encode("ascii"), body)
+
+SSE_HEADERS = [("Content-Type", "text/event-stream"), ("Cache-Control", "no-cache"), ("X-Accel-Buffering", "no")]
+
+DEBUG_PROFILE_MAX_SECONDS = 60
+_DEBUG_PROFILE_LOCK = threading.Lock()
+
+def _sample_stacks(seconds: float, interval: float = 0.005) -> dict:
+    """Sample every other thread's Python stack via sys._current_frames and
+    count identical stacks. Keys are root-to-leaf tuples headed by the
+    thread name, i.e. the "folded" format flame graph tools read."""
+    me = threading.get_ident()
+    deadline = time.monotonic() + seconds
+    counts = {}
+    while time.monotonic() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            key = tuple(reversed(stack))
+            counts[key] = counts.get(key, 0) + 1
+        time.sleep(interval)
+    return counts
+
+def _is_loopback(host) -> bool:
+    import ipaddress
+    try:
+        return ipaddress.ip_address(str(host).split("%", 1)[0]).is_loopback
+    except ValueError:
+        return False
+
+def _debug_profile_request(path: str, client_host):
+    """(status, headers, body) for GET /debug/profile?seconds=N. Blocks for
+    the sampling window, so the asyncio engine runs it in an executor."""
+    json_no_store = [("Content-Type", "application/json"), ("Cache-Control", "no-store")]
+    if not _is_loopback(client_host):
+        return 403, json_no_store, _json_body({"error": "localhost_only"})
+    query = parse_qs(urlsplit(path).query)
+    try:
+        seconds = float((query.get("seconds") or ["5"])[0])
+    except ValueError:
+        return 400, json_no_store, _json_body({"error": "bad_seconds"})
+    seconds = min(max(seconds, 0.1), DEBUG_PROFILE_MAX_SECONDS)
+    if not _DEBUG_PROFILE_LOCK.acquire(blocking=False):
+        return 409, json_no_store, _json_body({"error": "profile_in_progress"})
+    try:
+        counts = _sample_stacks(seconds)
+    finally:
+        _DEBUG_PROFILE_LOCK.release()
+    lines = [";".join(stack) + f" {n}" for stack, n in sorted(counts.items(), key=lambda item: -item[1])]
+    body = ("\n".join(lines) + "\n").encode("utf-8")
+    return 200, [("Content-Type", "text/plain; charset=utf-8"), ("Cache-Control", "no-store"),
+                 ("X-Profile-Seconds", str(seconds)), ("X-Profile-Samples", str(sum(counts.values())))], body
+
+def _route_local_request(path: str, if_none_match=None, since=None):
+    """Resolve a GET on the local service to (status, headers, body).
+    Shared by the threaded handler and the asyncio engine so both serve
+    byte-identical responses. `since` is set for long-polls: if nothing
+    newer than that sequence number was published, the answer is 304."""
+    json_no_store = [("Content-Type", "application/json"), ("Cache-Control", "no-store")]
+
+    if path.startswith("/health"):
+        return 200, json_no_store, _json_body({"ok": True})
+
+    if path.startswith("/hwid"):
+        return 200, json_no_store, _json_body({"hwid": LICENSE_STATE.current.hwid})
+
+    if path.startswith("/metrics"):
+        body = METRICS.render(_proof_gauges(LICENSE_STATE.current))
+        return 200, [("Content-Type", "text/plain; version=0.0.4; charset=utf-8"), ("Cache-Control", "no-store")], body
+
+    if path.startswith("/status"):
+        snap = LICENSE_STATE.current
+        query = parse_qs(urlsplit(path).query)
+        profile = (query.get("profile") or ["full"])[0]
+        if profile == "full":
+            body, etag, ctype = snap.status_body, snap.status_etag, "application/json"
+        elif profile == "compact":
+            body, etag, ctype = snap.compact_body, snap.compact_etag, "application/json"
+        elif profile == "binary":
+            body, etag, ctype = snap.binary_body, snap.binary_etag, "application/octet-stream"
+        else:
+            return 400, json_no_store, _json_body({"error": "unknown_profile"})
+        seq = _format_cursor(snap.seq)
+        # Serve the pre-encoded body; answer 304 when the client already has it.
+        if _etag_matches(if_none_match, etag) or (since is not None and snap.seq <= since):
+            return 304, [("ETag", etag), ("Cache-Control", "no-cache"), ("X-License-Seq", seq)], b""
+        return 200, [("Content-Type", ctype), ("Cache-Control", "no-cache"), ("ETag", etag), ("X-License-Seq", seq)], body
+
+    return 404, json_no_store, _json_body({"error": "not_found"})
 
 class LocalLicenseHandler(BaseHTTPRequestHandler):
     def log_message(self, format, *args):
         return
 
     def do_GET(self):
-        if self.path.startswith("/health"):
-            return _json_response(self, 200, {"ok": True})
+        started = time.perf_counter()
+        if self.path.startswith("/status/stream"):
+            return self._stream_status()
+        if self.server.debug_profile and self.path.startswith("/debug/profile"):
+            status, headers, body = _debug_profile_request(self.path, self.client_address[0])
+            return self._write_response(status, headers, body, started)
+        since, wait = _long_poll_params(self.path)
+        if wait:
+            if not self.server.begin_watch():
+                return self._write_response(*_too_many_watchers(), started)
+            try:
+                LICENSE_WAITERS.wait_for_change(since, wait, gone=self._client_gone)
+            except ConnectionAbortedError:
+                self.close_connection = True
+                return
+            finally:
+                if not self.server.end_watch():
+                    self.close_connection = True  # no request slot free: answer and close
+        if self.server.refresher is not None and self.path.startswith("/status"):
+            self.server.refresher.on_read(LICENSE_STATE.current)
+        status, headers, body = _route_local_request(self.path, self.headers.get("If-None-Match"), since)
+        self._write_response(status, headers, body, None if wait else started)
+
+    def _client_gone(self) -> bool:
+        """True once the peer has closed its end (EOF readable, nothing consumed)."""
+        import select
+        try:
+            readable, _, _ = select.select([self.connection], [], [], 0)
+            return bool(readable) and not self.connection.recv(1, socket.MSG_PEEK)
+        except (OSError, ValueError):
+            return True
+
+    def _write_response(self, status: int, headers, body: bytes, started=None):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+        _record_http_request(self.path, status, started)
+
+    def _stream_status(self):
+        """Server-sent events: one `status` event per published snapshot,
+        comment heartbeats in between; the stream ends when the client leaves."""
+        body_attr = _sse_profile(self.path)
+        if body_attr is None:
+            status, headers, body = 400, [("Content-Type", "application/json")], _json_body({"error": "unknown_profile"})
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            _record_http_request(self.path, status)
+            return
+        if not self.server.begin_watch():
+            self.close_connection = True
+            return self._write_response(*_too_many_watchers())
+        try:
+            self._stream_events(body_attr)
+        finally:
+            self.server.end_watch(reacquire=False)
+
+    def _stream_events(self, body_attr: str):
+        _record_http_request(self.path, 200)
+        last = _sse_last_id(self.path, self.headers.get("Last-Event-ID"))
+        self.close_connection = True
+        self.send_response(200)
+        for name, value in SSE_HEADERS:
+            self.send_header(name, value)
+        self.send_header("Connection", "close")
+        self.end_headers()
+        sent = None
+        try:
+            self.wfile.write(b"retry: 3000\n\n")
+            while True:
+                snap = LICENSE_WAITERS.wait_for_change(last, SSE_HEARTBEAT_SECONDS, gone=self._client_gone)
+                body = getattr(snap, body_attr)
+                if snap.seq == last:
+                    self.wfile.write(b": keepalive\n\n")
+                elif body != sent:
+                    self.wfile.write(_sse_event(snap, body))
+                    sent = body
+                last = snap.seq
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError, OSError):
+            return
 
-        if self.path.startswith("/hwid"):
-            with LICENSE_STATE.lock:
-                return _json_response(self, 200, {"hwid": LICENSE_STATE.hwid})
 
-        if self.path.startswith("/status"):
-            with LICENSE_STATE.lock:
-                payload_json_b64u = None
+class _LocalLicenseServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer with a cap on concurrently served connections.
+    With keep-alive each connection owns a thread until it goes idle, so the cap
+    bounds thread count; connections over the cap get a 503 and are closed.
+    SSE streams and long-polls move from their request slot to one of
+    max_watchers watcher slots while they wait, so subscribers can never take
+    the slots plain GET /status needs."""
+    daemon_threads = True
+    request_queue_size = 128  # default of 5 drops SYNs when many charts connect at once
+
+    def __init__(self, server_address, handler_cls, max_connections: int = 64, max_watchers=None):
+        super().__init__(server_address, handler_cls)
+        self.max_connections = max(1, int(max_connections))
+        self.max_watchers = max(1, int(max_watchers or self.max_connections // 4))
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+        self._watch_slots = threading.BoundedSemaphore(self.max_watchers)
+        self._conn = threading.local()  # holds_slot: this connection thread owns a request slot
+        self.refresher = None  # _OnDemandRefresher, set by start_local_license_service
+        self.debug_profile = False  # serve /debug/profile (opt-in, loopback clients only)
+
+    def process_request(self, request, client_address):
+        # Runs on the accept thread: never wait for a slot, shed the connection at once.
+        if not self._slots.acquire(blocking=False):
+            try:
+                request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            except Exception:
+                pass
+            self.shutdown_request(request)
+            return
+        METRICS.inc("ainside_http_connections_in_flight")
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            METRICS.inc("ainside_http_connections_in_flight", value=-1)
+            self._slots.release()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        self._conn.holds_slot = True
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            METRICS.inc("ainside_http_connections_in_flight", value=-1)
+            if self._conn.holds_slot:
+                self._slots.release()
+
+    def begin_watch(self) -> bool:
+        """Trade the calling connection's request slot for a watcher slot; False when none is free."""
+        if not self._watch_slots.acquire(blocking=False):
+            return False
+        METRICS.inc("ainside_http_watchers_in_flight")
+        self._slots.release()
+        self._conn.holds_slot = False
+        return True
+
+    def end_watch(self, reacquire: bool = True) -> bool:
+        """Give the watcher slot back and, for keep-alive, take a request slot
+        again. False when none is free; the connection then closes after answering."""
+        METRICS.inc("ainside_http_watchers_in_flight", value=-1)
+        self._watch_slots.release()
+        self._conn.holds_slot = reacquire and self._slots.acquire(blocking=False)
+        return self._conn.holds_slot
+
+
+def _make_license_server(host: str = "127.0.0.1", port: int = 8787, keep_alive: bool = True,
+                         idle_timeout: float = 15.0, max_connections: int = 64, max_watchers=None) -> _LocalLicenseServer:
+    handler_cls = LocalLicenseHandler
+    if keep_alive:
+        # HTTP/1.1 keeps the socket open between DLL calls; idle sockets are
+        # dropped after idle_timeout. Nagle is disabled because headers and body
+        # go out as separate writes and would otherwise stall on delayed ACKs.
+        handler_cls = type("KeepAliveLicenseHandler", (LocalLicenseHandler,), {
+            "protocol_version": "HTTP/1.1",
+            "timeout": float(idle_timeout),
+            "disable_nagle_algorithm": True,
+        })
+    return _LocalLicenseServer((host, port), handler_cls, max_connections=max_connections, max_watchers=max_watchers)
+
+
+class _AsyncLicenseServer:
+    """Minimal HTTP/1.1 server for the asyncio engine. One coroutine per
+    connection instead of one OS thread; routing is shared with
+    LocalLicenseHandler through _route_local_request."""
+
+    def __init__(self, keep_alive: bool = True, idle_timeout: float = 15.0, max_connections: int = 1024,
+                 max_watchers=None):
+        self.keep_alive = keep_alive
+        self.idle_timeout = float(idle_timeout)
+        self.max_connections = max(1, int(max_connections))
+        self.max_watchers = max(1, int(max_watchers or self.max_connections // 4))
+        self.active = 0    # connections holding a request slot
+        self.watchers = 0  # SSE streams and long-polls currently waiting
+        self.refresher = None  # _AsyncOnDemandRefresher, set by _serve_asyncio
+        self.debug_profile = False
+
+    @staticmethod
+    def _encode(status: int, headers, body: bytes, version: str, keep: bool, stream: bool = False) -> bytes:
+        lines = [f"{version} {status} {HTTPStatus(status).phrase}", "Server: AInsideLicenseService"]
+        lines.extend(f"{name}: {value}" for name, value in headers)
+        if status != 304 and not stream:
+            lines.append(f"Content-Length: {len(body)}")
+        lines.append("Connection: keep-alive" if keep else "Connection: close")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    def begin_watch(self) -> bool:
+        """Same slot handoff as _LocalLicenseServer.begin_watch (single-threaded counters)."""
+        if self.watchers >= self.max_watchers:
+            return False
+        self.watchers += 1
+        self.active -= 1
+        METRICS.inc("ainside_http_watchers_in_flight")
+        return True
+
+    def end_watch(self) -> bool:
+        self.watchers -= 1
+        METRICS.inc("ainside_http_watchers_in_flight", value=-1)
+        self.active += 1  # the connection is served again; close it if that overshoots the cap
+        return self.active <= self.max_connections
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        import asyncio
+        if self.active >= self.max_connections:
+            writer.write(self._encode(503, [], b"", "HTTP/1.1", False))
+            writer.close()
+            return
+        self.active += 1
+        METRICS.inc("ainside_http_connections_in_flight")
+        # The transport keeps reading, so a peer close (EOF, or a reset that closes
+        # the transport) shows up here without consuming request data.
+        gone = lambda: reader.at_eof() or writer.is_closing()
+        try:
+            while True:
                 try:
-                    if isinstance(LICENSE_STATE.payload_json, str) and LICENSE_STATE.payload_json:
-                        payload_json_b64u = base64.urlsafe_b64encode(LICENSE_STATE.payload_json.encode("utf-8")).decode("ascii").rstrip("=")
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.idle_timeout)
                 except Exception:
-                    payload_json_b64u = None
-                return _json_response(
-                    self,
-                    200,
-                    {
-                        "allowed": LICENSE_STATE.allowed,
-                        "reason": LICENSE_STATE.reason,
-                        "hwid": LICENSE_STATE.hwid,
-                        "lastCheckTs": LICENSE_STATE.last_check_ts,
-                        "license": {
-                            "payload": LICENSE_STATE.payload,
-                            "payloadJson": LICENSE_STATE.payload_json,
-                            "payloadJsonB64u": payload_json_b64u,
-                            "signature": LICENSE_STATE.signature,
-                            "alg": LICENSE_STATE.alg,
-                        },
-                    },
-                )
-
-        return _json_response(self, 404, {"error": "not_found"})
-
-
-def start_local_license_service(hwid: str, host: str = "127.0.0.1", port: int = 8787) -> int:
-    with LICENSE_STATE.lock:
-        LICENSE_STATE.hwid = hwid
-        LICENSE_STATE.allowed = False
-        LICENSE_STATE.reason = "starting"
-        LICENSE_STATE.last_check_ts = int(time.time())
+                    break  # idle timeout, client closed, or oversized headers
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split()
+                if len(parts) != 3:
+                    writer.write(self._encode(400, [], b"", "HTTP/1.1", False))
+                    break
+                method, target, version = parts
+                started = time.perf_counter()
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length:
+                    await reader.readexactly(length)
+
+                conn_hdr = headers.get("connection", "").lower()
+                if version == "HTTP/1.1":
+                    keep = self.keep_alive and conn_hdr != "close"
+                else:
+                    keep = self.keep_alive and conn_hdr == "keep-alive"
+                resp_version = "HTTP/1.1" if self.keep_alive else "HTTP/1.0"
+
+                if method == "GET" and target.startswith("/status/stream"):
+                    if not self.begin_watch():
+                        status, resp_headers, body = _too_many_watchers()
+                        writer.write(self._encode(status, resp_headers, body, resp_version, False))
+                        await writer.drain()
+                        _record_http_request(target, status)
+                        break
+                    try:
+                        await self._stream_status(writer, target, headers, resp_version, gone)
+                    finally:
+                        self.end_watch()
+                    break
+                wait = 0
+                if method == "GET" and self.debug_profile and target.startswith("/debug/profile"):
+                    peer = writer.get_extra_info("peername") or ("",)
+                    status, resp_headers, body = await asyncio.get_running_loop().run_in_executor(
+                        None, _debug_profile_request, target, peer[0])
+                elif method != "GET":
+                    status, resp_headers, body = 501, [("Content-Type", "application/json")], _json_body({"error": "unsupported_method"})
+                else:
+                    since, wait = _long_poll_params(target)
+                    if wait and not self.begin_watch():
+                        status, resp_headers, body = _too_many_watchers()
+                        wait = 0
+                    else:
+                        if wait:
+                            try:
+                                await LICENSE_WAITERS.async_wait_for_change(since, wait, gone=gone)
+                            finally:
+                                keep = self.end_watch() and keep
+                        if self.refresher is not None and target.startswith("/status"):
+                            await self.refresher.on_read(LICENSE_STATE.current)
+                        status, resp_headers, body = _route_local_request(target, headers.get("if-none-match"), since)
+                writer.write(self._encode(status, resp_headers, body, resp_version, keep))
+                await writer.drain()
+                _record_http_request(target, status, None if wait else started)
+                if not keep:
+                    break
+        except Exception:
+            pass
+        finally:
+            self.active -= 1
+            METRICS.inc("ainside_http_connections_in_flight", value=-1)
+            try:
+                writer.close()
+            except Exception:
+                pass
 
-    def poll_loop():
+    async def _stream_status(self, writer: asyncio.StreamWriter, target: str, headers: dict, version: str, gone=None):
+        body_attr = _sse_profile(target)
+        if body_attr is None:
+            body = _json_body({"error": "unknown_profile"})
+            writer.write(self._encode(400, [("Content-Type", "application/json")], body, version, False))
+            await writer.drain()
+            _record_http_request(target, 400)
+            return
+        _record_http_request(target, 200)
+        last = _sse_last_id(target, headers.get("last-event-id"))
+        writer.write(self._encode(200, SSE_HEADERS, b"retry: 3000\n\n", version, False, stream=True))
+        await writer.drain()
+        sent = None
         while True:
-            try:
-                device_secret = _auth_get_device_secret()
-                if not device_secret:
-                    with LICENSE_STATE.lock:
-                        LICENSE_STATE.allowed = False
-                        LICENSE_STATE.reason = "not_activated"
-                        LICENSE_STATE.payload = None
-                        LICENSE_STATE.payload_json = None
-                        LICENSE_STATE.signature = None
-                        LICENSE_STATE.alg = None
-                        LICENSE_STATE.last_check_ts = int(time.time())
-                    time.sleep(3)
-                    continue
+            snap = await LICENSE_WAITERS.async_wait_for_change(last, SSE_HEARTBEAT_SECONDS, gone=gone)
+            body = getattr(snap, body_attr)
+            if snap.seq == last:
+                writer.write(b": keepalive\n\n")
+            elif body != sent:
+                writer.write(_sse_event(snap, body))
+                sent = body
+            last = snap.seq
+            await writer.drain()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8787):
+        import asyncio
+        return await asyncio.start_server(self.handle, host, port, backlog=1024)
+
+
+def _init_license_state(hwid: str):
+    LICENSE_STATE.publish(hwid=hwid, allowed=False, reason="starting", last_check_ts=int(time.time()))
+    # Warm start: serve the persisted proof while the first refresh runs.
+    cached = proof_load(hwid) if _auth_get_device_secret() else None
+    if cached:
+        _apply_license_check(cached, persist=False)
+
+
+async def _async_refresh_once(hwid: str):
+    """One license-check round-trip; None when the device is not activated.
+    Auth and proof files are read and written (with fsync) on the default
+    executor so a slow disk never stalls the event loop."""
+    import asyncio
+    loop = asyncio.get_running_loop()
+    try:
+        device_secret = await loop.run_in_executor(None, _auth_get_device_secret)
+        if not device_secret:
+            await loop.run_in_executor(None, _publish_not_activated)
+            return None
+        started = time.perf_counter()
+        try:
+            data = await _async_license_check(hwid, device_secret)
+        except Exception as e:
+            _record_license_check(started, error=e)
+            raise
+        check_ms = _record_license_check(started, data)
+        payload = _apply_license_check(data, persist=False, check_ms=check_ms)
+        await loop.run_in_executor(None, _persist_license_proof, data)
+        return payload
+    except Exception as e:
+        _publish_license_error(f"error:{e}")
+        raise
+
+
+async def _async_poll_loop(hwid: str, flight: _AsyncSingleFlight):
+    import asyncio
+    scheduler = _RefreshScheduler()
+    while True:
+        started = time.perf_counter()
+        try:
+            payload = await flight.do(lambda: _async_refresh_once(hwid))
+            delay = scheduler.on_not_activated() if payload is None else scheduler.on_success(payload)
+        except Exception:
+            delay = scheduler.on_error()
+        _record_poll_iteration(started, delay)
+
+        await asyncio.sleep(delay)
+
+
+async def _serve_asyncio(hwid: str, host: str, port: int, keep_alive: bool, idle_timeout: float, max_connections: int,
+                         debug_profile: bool = False, max_watchers=None, shm_path=None) -> int:
+    import asyncio
+    flight = _AsyncSingleFlight()
+    engine = _AsyncLicenseServer(keep_alive, idle_timeout, max_connections, max_watchers)
+    engine.debug_profile = debug_profile
+    engine.refresher = _AsyncOnDemandRefresher(flight, lambda: _async_refresh_once(hwid))
+    server = await engine.start(host, port)
+    if shm_path:
+        _attach_shared_snapshot(shm_path)
+    poller = asyncio.ensure_future(_async_poll_loop(hwid, flight))
+    print(f"[AInside] Local License Service (asyncio) running at http://{host}:{port} (/status, /health)", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        poller.cancel()
+    return 0
+
 
+def start_local_license_service(hwid: str, host: str = "127.0.0.1", port: int = 8787, keep_alive: bool = True,
+                                idle_timeout: float = 15.0, max_connections=None, engine: str = "threads",
+                                shm_path=SHM_FILE, debug_profile: bool = False, max_watchers=None) -> int:
+    # The shared snapshot is attached only once the port is bound: a second
+    # instance fails on bind before it can reset the running service's snapshot.
+    _init_license_state(hwid)
+
+    if engine == "asyncio":
+        import asyncio
+        return asyncio.run(_serve_asyncio(hwid, host, port, keep_alive, idle_timeout, max_connections or 1024,
+                                          debug_profile, max_watchers, shm_path))
+    if engine != "threads":
+        print(f"[ERROR] Unknown engine: {engine} (use threads or asyncio)", flush=True)
+        return 2
+
+    def refresh_once():
+        try:
+            device_secret = _auth_get_device_secret()
+            if not device_secret:
+                _publish_not_activated()
+                return None
+            started = time.perf_counter()
+            try:
                 data = license_check(hwid, device_secret)
-                payload = data.get("payload") if isinstance(data, dict) else None
-                payload_json = data.get("payloadJson") if isinstance(data, dict) else None
-                signature = data.get("signature") if isinstance(data, dict) else None
-                alg = data.get("alg") if isinstance(data, dict) else None
-
-                allowed = bool(payload and payload.get("allowed"))
-                reason = (payload or {}).get("reason") or "unknown"
-
-                with LICENSE_STATE.lock:
-                    LICENSE_STATE.allowed = allowed
-                    LICENSE_STATE.reason = reason
-                    LICENSE_STATE.payload = payload
-                    LICENSE_STATE.payload_json = payload_json
-                    LICENSE_STATE.signature = signature
-                    LICENSE_STATE.alg = alg
-                    LICENSE_STATE.last_check_ts = int(time.time())
             except Exception as e:
-                with LICENSE_STATE.lock:
-                    LICENSE_STATE.allowed = False
-                    LICENSE_STATE.reason = f"error:{e}"
-                    LICENSE_STATE.payload = None
-                    LICENSE_STATE.payload_json = None
-                    LICENSE_STATE.signature = None
-                    LICENSE_STATE.alg = None
-                    LICENSE_STATE.last_check_ts = int(time.time())
+                _record_license_check(started, error=e)
+                raise
+            check_ms = _record_license_check(started, data)
+            return _apply_license_check(data, check_ms=check_ms)
+        except Exception as e:
+            _publish_license_error(f"error:{e}")
+            raise
 
-            time.sleep(25)
+    # Poll loop and on-demand refreshes share one flight, so a timer tick that
+    # coincides with a /status-triggered refresh joins it instead of repeating it.
+    flight = _SingleFlight()
+
+    def poll_loop():
+        scheduler = _RefreshScheduler()
+        while True:
+            started = time.perf_counter()
+            try:
+                payload = flight.do(refresh_once)
+                delay = scheduler.on_not_activated() if payload is None else scheduler.on_success(payload)
+            except Exception:
+                delay = scheduler.on_error()
+            _record_poll_iteration(started, delay)
+
+            time.sleep(delay)
 
     threading.Thread(target=poll_loop, daemon=True).start()
 
-    httpd = ThreadingHTTPServer((host, port), LocalLicenseHandler)
+    httpd = _make_license_server(host, port, keep_alive=keep_alive, idle_timeout=idle_timeout,
+                                 max_connections=max_connections or 64, max_watchers=max_watchers)
+    httpd.refresher = _OnDemandRefresher(flight, refresh_once)
+    httpd.debug_profile = debug_profile
+    if shm_path:
+        _attach_shared_snapshot(shm_path)
     print(f"[AInside] Local License Service running at http://{host}:{port} (/status, /health)", flush=True)
     httpd.serve_forever()
     return 0
@@ -673,7 +2341,10 @@ def send_heartbeat(hwid: str, plan_name: str = "Basic", strategies: list = None)
             "strategies_active": strategies,
         }
         
+        started = time.perf_counter()
         status, data = http_request("POST", HEARTBEAT_URL, payload=payload, timeout=3.0)
+        if status:
+            LATENCY["heartbeat"].append((time.perf_counter() - started) * 1000.0)
         
         if status in (200, 201):
             # Server returns updated configuration
@@ -684,23 +2355,587 @@ def send_heartbeat(hwid: str, plan_name: str = "Basic", strategies: list = None)
         print(f"Heartbeat error: {e}")
         return None
 
+# --------- Self-update (signed manifest + binary delta) ---------
+# The release side (scripts/package-release.py --update) publishes
+# update-manifest.json next to the full exe and the deltas from earlier builds.
+# The manifest uses the license-check envelope ({alg, payloadJson, signature},
+# RS256) and is verified against license-public.pem before anything is
+# downloaded. Delta file (AIDL v1):
+#   "AIDL" | u8 version | source sha256 | target sha256 | u64 target size | zlib(ops)
+#   ops:  b"C" + <u64 offset, u32 length> (copy from the installed exe)
+#       | b"I" + <u32 length> + bytes     (literal data)
+UPDATE_BASE = os.environ.get("AINSIDE_UPDATE_BASE", "https://ainside.me/downloads/hwid-tool").rstrip("/")
+UPDATE_MANIFEST_URL = f"{UPDATE_BASE}/update-manifest.json"
+UPDATE_STATE_FILE = os.path.join(AUTH_DIR, "update_state.json")
+UPDATE_PRODUCT = "hwid-tool"
+DELTA_MAGIC = b"AIDL"
+DELTA_VERSION = 1
+_DELTA_HEADER = struct.Struct("<4sB32s32sQ")
+_DELTA_COPY = struct.Struct("<QI")
+_DELTA_INSERT = struct.Struct("<I")
+# DER DigestInfo prefix for SHA-256 (RFC 8017, EMSA-PKCS1-v1_5)
+_SHA256_DIGEST_INFO = bytes.fromhex("3031300d060960864801650304020105000420")
+
+def _der_next(data: bytes, pos: int):
+    tag, length = data[pos], data[pos + 1]
+    pos += 2
+    if length & 0x80:
+        n = length & 0x7F
+        length = int.from_bytes(data[pos:pos + n], "big")
+        pos += n
+    return tag, data[pos:pos + length], pos + length
+
+def _rsa_public_key(pem: str):
+    """(n, e) from a PEM SubjectPublicKeyInfo or PKCS#1 RSA public key."""
+    der = base64.b64decode("".join(l.strip() for l in pem.splitlines() if l.strip() and not l.startswith("-----")))
+    _, body, _ = _der_next(der, 0)
+    tag, first, pos = _der_next(body, 0)
+    if tag == 0x30:  # SubjectPublicKeyInfo: AlgorithmIdentifier, BIT STRING(RSAPublicKey)
+        _, bits, _ = _der_next(body, pos)
+        _, body, _ = _der_next(bits[1:], 0)
+        tag, first, pos = _der_next(body, 0)
+    _, exponent, _ = _der_next(body, pos)
+    return int.from_bytes(first, "big"), int.from_bytes(exponent, "big")
+
+def _rsa_verify_sha256(public_key, message: bytes, signature: bytes) -> bool:
+    """RSASSA-PKCS1-v1_5 with SHA-256, pure Python (no cryptography dependency)."""
+    import hmac
+    n, e = public_key
+    k = (n.bit_length() + 7) // 8
+    if len(signature) != k:
+        return False
+    s = int.from_bytes(signature, "big")
+    if s >= n:
+        return False
+    t = _SHA256_DIGEST_INFO + hashlib.sha256(message).digest()
+    expected = b"\x00\x01" + b"\xff" * (k - len(t) - 3) + b"\x00" + t
+    return hmac.compare_digest(pow(s, e, n).to_bytes(k, "big"), expected)
+
+def _update_public_key():
+    """license-public.pem bundled in the exe, next to it, or at the repo root.
+    AINSIDE_UPDATE_PUBLIC_KEY points to another PEM (local update tests)."""
+    override = os.environ.get("AINSIDE_UPDATE_PUBLIC_KEY")
+    if override:
+        candidates = [override]
+    else:
+        candidates = [os.path.join(os.path.dirname(os.path.abspath(sys.executable if getattr(sys, "frozen", False) else __file__)), "license-public.pem"),
+                      os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "license-public.pem")]
+        if hasattr(sys, "_MEIPASS"):
+            candidates.insert(0, os.path.join(sys._MEIPASS, "license-public.pem"))
+    for path in candidates:
+        try:
+            with open(path, "r", encoding="ascii") as f:
+                return _rsa_public_key(f.read())
+        except (OSError, ValueError, IndexError):
+            continue
+    raise RuntimeError("license-public.pem not found; cannot verify updates")
+
+def _b64u_decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def _verify_update_manifest(envelope, public_key) -> dict:
+    if not isinstance(envelope, dict) or envelope.get("alg") != "RS256":
+        raise ValueError("update manifest is not RS256-signed")
+    payload_json, signature = envelope.get("payloadJson"), envelope.get("signature")
+    if not isinstance(payload_json, str) or not isinstance(signature, str):
+        raise ValueError("update manifest is missing payloadJson/signature")
+    if not _rsa_verify_sha256(public_key, payload_json.encode("utf-8"), _b64u_decode(signature)):
+        raise ValueError("update manifest signature is invalid")
+    manifest = json.loads(payload_json)
+    # The key also signs license proofs: only accept payloads that are update manifests.
+    if not isinstance(manifest, dict) or manifest.get("product") != UPDATE_PRODUCT:
+        raise ValueError("signed payload is not an update manifest")
+    exe = manifest.get("exe")
+    if not isinstance(exe, dict) or not exe.get("url") or len(str(exe.get("sha256") or "")) != 64:
+        raise ValueError("update manifest has no exe entry")
+    return manifest
+
+def _delta_apply(source: bytes, delta: bytes) -> bytes:
+    import zlib
+    if len(delta) < _DELTA_HEADER.size:
+        raise ValueError("delta is truncated")
+    magic, version, source_sha, target_sha, target_size = _DELTA_HEADER.unpack_from(delta, 0)
+    if magic != DELTA_MAGIC or version != DELTA_VERSION:
+        raise ValueError("not an AIDL v1 delta")
+    if hashlib.sha256(source).digest() != source_sha:
+        raise ValueError("delta was built for a different exe")
+    ops = zlib.decompress(delta[_DELTA_HEADER.size:])
+    out = bytearray()
+    pos = 0
+    while pos < len(ops):
+        op = ops[pos:pos + 1]
+        pos += 1
+        if op == b"C":
+            offset, length = _DELTA_COPY.unpack_from(ops, pos)
+            pos += _DELTA_COPY.size
+            if offset + length > len(source):
+                raise ValueError("delta copies past the end of the exe")
+            out += source[offset:offset + length]
+        elif op == b"I":
+            (length,) = _DELTA_INSERT.unpack_from(ops, pos)
+            pos += _DELTA_INSERT.size
+            out += ops[pos:pos + length]
+            pos += length
+        else:
+            raise ValueError("corrupt delta op stream")
+        if len(out) > target_size:
+            raise ValueError("delta output exceeds the declared size")
+    if len(out) != target_size or hashlib.sha256(out).digest() != target_sha:
+        raise ValueError("patched exe does not match the delta's target hash")
+    return bytes(out)
+
+def _update_download(url: str, timeout: float = 60.0) -> bytes:
+    status, raw = HTTP_POOL.request("GET", url, timeout=timeout)
+    if status != 200:
+        raise RuntimeError(f"GET {url} failed ({status})")
+    return raw
+
+def _update_state_load() -> dict:
+    try:
+        with open(UPDATE_STATE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def _version_key(version) -> tuple:
+    """Numeric fields of a release version for ordering: "20260113-0738" ->
+    (20260113, 738). Empty when the version has no digits."""
+    import re
+    return tuple(int(n) for n in re.findall(r"\d+", str(version or "")))
+
+BUILD_VERSION_FILE = "build_version.txt"
+
+def _build_version():
+    """Release version stamped in by build-hwid-exe.py (bundled next to the
+    public key), or None for an unstamped build or a source checkout."""
+    base = getattr(sys, "_MEIPASS", None) or os.path.dirname(os.path.abspath(__file__))
+    try:
+        with open(os.path.join(base, BUILD_VERSION_FILE), "r", encoding="ascii") as f:
+            return f.read().strip() or None
+    except (OSError, ValueError):
+        return None
+
+def _installed_version():
+    """Newest of the running build's own version and the last applied update;
+    update_state.json alone is missing on a fresh install or a wiped profile."""
+    candidates = [v for v in (_build_version(), _update_state_load().get("version")) if _version_key(v)]
+    return max(candidates, key=_version_key) if candidates else None
+
+def _update_target_exe():
+    target = _arg_value("--update-exe")
+    if target:
+        return os.path.abspath(target)
+    return sys.executable if getattr(sys, "frozen", False) else None
+
+def check_for_update(exe_path: str, manifest_url: str = None):
+    """(manifest, current_sha256, delta_entry_or_None); manifest is None when exe_path is current."""
+    from urllib.parse import urljoin
+    manifest_url = manifest_url or UPDATE_MANIFEST_URL
+    status, raw = HTTP_POOL.request("GET", manifest_url, timeout=10.0)
+    if status != 200:
+        raise RuntimeError(f"update manifest unavailable ({status})")
+    manifest = _verify_update_manifest(json.loads(raw.decode("utf-8")), _update_public_key())
+    with open(exe_path, "rb") as f:
+        current_sha = hashlib.sha256(f.read()).hexdigest()
+    if current_sha == manifest["exe"]["sha256"]:
+        return None, current_sha, None
+    offered, installed = manifest.get("version"), _installed_version()
+    if not _version_key(offered):
+        raise RuntimeError(f"update manifest has no usable version ({offered!r})")
+    if installed and _version_key(offered) <= _version_key(installed):
+        raise RuntimeError(f"update manifest {offered} is not newer than installed {installed}; refusing to downgrade")
+    manifest["exe"]["url"] = urljoin(manifest_url, manifest["exe"]["url"])
+    delta = None
+    for entry in manifest.get("deltas") or []:
+        if isinstance(entry, dict) and entry.get("from") == current_sha and entry.get("url"):
+            delta = dict(entry, url=urljoin(manifest_url, entry["url"]))
+            break
+    return manifest, current_sha, delta
+
+def apply_update(exe_path: str, manifest_url: str = None) -> int:
+    """Patch exe_path to the version in the signed manifest: delta first, full exe
+    as fallback. The new file is verified against the manifest hash before the
+    swap; the previous exe is kept as <exe>.old until the next update."""
+    try:
+        os.remove(exe_path + ".old")
+    except OSError:
+        pass
+    try:
+        manifest, current_sha, delta = check_for_update(exe_path, manifest_url)
+    except Exception as e:
+        print(f"[ERROR] Update check failed: {e}", flush=True)
+        return 1
+    if manifest is None:
+        print(f"[AInside] Up to date ({current_sha[:12]})", flush=True)
+        return 0
+    target = manifest["exe"]
+    new_bytes = None
+    if delta:
+        try:
+            blob = _update_download(delta["url"])
+            if hashlib.sha256(blob).hexdigest() != delta.get("sha256"):
+                raise ValueError("delta hash does not match the manifest")
+            with open(exe_path, "rb") as f:
+                new_bytes = _delta_apply(f.read(), blob)
+            print(f"[AInside] Applied delta ({len(blob)} bytes instead of {target.get('size', '?')})", flush=True)
+        except Exception as e:
+            print(f"[WARN] Delta update failed, downloading the full exe: {e}", flush=True)
+            new_bytes = None
+    if new_bytes is None:
+        try:
+            new_bytes = _update_download(target["url"], timeout=300.0)
+        except Exception as e:
+            print(f"[ERROR] Update download failed: {e}", flush=True)
+            return 1
+        print(f"[AInside] Downloaded full exe ({len(new_bytes)} bytes)", flush=True)
+    if hashlib.sha256(new_bytes).hexdigest() != target["sha256"]:
+        print("[ERROR] Downloaded exe does not match the signed manifest; not installed", flush=True)
+        return 1
+
+    tmp = exe_path + ".new"
+    with open(tmp, "wb") as f:
+        f.write(new_bytes)
+    try:
+        os.chmod(tmp, os.stat(exe_path).st_mode)
+    except OSError:
+        pass
+    # Windows cannot overwrite a running exe but can rename it.
+    os.replace(exe_path, exe_path + ".old")
+    os.replace(tmp, exe_path)
+    try:
+        _ensure_auth_dir()
+        with open(UPDATE_STATE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"version": manifest.get("version"), "sha256": target["sha256"], "updated_at": int(time.time())}, f)
+    except OSError:
+        pass
+    print(f"[AInside] Updated to {manifest.get('version')} ({target['sha256'][:12]})", flush=True)
+    return 0
+
 # --------- Status light ---------
-class StatusLight(tk.Canvas):
-    def __init__(self, master, size=12, **kwargs):
-        super().__init__(master, width=size, height=size, highlightthickness=0, **kwargs)
-        self.size = size
-        self._oval = self.create_oval(1, 1, size-1, size-1, fill="#cc3333", outline="")
-    def set_state(self, ok: bool):
-        self.itemconfig(self._oval, fill=("#21c55d" if ok else "#cc3333"))  # green / red
+StatusLight = None  # tk.Canvas subclass, defined by _define_widgets()
+Sparkline = None    # tk.Canvas subclass, defined by _define_widgets()
+
+def _define_widgets():
+    """Widget classes derive from tkinter, so they are created after _load_gui() imports it."""
+    global StatusLight, Sparkline
+
+    class _StatusLight(tk.Canvas):
+        def __init__(self, master, size=12, **kwargs):
+            super().__init__(master, width=size, height=size, highlightthickness=0, **kwargs)
+            self.size = size
+            self._oval = self.create_oval(1, 1, size-1, size-1, fill="#cc3333", outline="")
+        def set_state(self, state):
+            """True/"online" green, "degraded" amber, anything else red."""
+            if state == "degraded":
+                fill = "#f59e0b"
+            elif state is True or state == "online":
+                fill = "#21c55d"
+            else:
+                fill = "#cc3333"
+            self.itemconfig(self._oval, fill=fill)
+
+    class _Sparkline(tk.Canvas):
+        """Recent latency samples as one polyline, scaled to their own min..max."""
+        COLORS = {"online": "#21c55d", "degraded": "#f59e0b"}
+
+        def __init__(self, master, width=90, height=16, **kwargs):
+            super().__init__(master, width=width, height=height, highlightthickness=0, **kwargs)
+            self.w, self.h = width, height
+            self._line = self.create_line(0, 0, 0, 0, fill="#cc3333", width=1)
+            self.itemconfig(self._line, state="hidden")
+
+        def set_values(self, values, state="online"):
+            values = values[-self.w:]  # at most one sample per pixel
+            if len(values) < 2:
+                self.itemconfig(self._line, state="hidden")
+                return
+            lo, hi = min(values), max(values)
+            span = (hi - lo) or 1.0
+            step = (self.w - 2) / (len(values) - 1)
+            coords = []
+            for i, v in enumerate(values):
+                coords.append(1 + i * step)
+                coords.append(self.h - 2 - (v - lo) / span * (self.h - 4))
+            self.coords(self._line, *coords)
+            self.itemconfig(self._line, state="normal", fill=self.COLORS.get(state, "#cc3333"))
+
+    StatusLight = _StatusLight
+    Sparkline = _Sparkline
+
+PROBE_BACKOFF_MAX_MS = 30000
+
+def probe_target(target):
+    """(online, latency_ms) of one platform_is_online probe."""
+    started = time.perf_counter()
+    try:
+        ok = platform_is_online(target)
+    except Exception:
+        ok = False
+    return ok, (time.perf_counter() - started) * 1000.0
+
+def probe_platform(cfg):
+    """Probe every target of a load_probe_config() config concurrently (at most
+    cfg["max_workers"] at once) and return (state, latency_ms, results):
+    state is "online" when all targets answered as expected, "degraded" when
+    some did and "offline" when none did; latency_ms is the wall time of the
+    round and results is [(name, online, latency_ms), ...] in config order."""
+    targets = cfg.get("targets") or [dict(cfg, name=probe_target_name(cfg))]
+    started = time.perf_counter()
+    workers = max(1, min(int(cfg.get("max_workers") or 4), len(targets)))
+    if workers == 1:
+        outcomes = [probe_target(t) for t in targets]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ainside-probe") as pool:
+            outcomes = list(pool.map(probe_target, targets))
+    results = [(t["name"], ok, latency) for t, (ok, latency) in zip(targets, outcomes)]
+    up = sum(1 for _, ok, _ in results if ok)
+    state = "online" if up == len(results) else ("degraded" if up else "offline")
+    return state, (time.perf_counter() - started) * 1000.0, results
+
+def format_probe_results(results) -> str:
+    """One-line per-target summary: "name 12 ms · other offline"."""
+    return " · ".join(f"{name} {latency:.0f} ms" if ok else f"{name} offline" for name, ok, latency in results)
+
+class _GuiExecutor:
+    """Runs blocking network calls for the GUI (status probes, account, plan,
+    heartbeat, link) on a few daemon worker threads. Workers put results on a
+    queue that the Tk thread drains with after(), so callbacks always run on
+    the Tk thread. cancel() drops the results of everything submitted so far
+    and skips queued calls that have not started; close() does that for good
+    when the window goes away (a call already on the wire finishes within its
+    own timeout, and its result is discarded)."""
+
+    def __init__(self, widget, workers: int = 4, drain_ms: int = 50):
+        import queue
+        self.widget = widget
+        self.drain_ms = max(1, int(drain_ms))
+        self.closed = False
+        self._jobs = queue.Queue()
+        self._results = queue.SimpleQueue()
+        self._generation = 0
+        self._outstanding = 0  # Tk thread only
+        self._draining = False
+        self._workers = [threading.Thread(target=self._worker, name=f"ainside-gui-{i}", daemon=True)
+                         for i in range(max(1, int(workers)))]
+        for worker in self._workers:
+            worker.start()
+
+    def _worker(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            generation, fn, args, on_done, on_error = job
+            result = error = None
+            if generation == self._generation:
+                try:
+                    result = fn(*args)
+                except Exception as e:
+                    error = e
+            self._results.put((generation, result, error, on_done, on_error))
+
+    def submit(self, fn, *args, on_done=None, on_error=None):
+        """Run fn(*args) on a worker; on_done(result) or on_error(exception) runs on the Tk thread."""
+        if self.closed:
+            return
+        self._outstanding += 1
+        self._jobs.put((self._generation, fn, args, on_done, on_error))
+        self._schedule_drain()
+
+    def gather(self, calls, on_done=None, on_error=None):
+        """Run [(fn, args), ...] in parallel; on_done([results]) once all succeed,
+        otherwise on_error(first exception) once all have finished."""
+        results = [None] * len(calls)
+        errors = []
+        remaining = [len(calls)]
+
+        def finish(i, value, failed):
+            if failed:
+                errors.append(value)
+            else:
+                results[i] = value
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                if errors:
+                    if on_error:
+                        on_error(errors[0])
+                elif on_done:
+                    on_done(results)
+
+        for i, (fn, args) in enumerate(calls):
+            self.submit(fn, *args,
+                        on_done=lambda v, i=i: finish(i, v, False),
+                        on_error=lambda e, i=i: finish(i, e, True))
+
+    def after(self, ms: int, fn) -> bool:
+        """widget.after that reports False (and closes) once the window is gone."""
+        if self.closed:
+            return False
+        try:
+            self.widget.after(ms, fn)
+            return True
+        except Exception:
+            self.closed = True  # window destroyed
+            return False
+
+    def cancel(self):
+        self._generation += 1
+
+    def close(self, join_timeout: float = 0.5):
+        """Cancel everything and stop the workers: one sentinel per worker, queued
+        behind the (now skipped) pending jobs, then a bounded join. A worker still
+        inside a network call is left to finish on its own; it is a daemon."""
+        if self.closed and not any(w.is_alive() for w in self._workers):
+            return
+        self.closed = True
+        self.cancel()
+        for _ in self._workers:
+            self._jobs.put(None)
+        deadline = time.monotonic() + join_timeout
+        for worker in self._workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+
+    def _schedule_drain(self):
+        if self._draining:
+            return
+        self._draining = self.after(self.drain_ms, self._drain)
 
-def start_status_poll(light: StatusLight, status_label: Label, interval_ms=3500):
+    def _drain(self):
+        import queue
+        self._draining = False
+        while True:
+            try:
+                generation, result, error, on_done, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._outstanding -= 1
+            if self.closed or generation != self._generation:
+                continue
+            callback, value = (on_error, error) if error is not None else (on_done, result)
+            if callback is None:
+                continue
+            try:
+                callback(value)
+            except Exception as e:
+                print(f"[WARN] GUI callback failed: {e}", flush=True)
+        if self._outstanding > 0:
+            self._schedule_drain()
+
+class _StatusProbe:
+    """Runs probe_platform through a _GuiExecutor so the Tk loop never waits
+    on the network. At most one probe round is in flight, and the next round
+    is only scheduled once its result has been handled on the Tk thread.
+    While every target is offline the interval doubles per failed round up
+    to max_interval_ms."""
+
+    def __init__(self, executor: _GuiExecutor, cfg, on_result, interval_ms=3500,
+                 max_interval_ms=PROBE_BACKOFF_MAX_MS):
+        self.executor = executor
+        self.cfg = cfg
+        self.on_result = on_result
+        self.interval_ms = max(1, int(interval_ms))
+        self.max_interval_ms = max(self.interval_ms, int(max_interval_ms))
+        self.failures = 0
+        self.last_latency_ms = None
+        self.last_results = []
+        self.stopped = False
+        self._snapshot = None        # SharedSnapshotReader of cfg["service_snapshot"], opened lazily
+        self._snapshot_seen = None   # publish number last read from it
+        self._in_flight = False
+
+    def next_delay_ms(self) -> int:
+        if not self.failures:
+            return self.interval_ms
+        return min(self.max_interval_ms, self.interval_ms * (2 ** min(self.failures - 1, 16)))
+
+    def start(self):
+        self._tick()
+
+    def stop(self):
+        self.stopped = True
+
+    def _tick(self):
+        if self.stopped or self._in_flight or self.executor.closed:
+            return
+        self._in_flight = True
+        self.executor.submit(self._run, on_done=self._handle, on_error=lambda e: self._handle(("offline", None, [])))
+
+    def _run(self):
+        """Worker thread: one probe round."""
+        try:
+            result = probe_platform(self.cfg)
+        except Exception:
+            result = ("offline", None, [])
+        if result[0] != "offline" and result[1] is not None:
+            LATENCY["probe"].append(result[1])
+        self._pull_service_latency()
+        return result
+
+    def _pull_service_latency(self):
+        """Copy the local service's newest license-check RTT into LATENCY (worker
+        thread). Read from the shared snapshot header: no request to the service."""
+        path = self.cfg.get("service_snapshot")
+        if not path:
+            return
+        try:
+            if self._snapshot is None:
+                self._snapshot = SharedSnapshotReader(path)
+            found = self._snapshot.last_check()
+        except Exception:
+            return  # service not running (yet) or --no-shm; try again next round
+        if found is None or found[0] == self._snapshot_seen:
+            return
+        self._snapshot_seen, check_ms = found
+        if check_ms is not None:
+            LATENCY["license_check"].append(check_ms)
+
+    def _handle(self, result):
+        """Tk thread: show the result and schedule the next round."""
+        self._in_flight = False
+        if self.stopped:
+            return
+        state, latency_ms, results = result
+        self.failures = self.failures + 1 if state == "offline" else 0
+        self.last_latency_ms = latency_ms
+        self.last_results = results
+        try:
+            self.on_result(state, latency_ms, results)
+        except Exception:
+            pass
+        if not self.executor.after(self.next_delay_ms(), self._tick):
+            self.stopped = True
+
+def format_latency_stats() -> str:
+    """min/avg/p95 per LATENCY ring, e.g. "Probe 4/9/21 ms · License check 180/240/410 ms"."""
+    parts = []
+    for key, title in (("probe", "Probe"), ("license_check", "License check"), ("heartbeat", "Heartbeat")):
+        stats = LATENCY[key].stats()
+        if stats:
+            parts.append(f"{title} {stats[0]:.0f}/{stats[1]:.0f}/{stats[2]:.0f} ms")
+    return (" · ".join(parts) + " (min/avg/p95)") if parts else ""
+
+def start_status_poll(executor: _GuiExecutor, light: StatusLight, status_label: Label, interval_ms=3500,
+                      detail_label: Label = None, sparkline: Sparkline = None, stats_label: Label = None):
     cfg = load_probe_config()
-    def poll():
-        ok = platform_is_online(cfg)
-        light.set_state(ok)
-        status_label.configure(text=(tr("connected") if ok else tr("disconnected")))
-        light.after(interval_ms, poll)
-    poll()
+    def show(state: str, latency_ms, results):
+        light.set_state(state)
+        text = {"online": tr("connected"), "degraded": tr("degraded")}.get(state, tr("disconnected"))
+        if len(results) > 1:
+            text += f" · {sum(1 for _, ok, _ in results if ok)}/{len(results)}"
+        if state != "offline" and latency_ms is not None:
+            text += f" · {latency_ms:.0f} ms"
+        status_label.configure(text=text)
+        if detail_label is not None and len(results) > 1:
+            detail_label.configure(text=format_probe_results(results))
+        if sparkline is not None:
+            sparkline.set_values(LATENCY["probe"].values(), state)
+        if stats_label is not None:
+            stats_label.configure(text=format_latency_stats())
+    probe = _StatusProbe(executor, cfg, show, interval_ms=interval_ms)
+    probe.start()
+    return probe
 
 # --------- Dynamic sizing helper ---------
 def fit_to_content(root: tk.Tk, padding_w=40, padding_h=40, min_w=680, min_h=560):
@@ -721,12 +2956,59 @@ def fit_to_content(root: tk.Tk, padding_w=40, padding_h=40, min_w=680, min_h=560
     root.minsize(final_w, final_h)
 
 # --------- Main UI ---------
+def _arg_value(name: str, default: str = "") -> str:
+    """Return the value of a --name=value argument (very simple parsing, no extra deps)."""
+    prefix = name + "="
+    for arg in sys.argv[1:]:
+        if arg.startswith(prefix):
+            return arg.split("=", 1)[1].strip()
+    return default
+
 def main():
     global LANG
     if "--service" in sys.argv:
         hwid = get_hwid()
         save_hwid(hwid)
-        return start_local_license_service(hwid)
+        return start_local_license_service(
+            hwid,
+            port=int(_arg_value("--port", "8787")),
+            keep_alive=("--no-keepalive" not in sys.argv),
+            idle_timeout=float(_arg_value("--idle-timeout", "15")),
+            max_connections=int(_arg_value("--max-connections", "0")) or None,
+            max_watchers=int(_arg_value("--max-watchers", "0")) or None,
+            engine=_arg_value("--engine", "threads"),
+            shm_path=(None if "--no-shm" in sys.argv else _arg_value("--shm-path", SHM_FILE)),
+            debug_profile=("--debug-profile" in sys.argv),
+        )
+
+    if "--update" in sys.argv or "--check-update" in sys.argv:
+        exe_path = _update_target_exe()
+        if not exe_path:
+            print("[ERROR] Self-update applies to the packaged HWID.exe (or pass --update-exe=PATH)", flush=True)
+            return 1
+        manifest_url = _arg_value("--update-manifest") or None
+        if "--update" in sys.argv:
+            return apply_update(exe_path, manifest_url)
+        try:
+            manifest, current_sha, delta = check_for_update(exe_path, manifest_url)
+        except Exception as e:
+            print(f"[ERROR] Update check failed: {e}", flush=True)
+            return 1
+        if manifest is None:
+            print(f"[AInside] Up to date ({current_sha[:12]})", flush=True)
+        else:
+            via = f"delta {delta.get('size', '?')} bytes" if delta else f"full download {manifest['exe'].get('size', '?')} bytes"
+            print(f"[AInside] Update available: {manifest.get('version')} ({via})", flush=True)
+        return 0
+
+    if "--probe" in sys.argv:
+        cfg = load_probe_config(_arg_value("--probe-config", CONFIG_FILE))
+        state, latency_ms, results = probe_platform(cfg)
+        for name, ok, latency in results:
+            print(f"  {'OK  ' if ok else 'DOWN'} {name:<40} {latency:8.1f} ms", flush=True)
+        up = sum(1 for _, ok, _ in results if ok)
+        print(f"[AInside] Platform {state}: {up}/{len(results)} targets up in {latency_ms:.1f} ms", flush=True)
+        return {"online": 0, "degraded": 1}.get(state, 2)
 
     if "--activate" in sys.argv:
         hwid = get_hwid()
@@ -757,8 +3039,8 @@ def main():
             print(f"Activation failed: {e}", flush=True)
             return 1
 
-    if ("--cli" in sys.argv) or (not HAS_TTKBOOTSTRAP):
-        if not HAS_TTKBOOTSTRAP and "--cli" not in sys.argv:
+    if ("--cli" in sys.argv) or (not _load_gui()):
+        if "--cli" not in sys.argv:
             print("[INFO] ttkbootstrap is not installed. Running in CLI mode.")
             print("[INFO] Install GUI dependencies with: pip install ttkbootstrap")
         return cli_main()
@@ -818,8 +3100,15 @@ def main():
     status_text.pack(side="left", padx=(0,6))
     light = StatusLight(status_frame, size=12, bg=bg)
     light.pack(side="left", padx=(0,6))
+    sparkline = Sparkline(status_frame, bg=bg)
+    sparkline.pack(side="left", padx=(0,6))
     status_value = Label(status_frame, text=tr("disconnected"), bootstyle="secondary")
     status_value.pack(side="left")
+    # Per-target latency, filled in when platform_probe.json lists several targets
+    status_detail = Label(container, text="", bootstyle="secondary", font=("Segoe UI", 8))
+    status_detail.pack(anchor="e")
+    latency_stats = Label(container, text="", bootstyle="secondary", font=("Segoe UI", 8))
+    latency_stats.pack(anchor="e")
 
     # --- Header with logo ---
     header = tk.Frame(container, bg=bg)
@@ -950,7 +3239,7 @@ def main():
     def on_theme_change(event=None):
         choice = theme_combo.get()
         key = "Dark" if choice in (TEXTS["EN"]["dark"], TEXTS["HE"]["dark"]) else "Light"
-        apply_theme(style, key, ui_frames=[container, topbar, lang_frame, theme_frame, status_frame, header, entry_frame, actions, links])
+        apply_theme(style, key, ui_frames=[container, topbar, lang_frame, theme_frame, status_frame, light, sparkline, header, entry_frame, actions, links])
         update_theme_assets(key, ui, style)
         fit_to_content(root)  # re-fit after theme changes
     theme_combo.bind("<<ComboboxSelected>>", on_theme_change)
@@ -959,6 +3248,8 @@ def main():
     update_theme_assets("Dark", ui, style)
 
     # ---- Account linking UI ----
+    executor = _GuiExecutor(root)
+
     def refresh_account_ui():
         info = auth_load()
         if info and info.get("token"):
@@ -991,28 +3282,37 @@ def main():
         tk.Label(frm, text="Code / License:").grid(row=1, column=0, sticky="e", **pad)
         code_var = tk.StringVar()
         tk.Entry(frm, textvariable=code_var, width=28, show="*").grid(row=1, column=1, **pad)
+        def on_linked(data):
+            if not dlg.winfo_exists():
+                return  # dialog cancelled while the request was in flight
+            link_btn.configure(state="normal", text="Link")
+            token = (data or {}).get("token")
+            if not token:
+                messagebox.showerror("Link failed", "Missing token from server")
+                return
+            auth_save(data)
+            refresh_account_ui()
+            dlg.destroy()
+        def on_link_failed(e):
+            if not dlg.winfo_exists():
+                return
+            link_btn.configure(state="normal", text="Link")
+            messagebox.showerror("Link failed", str(e))
         def on_ok():
             email = email_var.get().strip()
             code = code_var.get().strip()
             if not email or not code:
                 messagebox.showwarning("Link account", "Please enter email and code")
                 return
-            try:
-                data = api_link_account(email, code, hwid)
-                token = data.get("token")
-                if not token:
-                    raise RuntimeError("Missing token from server")
-                auth_save(data)
-                refresh_account_ui()
-                dlg.destroy()
-            except Exception as e:
-                messagebox.showerror("Link failed", str(e))
+            link_btn.configure(state="disabled", text="Linking…")
+            executor.submit(api_link_account, email, code, hwid, on_done=on_linked, on_error=on_link_failed)
         def on_cancel():
             dlg.destroy()
         btns = tk.Frame(frm)
         btns.grid(row=2, column=0, columnspan=2, pady=(10,6))
         Button(btns, text="Cancel", bootstyle="secondary", command=on_cancel, width=12).pack(side="left", padx=6)
-        Button(btns, text="Link", bootstyle="primary", command=on_ok, width=12).pack(side="left", padx=6)
+        link_btn = Button(btns, text="Link", bootstyle="primary", command=on_ok, width=12)
+        link_btn.pack(side="left", padx=6)
         dlg.wait_visibility()
         dlg.focus_set()
         dlg.wait_window()
@@ -1024,10 +3324,14 @@ def main():
             return
         # When linked, verify against the web and show the actual user/plan
         account_label.configure(text="Account: checking…")
-        root.update_idletasks()
+        account_btn.configure(state="disabled")
+        token = info.get("token")
+        executor.gather([(api_whoami, (token,)), (api_get_plan, (token,))],
+                        on_done=lambda r: show_account(info, *r), on_error=account_check_failed)
+
+    def show_account(info, me, plan):
+        account_btn.configure(state="normal")
         try:
-            me = api_whoami(info.get("token"))
-            plan = api_get_plan(info.get("token"))
             email = (me.get("user", me) or {}).get("email") or (info.get("user", {}) or {}).get("email") or "(unknown)"
             plan_name = (plan or {}).get("name") or (info.get("plan", {}) or {}).get("name") or "(no plan)"
             merged = {**(info or {}), "user": me.get("user", me), "plan": plan}
@@ -1042,58 +3346,58 @@ def main():
                 auth_unlink()
                 refresh_account_ui()
         except Exception as e:
-            # If unauthorized or network issue, reflect it
-            err = str(e)
-            if "401" in err or "403" in err or "unauthoriz" in err.lower():
-                messagebox.showwarning("Sesión inválida", "Tu sesión ya no es válida. Vuelve a vincular tu cuenta.")
-                auth_unlink()
-                refresh_account_ui()
-            else:
-                messagebox.showerror("Error de conexión", f"No se pudo verificar la cuenta ahora.\n{err}")
+            account_check_failed(e)
+
+    def account_check_failed(e):
+        account_btn.configure(state="normal")
+        # If unauthorized or network issue, reflect it
+        err = str(e)
+        if "401" in err or "403" in err or "unauthoriz" in err.lower():
+            messagebox.showwarning("Sesión inválida", "Tu sesión ya no es válida. Vuelve a vincular tu cuenta.")
+            auth_unlink()
+        else:
+            messagebox.showerror("Error de conexión", f"No se pudo verificar la cuenta ahora.\n{err}")
+        refresh_account_ui()
     account_btn.configure(command=on_account_btn)
 
-    # Try to validate existing token and fetch plan (best-effort)
+    # Try to validate existing token and fetch plan (best-effort, whoami and plan in parallel)
     def try_fetch_plan_async():
         info = auth_load()
         if not info or not info.get("token"):
             return
         token = info.get("token")
-        try:
-            me = api_whoami(token)
-            plan = api_get_plan(token)
-            merged = {**info, "user": me.get("user", me), "plan": plan}
-            auth_save(merged)
-        except Exception:
-            # ignore network errors silently, keep cached info
-            pass
-        finally:
+        def done(results):
+            me, plan = results
+            auth_save({**info, "user": me.get("user", me), "plan": plan})
             refresh_account_ui()
+        # On network errors keep the cached info silently
+        executor.gather([(api_whoami, (token,)), (api_get_plan, (token,))],
+                        on_done=done, on_error=lambda e: refresh_account_ui())
 
     refresh_account_ui()
     # defer network call after UI shows up
     root.after(200, try_fetch_plan_async)
 
-    # --- Heartbeat to server every 30 seconds ---
+    # --- Heartbeat to server every 30 seconds (sent on the executor) ---
+    def on_heartbeat(config):
+        if config and config.get("config"):
+            # Update UI with server configuration if needed
+            server_config = config.get("config")
+            # Could update strategies here based on server response
+            print(f"Server config: {server_config}")
+        # Schedule next heartbeat once this one has finished
+        root.after(30000, send_heartbeat_loop)
+
+    def on_heartbeat_error(e):
+        print(f"Heartbeat loop error: {e}")
+        root.after(30000, send_heartbeat_loop)
+
     def send_heartbeat_loop():
-        try:
-            info = auth_load()
-            plan_name = "Basic"
-            if info and info.get("plan"):
-                plan_name = info.get("plan", {}).get("name", "Basic")
-            
-            # Send heartbeat
-            config = send_heartbeat(hwid, plan_name, [])
-            
-            if config and config.get("config"):
-                # Update UI with server configuration if needed
-                server_config = config.get("config")
-                # Could update strategies here based on server response
-                print(f"Server config: {server_config}")
-        except Exception as e:
-            print(f"Heartbeat loop error: {e}")
-        finally:
-            # Schedule next heartbeat
-            root.after(30000, send_heartbeat_loop)
+        info = auth_load()
+        plan_name = "Basic"
+        if info and info.get("plan"):
+            plan_name = info.get("plan", {}).get("name", "Basic")
+        executor.submit(send_heartbeat, hwid, plan_name, [], on_done=on_heartbeat, on_error=on_heartbeat_error)
     
     # Start heartbeat after 5 seconds
     root.after(5000, send_heartbeat_loop)
@@ -1102,10 +3406,92 @@ def main():
     fit_to_content(root, padding_w=48, padding_h=48, min_w=720, min_h=580)
 
     # Initial status polling
-    start_status_poll(light, status_value, interval_ms=3200)
+    probe = start_status_poll(executor, light, status_value, interval_ms=3200, detail_label=status_detail,
+                              sparkline=sparkline, stats_label=latency_stats)
+
+    def on_close():
+        # Stop polling and drop pending network results before the widgets go away
+        probe.stop()
+        executor.close()
+        root.destroy()
+    root.protocol("WM_DELETE_WINDOW", on_close)
 
     root.mainloop()
     return 0
 
+def _run_profiled(fn, out: str) -> int:
+    """Run fn under cProfile and tracemalloc and write, when it returns or is
+    interrupted:
+      <out>.prof        pstats dump (snakeviz, python -m pstats)
+      <out>.tracemalloc tracemalloc snapshot (Snapshot.load)
+      <out>.txt         top functions by cumulative time and top allocations
+    Threads started while profiling (service request threads, poll loop) are
+    included: on 3.12+ cProfile is process-wide already; before that each
+    new thread gets its own profiler and the stats are merged into the dump."""
+    import cProfile
+    import io
+    import pstats
+    import signal
+    import tracemalloc
+
+    if out.endswith(".prof"):
+        out = out[:-5]
+    profilers = []
+    profilers_lock = threading.Lock()
+
+    def start_thread_profiler(*_):
+        # Runs once per new thread: enable() replaces this hook for that thread.
+        # Never let it raise into the thread being started.
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:
+            return  # another profiler is active; this thread goes unprofiled
+        with profilers_lock:
+            profilers.append(prof)
+
+    def stop(*_):
+        raise SystemExit(0)
+
+    try:
+        signal.signal(signal.SIGTERM, stop)
+    except (ValueError, OSError):
+        pass
+    tracemalloc.start(25)
+    # 3.12+ allows one active profiler per process and it sees every thread.
+    per_thread = sys.version_info < (3, 12)
+    if per_thread:
+        threading.setprofile(start_thread_profiler)
+    main_prof = cProfile.Profile()
+    try:
+        return main_prof.runcall(fn)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if per_thread:
+            threading.setprofile(None)
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        stats = pstats.Stats(main_prof)
+        with profilers_lock:
+            others = list(profilers)
+        for prof in others:
+            try:
+                stats.add(prof)
+            except Exception:
+                pass  # a thread that never ran Python code has no stats
+        stats.dump_stats(out + ".prof")
+        snapshot.dump(out + ".tracemalloc")
+        report = io.StringIO()
+        pstats.Stats(out + ".prof", stream=report).sort_stats("cumulative").print_stats(40)
+        report.write("\nTop allocations (tracemalloc, by line):\n")
+        for stat in snapshot.statistics("lineno")[:25]:
+            report.write(f"{stat}\n")
+        with open(out + ".txt", "w", encoding="utf-8") as f:
+            f.write(report.getvalue())
+        print(f"[AInside] Profile written to {out}.prof, {out}.tracemalloc, {out}.txt", flush=True)
+
+
 if __name__ == "__main__":
-    raise SystemExit(main())
+    _profile_out = _arg_value("--profile")
+    raise SystemExit(_run_profiled(main, _profile_out) if _profile_out else main())
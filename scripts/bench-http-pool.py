@@ -0,0 +1,148 @@
+# Benchmark del cliente HTTP con pool (HWID.py http_request)
+# Levanta un servidor HTTPS local (certificado autofirmado generado con openssl)
+# que imita license-check y compara:
+#   fresh  → una conexión TCP + TLS nueva por llamada (comportamiento anterior, urlopen)
+#   pooled → http_request con el pool keep-alive compartido
+#
+# Uso:
+#   python scripts/bench-http-pool.py
+#   python scripts/bench-http-pool.py --requests 500 --latency-ms 2
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import Request as UrlRequest, urlopen
+
+
+def make_self_signed_cert(workdir: str):
+    if not shutil.which("openssl"):
+        print("[ERROR] Se necesita openssl para generar el certificado de prueba")
+        sys.exit(1)
+    cert = os.path.join(workdir, "cert.pem")
+    key = os.path.join(workdir, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+         "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # cabeceras y cuerpo van en writes separados
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        return
+
+    def do_POST(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        if n:
+            self.rfile.read(n)
+        if self.latency:
+            time.sleep(self.latency)
+        body = json.dumps({"payload": {"allowed": True, "reason": "ok"}, "payloadJson": "{}", "signature": "x", "alg": "RS256"}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class CountingTLSServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, handler, ctx):
+        super().__init__(addr, handler)
+        self.ctx = ctx
+        self.handshakes = 0
+        self._count_lock = threading.Lock()
+
+    def get_request(self):
+        sock, addr = super().get_request()
+        with self._count_lock:
+            self.handshakes += 1
+        return self.ctx.wrap_socket(sock, server_side=True), addr
+
+
+def load_hwid_module(path: str):
+    spec = importlib.util.spec_from_file_location("ainside_hwid_bench", path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def run_mode(name, call, server, n):
+    start_handshakes = server.handshakes
+    t0 = time.perf_counter()
+    for _ in range(n):
+        status = call()
+        if status != 200:
+            raise RuntimeError(f"{name}: status {status}")
+    elapsed = time.perf_counter() - t0
+    return {
+        "mode": name,
+        "requests": n,
+        "seconds": round(elapsed, 3),
+        "ms_per_request": round(elapsed * 1000 / n, 3),
+        "tls_handshakes": server.handshakes - start_handshakes,
+    }
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Benchmark del pool HTTP de HWID.py contra un servidor TLS local")
+    parser.add_argument("--module", default=os.path.join(script_dir, "HWID.py"))
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia simulada del servidor")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ainside-bench-")
+    try:
+        cert, key = make_self_signed_cert(workdir)
+        server_ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        server_ctx.load_cert_chain(cert, key)
+        StandInHandler.latency = args.latency_ms / 1000.0
+        server = CountingTLSServer(("127.0.0.1", 0), StandInHandler, server_ctx)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"https://localhost:{server.server_address[1]}/functions/v1/license-check"
+
+        os.environ["AINSIDE_HTTP_CA_FILE"] = cert
+        mod = load_hwid_module(args.module)
+        client_ctx = ssl.create_default_context(cafile=cert)
+        payload = {"hwid": "123456789012", "deviceSecret": "bench", "nonce": "bench"}
+
+        def fresh():
+            req = UrlRequest(url, method="POST", headers={"Content-Type": "application/json"},
+                             data=json.dumps(payload).encode("utf-8"))
+            with urlopen(req, timeout=8.0, context=client_ctx) as resp:
+                resp.read()
+                return resp.status
+
+        def pooled():
+            status, _ = mod.http_request("POST", url, payload=payload, timeout=8.0)
+            return status
+
+        results = [
+            run_mode("fresh", fresh, server, args.requests),
+            run_mode("pooled", pooled, server, args.requests),
+        ]
+        server.shutdown()
+        print(json.dumps({"requests_available": bool(getattr(mod, "HAS_REQUESTS", False)), "results": results}, indent=2))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
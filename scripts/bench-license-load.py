@@ -0,0 +1,606 @@
+# Prueba de carga del servicio local de licencias (HWID.py --service) sin red
+#
+# 1. Levanta un sustituto local de las funciones de Supabase (license-check,
+#    license-activate, client-heartbeat) con latencia, tasa de error y TTL
+#    configurables. license-check devuelve payloads firmados RS256 igual que
+#    la función real (clave RSA generada en memoria, sin dependencias).
+# 2. Activa el dispositivo y arranca HWID.py --service como subproceso con
+#    AINSIDE_FUNCTIONS_BASE apuntando al sustituto y un HOME temporal.
+# 3. Simula N gráficos que piden /status a su ritmo de tick (conexiones
+#    keep-alive, ritmo fijo) y mide throughput, p50/p99/p999, CPU y RSS
+#    del proceso del servicio y el TTL restante mínimo del proof servido.
+# 4. Escribe los resultados en JSON (--out) y, con --compare, los compara
+#    contra un resultado anterior.
+# 5. Verifica la firma RS256 y el exp de cada proof distinto servido; sale
+#    con 1 si no se verificó ninguno, si alguno no es "ok" o está caducado, o
+#    si el TTL restante del proof servido llegó a ser negativo.
+#
+# Uso:
+#   python scripts/bench-license-load.py
+#   python scripts/bench-license-load.py --charts 200 --tick-ms 100 --seconds 30
+#   python scripts/bench-license-load.py --engine asyncio --profile compact --etag
+#   python scripts/bench-license-load.py --upstream-latency-ms 400 --upstream-error-rate 0.3
+#   python scripts/bench-license-load.py --out v2.json --compare v1.json
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import http.client
+import json
+import os
+import platform
+import random
+import secrets
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# --------- RSA (solo para el sustituto; no usar fuera de pruebas) ---------
+_SMALL_PRIMES = [p for p in range(3, 2000, 2) if all(p % d for d in range(3, int(p ** 0.5) + 1, 2))]
+_SHA256_DIGEST_INFO = bytes.fromhex("3031300d060960864801650304020105000420")
+
+
+def _is_probable_prime(n: int, rounds: int = 32) -> bool:
+    for p in _SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+    d, r = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        r += 1
+    for _ in range(rounds):
+        x = pow(random.randrange(2, n - 2), d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(r - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _random_prime(bits: int) -> int:
+    while True:
+        n = secrets.randbits(bits) | (1 << (bits - 1)) | (1 << (bits - 2)) | 1
+        if _is_probable_prime(n):
+            return n
+
+
+class StubSigner:
+    """RSASSA-PKCS1-v1_5 / SHA-256, el mismo esquema que license-check."""
+
+    def __init__(self, bits: int = 2048, e: int = 65537):
+        while True:
+            p, q = _random_prime(bits // 2), _random_prime(bits // 2)
+            phi = (p - 1) * (q - 1)
+            if p != q and phi % e and (p * q).bit_length() == bits:
+                break
+        self.n, self.e = p * q, e
+        self.k = (self.n.bit_length() + 7) // 8
+        d = pow(e, -1, phi)
+        self._p, self._q = p, q
+        self._dp, self._dq, self._qinv = d % (p - 1), d % (q - 1), pow(q, -1, p)
+
+    def _encode(self, message: bytes) -> int:
+        t = _SHA256_DIGEST_INFO + hashlib.sha256(message).digest()
+        em = b"\x00\x01" + b"\xff" * (self.k - len(t) - 3) + b"\x00" + t
+        return int.from_bytes(em, "big")
+
+    def sign(self, message: bytes) -> bytes:
+        m = self._encode(message)
+        s1, s2 = pow(m, self._dp, self._p), pow(m, self._dq, self._q)  # CRT
+        s = s2 + ((self._qinv * (s1 - s2)) % self._p) * self._q
+        return s.to_bytes(self.k, "big")
+
+    def verify(self, message: bytes, signature: bytes) -> bool:
+        if len(signature) != self.k:
+            return False
+        return pow(int.from_bytes(signature, "big"), self.e, self.n) == self._encode(message)
+
+
+def b64u(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def b64u_decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+# --------- Sustituto de las funciones de Supabase ---------
+class UpstreamStub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, signer: StubSigner, latency_ms: float, jitter_ms: float, error_rate: float, ttl_ms: int):
+        super().__init__(("127.0.0.1", 0), UpstreamHandler)
+        self.signer = signer
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.ttl_ms = ttl_ms
+        self.device_secrets = {}  # hwid -> deviceSecret emitido por license-activate
+        self.counts = {}          # endpoint -> {"calls", "errors", "injected_errors"}
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/functions/v1"
+
+    def count(self, endpoint: str, field: str):
+        with self.lock:
+            c = self.counts.setdefault(endpoint, {"calls": 0, "errors": 0, "injected_errors": 0})
+            c[field] += 1
+
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        return
+
+    def _reply(self, status: int, obj: dict):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        stub = self.server
+        n = int(self.headers.get("Content-Length") or 0)
+        try:
+            req = json.loads(self.rfile.read(n) or b"{}")
+        except ValueError:
+            req = {}
+        endpoint = self.path.rstrip("/").rsplit("/", 1)[-1]
+        stub.count(endpoint, "calls")
+
+        delay = stub.latency_ms + random.uniform(-stub.jitter_ms, stub.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        if stub.error_rate and random.random() < stub.error_rate:
+            stub.count(endpoint, "injected_errors")
+            return self._reply(503, {"error": "stub_unavailable"})
+
+        hwid = str(req.get("hwid") or "")
+        if endpoint == "license-activate":
+            with stub.lock:
+                secret = stub.device_secrets.setdefault(hwid, b64u(os.urandom(32)))
+            return self._reply(200, {"success": True, "deviceSecret": secret,
+                                     "orderId": req.get("orderId"), "email": req.get("email")})
+        if endpoint == "license-check":
+            with stub.lock:
+                expected = stub.device_secrets.get(hwid)
+            if not expected or req.get("deviceSecret") != expected:
+                stub.count(endpoint, "errors")
+                return self._reply(403, {"allowed": False, "reason": "invalid_device_secret"})
+            now = int(time.time() * 1000)
+            payload = {"allowed": True, "reason": "ok", "hwid": hwid, "orderId": "BENCH-ORDER-0001",
+                       "ts": now, "exp": now + stub.ttl_ms, "nonce": req.get("nonce") or None, "v": 1}
+            payload_json = json.dumps(payload, separators=(",", ":"))
+            signature = b64u(stub.signer.sign(payload_json.encode("utf-8")))
+            return self._reply(200, {"payload": payload, "payloadJson": payload_json,
+                                     "signature": signature, "alg": "RS256"})
+        if endpoint == "client-heartbeat":
+            return self._reply(200, {"success": True, "config": {"strategies": req.get("strategies_active") or []}})
+        stub.count(endpoint, "errors")
+        return self._reply(404, {"error": "not_found"})
+
+
+# --------- Proceso del servicio ---------
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def service_env(home: str, base_url: str) -> dict:
+    env = dict(os.environ)
+    env.update({"HOME": home, "USERPROFILE": home, "AINSIDE_FUNCTIONS_BASE": base_url, "PYTHONUNBUFFERED": "1"})
+    return env
+
+
+class ProcessSampler:
+    """CPU y RSS de otro proceso: /proc en Linux, psutil si está instalado."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.psutil_proc = None
+        if not os.path.exists(f"/proc/{pid}/stat"):
+            try:
+                import psutil  # type: ignore
+                self.psutil_proc = psutil.Process(pid)
+            except Exception:
+                pass
+
+    def cpu_seconds(self):
+        if self.psutil_proc is not None:
+            t = self.psutil_proc.cpu_times()
+            return t.user + t.system
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        except Exception:
+            return None
+
+    def rss_mb(self):
+        if self.psutil_proc is not None:
+            return self.psutil_proc.memory_info().rss / (1024 * 1024)
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024.0
+        except Exception:
+            pass
+        return None
+
+
+def http_get(port: int, path: str, timeout: float = 2.0):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        conn.request("GET", path)
+        resp = conn.getresponse()
+        return resp.status, resp.read()
+    finally:
+        conn.close()
+
+
+def wait_until(predicate, timeout: float, what: str):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if predicate():
+                return
+        except Exception:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"timeout esperando {what}")
+
+
+def parse_metrics(text: str) -> dict:
+    """Series sin etiquetas y con etiquetas de /metrics como {nombre{...}: valor}."""
+    out = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#") or "_bucket{" in line:
+            continue
+        name, _, value = line.rpartition(" ")
+        try:
+            out[name] = float(value)
+        except ValueError:
+            pass
+    return out
+
+
+# --------- Gráficos simulados ---------
+class ChartStats:
+    def __init__(self):
+        self.latencies = []
+        self.status = {}
+        self.reasons = {}
+        self.errors = 0
+        self.late_ticks = 0
+        self.bad_signatures = 0
+        self.verified = 0
+
+
+async def chart(port: int, path: str, tick: float, start_at: float, stop_at: float, record_from: float,
+                use_etag: bool, stats: ChartStats, verify):
+    loop = asyncio.get_running_loop()
+    reader = writer = None
+    etag = None
+    last_body = None
+    next_tick = start_at + random.uniform(0, tick)  # los gráficos no arrancan sincronizados
+    while True:
+        now = loop.time()
+        if next_tick >= stop_at:
+            break
+        if next_tick > now:
+            await asyncio.sleep(next_tick - now)
+        elif now - next_tick > tick:
+            stats.late_ticks += 1
+            next_tick = now
+        recording = next_tick >= record_from
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            extra = f"If-None-Match: {etag}\r\n" if (use_etag and etag) else ""
+            t0 = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n{extra}\r\n".encode("ascii"))
+            head = await reader.readuntil(b"\r\n\r\n")
+            lines = head.decode("latin-1").split("\r\n")
+            status = int(lines[0].split()[1])
+            headers = {}
+            for line in lines[1:]:
+                name, sep, value = line.partition(":")
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length") or 0)
+            body = await reader.readexactly(length) if length else b""
+            elapsed = time.perf_counter() - t0
+            if headers.get("connection", "").lower() == "close":
+                writer.close()
+                reader = writer = None
+            if "etag" in headers:
+                etag = headers["etag"]
+            if recording:
+                stats.latencies.append(elapsed)
+                stats.status[status] = stats.status.get(status, 0) + 1
+                # last_body solo avanza al medir: el primer 200 medido siempre se verifica
+                if status == 200 and body != last_body:
+                    reason = verify(body, stats)
+                    stats.reasons[reason] = stats.reasons.get(reason, 0) + 1
+                    last_body = body
+        except Exception:
+            if recording:
+                stats.errors += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+        next_tick += tick
+    if writer is not None:
+        writer.close()
+
+
+def parse_binary_frame(body: bytes):
+    """(payloadJson, firma) de /status?profile=binary: "AIL1" | u16+alg | u32+payload | u16+firma."""
+    if body[:4] != b"AIL1":
+        raise ValueError("magic")
+    pos = 4
+    (n,) = struct.unpack_from("<H", body, pos)
+    pos += 2 + n
+    (n,) = struct.unpack_from("<I", body, pos)
+    payload_json = body[pos + 4:pos + 4 + n]
+    pos += 4 + n
+    (n,) = struct.unpack_from("<H", body, pos)
+    signature = body[pos + 2:pos + 2 + n]
+    if not payload_json or len(signature) != n:
+        raise ValueError("frame sin proof")
+    return payload_json, signature
+
+
+def make_verifier(signer: StubSigner, profile: str):
+    def verify(body: bytes, stats: ChartStats) -> str:
+        """Comprueba la firma del proof servido (solo cuando cambia el cuerpo)."""
+        try:
+            if profile == "binary":
+                obj, payload_json, signature = {}, *parse_binary_frame(body)
+            else:
+                obj = json.loads(body)
+                lic = obj.get("license") if "license" in obj else obj
+                payload_json = base64.urlsafe_b64decode(lic["payloadJsonB64u"] + "=" * (-len(lic["payloadJsonB64u"]) % 4))
+                signature = b64u_decode(lic["signature"])
+            ok = signer.verify(payload_json, signature)
+            stats.verified += 1
+            if not ok:
+                stats.bad_signatures += 1
+            payload = json.loads(payload_json)
+            if payload.get("exp") is not None and payload["exp"] <= time.time() * 1000:
+                return "expired"
+            reason = obj.get("reason") or payload.get("reason") or "unknown"
+            return str(reason)
+        except Exception:
+            return "unsigned"
+    return verify
+
+
+async def run_charts(args, port: int, path: str, signer: StubSigner):
+    loop = asyncio.get_running_loop()
+    stats = ChartStats()
+    start_at = loop.time()
+    record_from = start_at + args.warmup
+    stop_at = record_from + args.seconds
+    verify = make_verifier(signer, args.profile)
+    tasks = [chart(port, path, args.tick_ms / 1000.0, start_at, stop_at, record_from, args.etag, stats, verify)
+             for _ in range(args.charts)]
+    await asyncio.gather(*tasks)
+    return stats
+
+
+def percentile(sorted_values, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def compare(current: dict, previous: dict):
+    def get(d, *keys):
+        for k in keys:
+            d = (d or {}).get(k)
+        return d
+    rows = [
+        ("throughput_rps", ("charts", "throughput_rps"), True),
+        ("p50_ms", ("charts", "latency_ms", "p50"), False),
+        ("p99_ms", ("charts", "latency_ms", "p99"), False),
+        ("p999_ms", ("charts", "latency_ms", "p999"), False),
+        ("cpu_percent", ("service", "cpu_percent"), False),
+        ("rss_mb_peak", ("service", "rss_mb_peak"), False),
+        ("proof_ttl_min_s", ("proof", "ttl_remaining_min_s"), True),
+    ]
+    print("\nComparación (actual vs anterior):")
+    for label, keys, higher_is_better in rows:
+        a, b = get(current, *keys), get(previous, *keys)
+        if a is None or b is None:
+            continue
+        delta = (a - b) / b * 100.0 if b else 0.0
+        worse = delta < 0 if higher_is_better else delta > 0
+        flag = " <-- peor" if worse and abs(delta) >= 10 else ""
+        print(f"  {label:<16} {b:>10.3f} -> {a:>10.3f}  ({delta:+.1f}%){flag}")
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Prueba de carga de HWID.py --service con upstream simulado")
+    parser.add_argument("--module", default=os.path.join(script_dir, "HWID.py"))
+    parser.add_argument("--charts", type=int, default=50, help="Gráficos simulados (una conexión cada uno)")
+    parser.add_argument("--tick-ms", type=float, default=250.0, help="Intervalo entre /status de cada gráfico")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Duración de la medición")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Segundos iniciales sin medir")
+    parser.add_argument("--engine", choices=["threads", "asyncio"], default="threads")
+    parser.add_argument("--profile", choices=["full", "compact", "binary"], default="full")
+    parser.add_argument("--etag", action="store_true", help="Enviar If-None-Match (304 si no cambió)")
+    parser.add_argument("--max-connections", type=int, default=0)
+    parser.add_argument("--upstream-latency-ms", type=float, default=80.0)
+    parser.add_argument("--upstream-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0, help="Fracción de llamadas upstream que devuelven 503")
+    parser.add_argument("--proof-ttl-ms", type=int, default=60_000)
+    parser.add_argument("--key-bits", type=int, default=2048)
+    parser.add_argument("--out", default="", help="Archivo JSON de resultados")
+    parser.add_argument("--compare", default="", help="JSON de una ejecución anterior para comparar")
+    args = parser.parse_args()
+
+    print(f"[bench] generando clave RSA-{args.key_bits}...", flush=True)
+    signer = StubSigner(args.key_bits)
+    stub = UpstreamStub(signer, args.upstream_latency_ms, args.upstream_jitter_ms, args.upstream_error_rate, args.proof_ttl_ms)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+    workdir = tempfile.mkdtemp(prefix="ainside-load-")
+    proc = log = None
+    try:
+        env = service_env(workdir, stub.base_url)
+        # La tasa de error no aplica a la activación: sin deviceSecret no hay nada que medir.
+        error_rate, stub.error_rate = stub.error_rate, 0.0
+        act = subprocess.run([sys.executable, args.module, "--activate", "--order=BENCH-ORDER-0001", "--email=bench@example.com"],
+                             cwd=workdir, env=env, capture_output=True, text=True, timeout=60)
+        if act.returncode != 0:
+            raise RuntimeError(f"--activate falló: {act.stdout}{act.stderr}")
+        stub.error_rate = error_rate
+
+        port = free_port()
+        cmd = [sys.executable, args.module, "--service", f"--port={port}", f"--engine={args.engine}", "--no-shm"]
+        if args.max_connections:
+            cmd.append(f"--max-connections={args.max_connections}")
+        log = open(os.path.join(workdir, "service.log"), "wb")
+        proc = subprocess.Popen(cmd, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            wait_until(lambda: http_get(port, "/health")[0] == 200, 15.0, "/health")
+            wait_until(lambda: json.loads(http_get(port, "/status")[1]).get("allowed"), 30.0, "el primer proof")
+        except RuntimeError:
+            log.flush()
+            with open(os.path.join(workdir, "service.log"), "r", errors="replace") as f:
+                sys.stderr.write(f.read())
+            raise
+
+        sampler = ProcessSampler(proc.pid)
+        has_metrics = http_get(port, "/metrics")[0] == 200
+        samples = {"rss": [], "ttl": []}
+        done = threading.Event()
+
+        def sample_loop():
+            while not done.wait(0.5):
+                rss = sampler.rss_mb()
+                if rss is not None:
+                    samples["rss"].append(rss)
+                if has_metrics:
+                    try:
+                        ttl = parse_metrics(http_get(port, "/metrics")[1].decode()).get("ainside_proof_ttl_remaining_seconds")
+                        if ttl is not None:
+                            samples["ttl"].append(ttl)
+                    except Exception:
+                        pass
+
+        path = "/status" if args.profile == "full" else f"/status?profile={args.profile}"
+        threading.Thread(target=sample_loop, daemon=True).start()
+        cpu0 = sampler.cpu_seconds()
+        t_start = time.perf_counter()
+        stats = asyncio.run(run_charts(args, port, path, signer))
+        wall = time.perf_counter() - t_start
+        cpu1 = sampler.cpu_seconds()
+        done.set()
+        metrics = parse_metrics(http_get(port, "/metrics")[1].decode()) if has_metrics else {}
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        stub.shutdown()
+        if log is not None:
+            log.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    lat = sorted(stats.latencies)
+    n = len(lat)
+    cpu = (cpu1 - cpu0) if (cpu0 is not None and cpu1 is not None) else None
+    result = {
+        "schema": 1,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "charts": {
+            "requests": n,
+            "throughput_rps": round(n / args.seconds, 1) if args.seconds else 0.0,
+            "expected_rps": round(args.charts * 1000.0 / args.tick_ms, 1),
+            "latency_ms": {
+                "p50": round(percentile(lat, 50) * 1000, 3),
+                "p99": round(percentile(lat, 99) * 1000, 3),
+                "p999": round(percentile(lat, 99.9) * 1000, 3),
+                "max": round((lat[-1] if lat else 0.0) * 1000, 3),
+                "mean": round((sum(lat) / n if n else 0.0) * 1000, 3),
+            },
+            "status": {str(k): v for k, v in sorted(stats.status.items())},
+            "reasons": stats.reasons,
+            "errors": stats.errors,
+            "late_ticks": stats.late_ticks,
+            "signatures_verified": stats.verified,
+            "bad_signatures": stats.bad_signatures,
+        },
+        "service": {
+            "cpu_seconds": round(cpu, 3) if cpu is not None else None,
+            "cpu_percent": round(cpu / wall * 100.0, 1) if cpu is not None and wall else None,
+            "rss_mb_peak": round(max(samples["rss"]), 1) if samples["rss"] else None,
+            "rss_mb_end": round(samples["rss"][-1], 1) if samples["rss"] else None,
+        },
+        "proof": {
+            "ttl_remaining_min_s": round(min(samples["ttl"]), 3) if samples["ttl"] else None,
+            "lifetime_s": args.proof_ttl_ms / 1000.0,
+        },
+        "upstream": stub.counts,
+        "service_metrics": {k: v for k, v in metrics.items() if k.startswith(("ainside_license_check_total", "ainside_license_check_errors_total", "ainside_on_demand_refresh_total", "ainside_poll_iterations_total"))},
+    }
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"[bench] resultados en {args.out}", flush=True)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(result, json.load(f))
+
+    # Los proofs servidos deben verificar: sin ninguno verificado, o con algo
+    # distinto de "ok" (firma inválida, sin proof, proof caducado), la prueba falla.
+    failures = []
+    if not stats.reasons:
+        failures.append("no se verificó ninguna firma")
+    other = {k: v for k, v in stats.reasons.items() if k != "ok"}
+    if other:
+        failures.append(f"razones distintas de ok: {other}")
+    if stats.bad_signatures:
+        failures.append(f"{stats.bad_signatures} firmas inválidas")
+    # verify() solo ve cada cuerpo nuevo; un proof que caduca mientras se sigue
+    # sirviendo aparece como TTL restante negativo en /metrics.
+    if samples["ttl"] and min(samples["ttl"]) < 0:
+        failures.append(f"se sirvió un proof caducado (TTL restante mínimo {min(samples['ttl']):.3f} s)")
+    for failure in failures:
+        print(f"[bench] FALLO: {failure}", flush=True)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,363 @@
+# Benchmark del servicio local de licencias (HWID.py --service)
+# Mide requests/seg de GET /status contra el handler real, sin upstream.
+#
+# Uso:
+#   python scripts/bench-license-service.py
+#   python scripts/bench-license-service.py --clients 16 --seconds 5 --etag
+#   python scripts/bench-license-service.py --keepalive     (reutiliza la conexión por cliente)
+#   python scripts/bench-license-service.py --engine asyncio --clients 500 --keepalive
+#   python scripts/bench-license-service.py --contention --clients 32  (lectores vs escritor, sin red)
+#   python scripts/bench-license-service.py --shm-stress --clients 4    (snapshot en memoria compartida)
+#   python scripts/bench-license-service.py --module old/HWID.py   (comparar contra otra versión)
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import http.client
+import importlib.util
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+
+def load_hwid_module(path: str):
+    spec = importlib.util.spec_from_file_location("ainside_hwid_bench", path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def sample_license(hwid: str):
+    """Payload/firma con la misma forma que devuelve license-check."""
+    now = int(time.time() * 1000)
+    payload = {
+        "allowed": True,
+        "reason": "ok",
+        "hwid": hwid,
+        "orderId": "BENCH-ORDER-0001",
+        "ts": now,
+        "exp": now + 60_000,
+        "nonce": "benchbenchbenchb",
+        "v": 1,
+    }
+    payload_json = json.dumps(payload, separators=(",", ":"))
+    signature = base64.urlsafe_b64encode(os.urandom(256)).decode("ascii").rstrip("=")
+    return payload, payload_json, signature, "RS256"
+
+
+def seed_state(mod, hwid: str):
+    payload, payload_json, signature, alg = sample_license(hwid)
+    state = mod.LICENSE_STATE
+    if hasattr(state, "publish"):
+        state.publish(hwid=hwid)
+    else:
+        with state.lock:
+            state.hwid = hwid
+    if hasattr(mod, "_publish_license_state"):
+        mod._publish_license_state(True, "ok", payload, payload_json, signature, alg)
+    else:
+        with state.lock:
+            state.allowed = True
+            state.reason = "ok"
+            state.payload = payload
+            state.payload_json = payload_json
+            state.signature = signature
+            state.alg = alg
+            state.last_check_ts = int(time.time())
+
+
+def client_worker(host, port, path, deadline, use_etag, keepalive, counts, idx):
+    ok = 0
+    not_modified = 0
+    errors = 0
+    etag = None
+    conn = None
+    latencies = []
+    while time.perf_counter() < deadline:
+        if conn is None:
+            conn = http.client.HTTPConnection(host, port, timeout=5)
+        t0 = time.perf_counter()
+        try:
+            headers = {}
+            if use_etag and etag:
+                headers["If-None-Match"] = etag
+            conn.request("GET", path, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            latencies.append(time.perf_counter() - t0)
+            if resp.status == 200:
+                ok += 1
+                etag = resp.getheader("ETag") or etag
+            elif resp.status == 304:
+                not_modified += 1
+            else:
+                errors += 1
+            if not keepalive or resp.will_close:
+                conn.close()
+                conn = None
+        except Exception:
+            errors += 1
+            conn.close()
+            conn = None
+    if conn is not None:
+        conn.close()
+    counts[idx] = (ok, not_modified, errors, latencies)
+
+
+def start_threaded_server(mod, keepalive: bool, max_connections: int):
+    if hasattr(mod, "_make_license_server"):
+        httpd = mod._make_license_server("127.0.0.1", 0, keep_alive=keepalive, max_connections=max_connections)
+    else:
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), mod.LocalLicenseHandler)
+        httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    host, port = httpd.server_address[:2]
+    return host, port, httpd.shutdown
+
+
+def start_asyncio_server(mod, keepalive: bool, max_connections: int):
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    engine = mod._AsyncLicenseServer(keep_alive=keepalive, max_connections=max_connections)
+    server = asyncio.run_coroutine_threadsafe(engine.start("127.0.0.1", 0), loop).result()
+    host, port = server.sockets[0].getsockname()[:2]
+
+    async def shutdown():
+        # Clients already closed their sockets; let the handlers see EOF and exit.
+        server.close()
+        for _ in range(50):
+            if not engine.active:
+                break
+            await asyncio.sleep(0.02)
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+    return host, port, stop
+
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+    except Exception:
+        return None
+
+
+def run_contention(args) -> dict:
+    """Lectores concurrentes de /status (sin red) mientras un escritor publica
+    estados nuevos sin pausa: mide cuánto bloquea el estado compartido."""
+    mod = load_hwid_module(args.module)
+    seed_state(mod, "123456789012")
+    route = mod._route_local_request
+    stop = threading.Event()
+    reads = [0] * args.clients
+    writes = [0]
+
+    def reader(idx):
+        n = 0
+        while not stop.is_set():
+            route("/status")
+            n += 1
+        reads[idx] = n
+
+    def writer():
+        while not stop.is_set():
+            payload, payload_json, signature, alg = sample_license("123456789012")
+            mod._publish_license_state(True, "ok", payload, payload_json, signature, alg)
+            writes[0] += 1
+            if args.write_interval_ms:
+                time.sleep(args.write_interval_ms / 1000.0)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.clients)]
+    threads.append(threading.Thread(target=writer))
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "module": os.path.abspath(args.module),
+        "mode": "contention",
+        "readers": args.clients,
+        "seconds": round(elapsed, 3),
+        "reads_per_sec": round(sum(reads) / elapsed, 1),
+        "writes_per_sec": round(writes[0] / elapsed, 1),
+    }
+
+
+def _shm_signature(payload_json: bytes) -> bytes:
+    # Firma falsa pero determinista: permite detectar lecturas "rotas" que
+    # mezclan el payload de una publicación con la firma de otra.
+    return hashlib.sha256(payload_json).digest() * 8
+
+
+def shm_reader_proc(module_path, shm_path, seconds, out_queue):
+    mod = load_hwid_module(module_path)
+    reader = mod.SharedSnapshotReader(shm_path)
+    reads = torn = misses = 0
+    last_seq = -1
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        try:
+            got = reader.read()
+        except ValueError:
+            torn += 1  # frame ilegible: escritura a medias
+            continue
+        if got is None:
+            misses += 1
+            continue
+        seq, frame = got
+        reads += 1
+        ok = seq >= last_seq and frame["alg"] == "RS256"
+        if ok:
+            try:
+                json.loads(frame["payloadJson"])
+                ok = frame["signature"] == _shm_signature(frame["payloadJson"])
+            except Exception:
+                ok = False
+        if not ok:
+            torn += 1
+        last_seq = seq
+    reader.close()
+    out_queue.put((reads, torn, misses, last_seq))
+
+
+def run_shm_stress(args) -> dict:
+    """Un escritor publica sin pausa (como poll_loop) tamaños variables y N
+    procesos lectores verifican que nunca ven una escritura a medias."""
+    mod = load_hwid_module(args.module)
+    workdir = tempfile.mkdtemp(prefix="ainside-shm-")
+    shm_path = os.path.join(workdir, "license_snapshot.bin")
+    mod._attach_shared_snapshot(shm_path)
+    mod.LICENSE_STATE.publish(hwid="123456789012")
+
+    stop = threading.Event()
+    writes = [0]
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            payload = {"allowed": True, "reason": "ok", "hwid": "123456789012", "ts": i, "exp": i + 60_000,
+                       "pad": "x" * (i % 700), "v": 1}
+            payload_json = json.dumps(payload, separators=(",", ":"))
+            sig = base64.urlsafe_b64encode(_shm_signature(payload_json.encode("utf-8"))).decode("ascii").rstrip("=")
+            mod._publish_license_state(True, "ok", payload, payload_json, sig, "RS256")
+            writes[0] += 1
+
+    queue = multiprocessing.Queue()
+    readers = [multiprocessing.Process(target=shm_reader_proc, args=(args.module, shm_path, args.seconds, queue))
+               for _ in range(args.clients)]
+    w = threading.Thread(target=writer)
+    w.start()
+    for p in readers:
+        p.start()
+    results = [queue.get(timeout=args.seconds + 30) for _ in readers]
+    for p in readers:
+        p.join()
+    stop.set()
+    w.join()
+    shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "module": os.path.abspath(args.module),
+        "mode": "shm-stress",
+        "reader_processes": args.clients,
+        "seconds": args.seconds,
+        "publishes": writes[0],
+        "reads": sum(r[0] for r in results),
+        "reads_per_sec": round(sum(r[0] for r in results) / args.seconds, 1),
+        "retries_exhausted": sum(r[2] for r in results),
+        "errors": sum(r[1] for r in results),  # lecturas rotas: debe ser 0
+    }
+
+
+def run(args) -> dict:
+    mod = load_hwid_module(args.module)
+    seed_state(mod, "123456789012")
+
+    max_connections = max(64, args.clients)
+    if args.engine == "asyncio":
+        host, port, stop = start_asyncio_server(mod, args.keepalive, max_connections)
+    else:
+        host, port, stop = start_threaded_server(mod, args.keepalive, max_connections)
+
+    counts = [None] * args.clients
+    deadline = time.perf_counter() + args.seconds
+    started = time.perf_counter()
+    workers = [
+        threading.Thread(target=client_worker, args=(host, port, args.path, deadline, args.etag, args.keepalive, counts, i))
+        for i in range(args.clients)
+    ]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+    stop()
+
+    ok = sum(c[0] for c in counts)
+    not_modified = sum(c[1] for c in counts)
+    errors = sum(c[2] for c in counts)
+    latencies = sorted(x for c in counts for x in c[3])
+    return {
+        "module": os.path.abspath(args.module),
+        "path": args.path,
+        "engine": args.engine,
+        "clients": args.clients,
+        "keepalive": args.keepalive,
+        "seconds": round(elapsed, 3),
+        "ok_200": ok,
+        "not_modified_304": not_modified,
+        "errors": errors,
+        "requests_per_sec": round((ok + not_modified) / elapsed, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round((latencies[-1] if latencies else 0.0) * 1000, 3),
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Benchmark de GET /status del servicio local de licencias")
+    parser.add_argument("--module", default=os.path.join(script_dir, "HWID.py"), help="Ruta a HWID.py a medir")
+    parser.add_argument("--clients", type=int, default=8, help="Clientes concurrentes (charts simulados)")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duración de la medición")
+    parser.add_argument("--path", default="/status", help="Endpoint a medir")
+    parser.add_argument("--etag", action="store_true", help="Reenviar If-None-Match con el último ETag")
+    parser.add_argument("--keepalive", action="store_true", help="Reutilizar una conexión HTTP/1.1 por cliente")
+    parser.add_argument("--engine", choices=["threads", "asyncio"], default="threads", help="Motor del servidor a medir")
+    parser.add_argument("--contention", action="store_true", help="Sin red: N lectores de /status contra un escritor continuo")
+    parser.add_argument("--shm-stress", action="store_true", help="Procesos lectores del snapshot mmap contra un escritor continuo")
+    parser.add_argument("--write-interval-ms", type=float, default=0.0, help="Pausa del escritor en --contention")
+    args = parser.parse_args()
+
+    if args.shm_stress:
+        result = run_shm_stress(args)
+    elif args.contention:
+        result = run_contention(args)
+    else:
+        result = run(args)
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result.get("errors", 0) == 0 else 1)
@@ -0,0 +1,172 @@
+# Pipeline de assets de la GUI de HWID.py (sustituye a create-icon.py y convert-logo-to-ico.py)
+# Requiere: pip install pillow   (solo para compilar los assets; HWID.py ya no usa Pillow)
+#
+# A partir de las imágenes maestras de public/brand/ genera en scripts/assets/
+# (el directorio que lee resource_path, y que build-hwid-exe.py empaqueta):
+#   icon_<N>.png      iconos cuadrados 16..512 (logo centrado, sin deformar)
+#   app_icon.ico      icono de Windows con 16, 24, 32, 48, 64, 128 y 256
+#   logo_<tema>_w<ancho>@<escala>x.png
+#                     logo recoloreado por tema (white para Dark, dark para
+#                     Light) en cada ancho de LOGO_WIDTHS y cada escala de DPI
+#                     (1x, 1.5x, 2x). HWID.py elige la variante según el DPI y
+#                     la carga con tk.PhotoImage: sin LANCZOS ni recoloreado al arrancar.
+#
+# Cada salida se genera en paralelo y se guarda en scripts/assets/.asset-cache.json
+# con el hash de su receta (imagen maestra + parámetros + versión de Pillow); si
+# nada cambió y el archivo sigue intacto, no se regenera.
+#
+# Uso:
+#   python scripts/build-assets.py
+#   python scripts/build-assets.py --force      (regenerar todo)
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MASTER_ICON = os.path.join("public", "brand", "logo-master.png")
+MASTER_LOGO = os.path.join("public", "brand", "logo-mono-white.png")  # la máscara alfa define la forma
+ASSETS_DIR = os.path.join("scripts", "assets")
+CACHE_FILE = os.path.join(ASSETS_DIR, ".asset-cache.json")
+
+ICON_SIZES = (16, 24, 32, 48, 64, 128, 256, 512)
+ICO_SIZES = (16, 24, 32, 48, 64, 128, 256)
+# Debe coincidir con los anchos que pide la GUI (generate_theme_logo / load_logo)
+LOGO_WIDTHS = (300,)
+THEME_COLORS = {"white": (255, 255, 255), "dark": (17, 17, 17)}
+SCALES = (1, 1.5, 2)
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path: str):
+    try:
+        with open(path, "rb") as f:
+            return sha256_bytes(f.read())
+    except OSError:
+        return None
+
+
+def recipes() -> dict:
+    """{nombre de salida: receta}; la receta es JSON serializable y forma parte de la clave."""
+    out = {}
+    for size in ICON_SIZES:
+        out[f"icon_{size}.png"] = {"kind": "icon", "master": MASTER_ICON, "size": size}
+    out["app_icon.ico"] = {"kind": "ico", "master": MASTER_ICON, "sizes": list(ICO_SIZES)}
+    for theme, rgb in THEME_COLORS.items():
+        for width in LOGO_WIDTHS:
+            for scale in SCALES:
+                out[f"logo_{theme}_w{width}@{scale:g}x.png"] = {
+                    "kind": "logo", "master": MASTER_LOGO, "color": list(rgb), "width": round(width * scale),
+                }
+    return out
+
+
+def square_icon(master, size: int):
+    from PIL import Image
+    img = master.crop(master.getbbox() or (0, 0) + master.size)
+    side = max(img.size)
+    canvas = Image.new("RGBA", (side, side), (0, 0, 0, 0))
+    canvas.paste(img, ((side - img.width) // 2, (side - img.height) // 2))
+    return canvas.resize((size, size), Image.LANCZOS, reducing_gap=3.0)
+
+
+def render(recipe: dict, master) -> bytes:
+    from PIL import Image
+    buf = io.BytesIO()
+    if recipe["kind"] == "icon":
+        square_icon(master, recipe["size"]).save(buf, format="PNG", optimize=True)
+    elif recipe["kind"] == "ico":
+        # Cada tamaño se reduce por separado desde la maestra (mejor que dejar que ICO escale uno solo)
+        frames = [square_icon(master, s) for s in recipe["sizes"]]
+        frames[-1].save(buf, format="ICO", sizes=[(s, s) for s in recipe["sizes"]], append_images=frames[:-1])
+    else:
+        w, h = master.size
+        width = min(recipe["width"], w)
+        img = master.resize((width, max(1, round(h * width / w))), Image.LANCZOS, reducing_gap=3.0)
+        color = Image.new("RGBA", img.size, tuple(recipe["color"]) + (255,))
+        color.putalpha(img.getchannel("A"))
+        color.save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera los iconos y logos de HWID.py en scripts/assets/")
+    parser.add_argument("--force", action="store_true", help="Ignorar la cache y regenerar todo")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 4)
+    args = parser.parse_args()
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    try:
+        import PIL
+        from PIL import Image
+    except ImportError:
+        print("[ERROR] Pillow no está instalado")
+        print("\nInstalar con:")
+        print("  pip install pillow")
+        return 1
+
+    t0 = time.perf_counter()
+    todo = recipes()
+    masters = {}
+    for path in sorted({r["master"] for r in todo.values()}):
+        if not os.path.exists(path):
+            print(f"[ERROR] No se encuentra: {path}")
+            return 1
+        with open(path, "rb") as f:
+            data = f.read()
+        masters[path] = (sha256_bytes(data), Image.open(io.BytesIO(data)).convert("RGBA"))
+
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    keys, pending = {}, []
+    for name, recipe in todo.items():
+        keys[name] = sha256_bytes(json.dumps({"recipe": recipe, "master": masters[recipe["master"]][0],
+                                              "pillow": PIL.__version__}, sort_keys=True).encode("utf-8"))
+        entry = cache.get(name) or {}
+        if args.force or entry.get("key") != keys[name] or entry.get("sha256") != sha256_file(os.path.join(ASSETS_DIR, name)):
+            pending.append(name)
+
+    def build(name):
+        recipe = todo[name]
+        data = render(recipe, masters[recipe["master"]][1])
+        path = os.path.join(ASSETS_DIR, name)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        return name, sha256_bytes(data)
+
+    os.makedirs(ASSETS_DIR, exist_ok=True)
+    # Pillow libera el GIL al redimensionar y comprimir: los hilos bastan
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        for name, digest in pool.map(build, pending):
+            cache[name] = {"key": keys[name], "sha256": digest}
+
+    # Salidas que ya no están en las recetas (p. ej. un ancho retirado)
+    for name in sorted(set(cache) - set(todo)):
+        cache.pop(name)
+        try:
+            os.remove(os.path.join(ASSETS_DIR, name))
+        except OSError:
+            pass
+    with open(CACHE_FILE, "w", encoding="utf-8", newline="\n") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    print(f"[assets] {len(todo)} salidas: {len(pending)} generadas, {len(todo) - len(pending)} en cache "
+          f"({time.perf_counter() - t0:.2f} s) → {ASSETS_DIR}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
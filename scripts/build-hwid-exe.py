@@ -1,92 +1,500 @@
 # Script para convertir HWID.py a ejecutable .exe
 # Requiere: pip install pyinstaller
+#
+# Targets:
+#   gui      → dist/HWID.exe: un solo archivo con GUI (Tk, ttkbootstrap, Pillow).
+#   service  → dist/HWID-service/HWID-service.exe: servicio de licencias sin GUI.
+#              onedir (no se descomprime en %TEMP% en cada arranque), sin
+#              Tk/Pillow/ttkbootstrap/requests y sin UPX (sin descompresión al cargar).
+#
+# Este script es la única fuente de la configuración de PyInstaller: el .spec
+# de cada target se genera en build/spec/ (ya no hay un HWID.spec mantenido a mano).
+#
+# Cache de compilación (build/hwid-build-cache.json): cada target tiene una clave
+# con el hash de scripts/HWID.py, scripts/assets/, el icono, license-public.pem,
+# el .spec generado y las versiones de Python y PyInstaller.
+#   - Clave igual y artefacto intacto → HIT: no se compila.
+#   - Cambió el código, los assets o el .spec → MISS incremental: se compila sin
+#     --clean y PyInstaller reutiliza el análisis de build/<target>/.
+#   - Cambió Python/PyInstaller/plataforma (o --clean) → MISS limpio.
+#
+# Versión: se graba en build/build_version.txt y va dentro de cada exe; HWID.py
+# la usa como mínimo al auto-actualizarse (nunca instala una versión anterior
+# a la propia). Por defecto es la fecha del último commit, igual que en
+# package-release.py; si se pasa --version a uno, hay que pasar la misma al otro.
+#
+# Después de compilar mide cada target: tamaño, arranque en frío de
+# `--service` hasta que /health responde y RSS en reposo. El informe se
+# guarda en dist/build-report.json.
+#
+# Uso:
+#   python scripts/build-hwid-exe.py                      (target gui, como antes)
+#   python scripts/build-hwid-exe.py --target service
+#   python scripts/build-hwid-exe.py --target all
+#   python scripts/build-hwid-exe.py --target all --version 20260113-0738
+#   python scripts/build-hwid-exe.py --target all --clean         (ignorar la cache y compilar desde cero)
+#   python scripts/build-hwid-exe.py --target all --report-only   (solo medir lo ya compilado)
 
-import subprocess
+import argparse
+import hashlib
+import http.client
+import json
 import os
+import platform
+import shutil
+import socket
+import subprocess
 import sys
+import tempfile
+import time
 
-def build_exe():
-    print("=" * 60)
-    print("CREANDO EJECUTABLE HWID.exe")
-    print("=" * 60)
-    
-    # Verificar que existe HWID.py
-    if not os.path.exists("scripts/HWID.py"):
-        print("\n[ERROR] No se encuentra scripts/HWID.py")
+EXE_SUFFIX = ".exe" if os.name == "nt" else ""
+SOURCE = "scripts/HWID.py"
+ASSETS_DIR = "scripts/assets"  # generado por scripts/build-assets.py
+ICON = os.path.join(ASSETS_DIR, "app_icon.ico")
+PUBLIC_KEY = "license-public.pem"  # verifica los manifiestos de auto-actualización
+VERSION_FILE = os.path.join("build", "build_version.txt")  # HWID.py: BUILD_VERSION_FILE
+SPEC_DIR = os.path.join("build", "spec")
+CACHE_FILE = os.path.join("build", "hwid-build-cache.json")
+# Entradas de la clave que invalidan el directorio de trabajo de PyInstaller (→ --clean)
+TOOLCHAIN_INPUTS = ("python", "pyinstaller", "platform")
+
+# Módulos que el servicio no usa nunca (HWID.py los importa solo en modo GUI).
+# requests es opcional: sin él, el servicio usa su pool de http.client.
+SERVICE_EXCLUDES = [
+    "tkinter", "_tkinter", "ttkbootstrap", "PIL", "pyperclip", "webbrowser",
+    "requests", "urllib3", "charset_normalizer", "chardet", "idna", "certifi",
+    "unittest", "pydoc", "doctest",
+]
+
+TARGETS = {
+    "gui": {
+        "name": "HWID",
+        "args": ["--onefile"],  # Un solo archivo .exe
+        "excludes": [],
+        "assets": True,  # iconos y logos para la GUI
+        "artifact": os.path.join("dist", "HWID" + EXE_SUFFIX),
+    },
+    "service": {
+        "name": "HWID-service",
+        # --strip solo fuera de Windows: allí PyInstaller no lo recomienda para las DLL
+        "args": ["--onedir", "--noupx"] + (["--strip"] if os.name != "nt" else []),
+        "excludes": SERVICE_EXCLUDES,
+        "artifact": os.path.join("dist", "HWID-service", "HWID-service" + EXE_SUFFIX),
+    },
+}
+
+
+def makespec_cmd(target: str) -> list:
+    spec = TARGETS[target]
+    cmd = [sys.executable, "-m", "PyInstaller.utils.cliutils.makespec",
+           f"--name={spec['name']}", "--console", f"--specpath={SPEC_DIR}"] + spec["args"]
+    if os.path.exists(ICON):
+        # Ruta absoluta: PyInstaller resuelve las relativas desde el directorio del .spec
+        cmd.append(f"--icon={os.path.abspath(ICON)}")  # Icono AInside
+    if os.path.exists(PUBLIC_KEY):
+        cmd.append(f"--add-data={os.path.abspath(PUBLIC_KEY)}{os.pathsep}.")
+    cmd.append(f"--add-data={os.path.abspath(VERSION_FILE)}{os.pathsep}.")
+    if spec.get("assets") and os.path.isdir(ASSETS_DIR):
+        cmd.append(f"--add-data={os.path.abspath(ASSETS_DIR)}{os.pathsep}assets")  # resource_path()
+    for mod in spec["excludes"]:
+        cmd += ["--exclude-module", mod]
+    cmd.append(SOURCE)
+    return cmd
+
+
+def spec_path(target: str) -> str:
+    return os.path.join(SPEC_DIR, TARGETS[target]["name"] + ".spec")
+
+
+def pyinstaller_cmd(target: str, clean: bool) -> list:
+    cmd = [sys.executable, "-m", "PyInstaller", spec_path(target), "--noconfirm",
+           "--workpath", os.path.join("build", target), "--distpath", "dist"]
+    if clean:
+        cmd.append("--clean")
+    return cmd
+
+
+def write_spec(target: str) -> bool:
+    try:
+        subprocess.run(makespec_cmd(target), check=True, capture_output=True, text=True)
+    except subprocess.CalledProcessError as e:
+        print(f"\n[ERROR] No se pudo generar el .spec de {target}:")
+        print(e.stderr)
         return False
-    
-    # Comando PyInstaller
-    cmd = [
-        "pyinstaller",
-        "--onefile",                    # Un solo archivo .exe
-        "--name=HWID",                  # Nombre del ejecutable
-        "--console",                    # Ventana de consola
-        "--icon=dist/ainside-icon.ico", # Icono AInside
-        "--clean",                      # Limpiar cache
-        "--noconfirm",                  # No pedir confirmación
-        "scripts/HWID.py"
-    ]
-    
-    print("\n[1/3] Compilando con PyInstaller...")
+    return True
+
+
+def build_target(target: str, clean: bool) -> bool:
+    cmd = pyinstaller_cmd(target, clean)
+    print(f"\n[build:{target}] Compilando con PyInstaller ({'limpio' if clean else 'incremental'})...")
     print(f"Comando: {' '.join(cmd)}\n")
-    
     try:
         result = subprocess.run(cmd, check=True, capture_output=True, text=True)
         print(result.stdout)
-        
-        print("\n[2/3] Verificando ejecutable...")
-        exe_path = "dist/HWID.exe"
-        
-        if os.path.exists(exe_path):
-            size_mb = os.path.getsize(exe_path) / (1024 * 1024)
-            print(f"✓ HWID.exe creado correctamente")
-            print(f"  Tamaño: {size_mb:.2f} MB")
-            print(f"  Ubicación: {os.path.abspath(exe_path)}")
-            
-            print("\n" + "=" * 60)
-            print("¡EXITO! Ejecutable creado")
-            print("=" * 60)
-            print("\nUSO:")
-            print("  HWID.exe                 → Muestra el HWID del PC")
-            print("  HWID.exe --service       → Inicia servicio en localhost:8787")
-            print("\nDISTRIBUCION:")
-            print("  - Incluir HWID.exe en el paquete ZIP")
-            print("  - Ya NO necesita Python instalado")
-            print("  - Funciona en cualquier Windows")
-            print("  - Incluye la clave pública dentro del .exe")
-            
-            return True
-        else:
-            print("\n[ERROR] No se generó el ejecutable")
-            return False
-            
     except subprocess.CalledProcessError as e:
-        print(f"\n[ERROR] Falló la compilación:")
+        print(f"\n[ERROR] Falló la compilación de {target}:")
         print(e.stderr)
         return False
-    except Exception as e:
-        print(f"\n[ERROR] {str(e)}")
+    if not os.path.exists(TARGETS[target]["artifact"]):
+        print(f"\n[ERROR] No se generó {TARGETS[target]['artifact']}")
         return False
+    print(f"✓ {TARGETS[target]['artifact']} creado correctamente")
+    return True
 
-if __name__ == "__main__":
-    # Verificar PyInstaller
+
+# --------- Cache de compilación ---------
+def sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def sha256_tree(path: str):
+    """Hash de un directorio (rutas relativas + contenido), o None si no existe."""
+    if not os.path.isdir(path):
+        return None
+    h = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            h.update(os.path.relpath(full, path).replace(os.sep, "/").encode("utf-8") + b"\0")
+            h.update(sha256_file(full).encode("ascii"))
+    return h.hexdigest()
+
+
+def cache_inputs(target: str) -> dict:
+    import PyInstaller
+    return {
+        "source": sha256_file(SOURCE),
+        "assets": sha256_tree(ASSETS_DIR),
+        "icon": sha256_file(ICON) if os.path.exists(ICON) else None,
+        "public_key": sha256_file(PUBLIC_KEY) if os.path.exists(PUBLIC_KEY) else None,
+        "version": read_version(),
+        "spec": sha256_file(spec_path(target)),
+        "python": f"{platform.python_implementation()} {platform.python_version()}",
+        "pyinstaller": PyInstaller.__version__,
+        "platform": f"{sys.platform}-{platform.machine()}",
+    }
+
+
+def default_version() -> str:
+    """Fecha del último commit (o SOURCE_DATE_EPOCH), como en package-release.py."""
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if not epoch:
+        try:
+            epoch = subprocess.run(["git", "log", "-1", "--format=%ct"], capture_output=True, text=True,
+                                   check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            epoch = None
+    try:
+        return time.strftime("%Y%m%d-%H%M", time.gmtime(int(epoch)))
+    except (TypeError, ValueError):
+        return time.strftime("%Y%m%d-%H%M", time.gmtime())
+
+
+def write_version(version: str):
+    os.makedirs(os.path.dirname(VERSION_FILE), exist_ok=True)
+    with open(VERSION_FILE, "w", encoding="ascii", newline="\n") as f:
+        f.write(version + "\n")
+
+
+def read_version():
     try:
-        import PyInstaller
+        with open(VERSION_FILE, "r", encoding="ascii") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cache_key(inputs: dict) -> str:
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def artifact_fingerprint(target: str):
+    path = TARGETS[target]["artifact"]
+    if not os.path.exists(path):
+        return None
+    return sha256_tree(os.path.dirname(path)) if target == "service" else sha256_file(path)
+
+
+def load_cache() -> dict:
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache: dict):
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    tmp = CACHE_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp, CACHE_FILE)
+
+
+def cache_decision(entry, inputs: dict, target: str, force_clean: bool):
+    """(estado, motivo, clean): estado es "hit", "incremental" o "clean"."""
+    if force_clean:
+        return "clean", "--clean", True
+    if not entry:
+        return "clean", "sin entrada en la cache", True
+    old = entry.get("inputs") or {}
+    changed = [k for k in inputs if old.get(k) != inputs[k]]
+    toolchain = [k for k in changed if k in TOOLCHAIN_INPUTS]
+    if toolchain:
+        return "clean", "cambió " + ", ".join(f"{k} ({old.get(k)} → {inputs[k]})" for k in toolchain), True
+    if changed:
+        return "incremental", "cambió " + ", ".join(changed), False
+    fingerprint = artifact_fingerprint(target)
+    if fingerprint is None:
+        return "incremental", "falta el artefacto", False
+    if fingerprint != entry.get("artifact"):
+        return "incremental", "el artefacto se modificó tras compilar", False
+    return "hit", "sin cambios", False
+
+
+# --------- Medición ---------
+def artifact_size_mb(target: str) -> float:
+    path = TARGETS[target]["artifact"]
+    if target == "service":
+        total = 0
+        for root, _, files in os.walk(os.path.dirname(path)):
+            total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+        return total / (1024 * 1024)
+    return os.path.getsize(path) / (1024 * 1024)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def tree_rss_mb(pid: int):
+    """RSS del proceso y sus hijos (onefile = bootloader + proceso real)."""
+    try:
+        import psutil  # type: ignore
+        proc = psutil.Process(pid)
+        procs = [proc] + proc.children(recursive=True)
+        return sum(p.memory_info().rss for p in procs) / (1024 * 1024)
     except ImportError:
-        print("[ERROR] PyInstaller no está instalado")
-        print("\nInstalar con:")
-        print("  pip install pyinstaller")
-        sys.exit(1)
-    
+        pass
+    except Exception:
+        return None
+    if os.name == "nt":
+        ps = ("Get-CimInstance Win32_Process | Where-Object { $_.ProcessId -eq %d -or $_.ParentProcessId -eq %d } "
+              "| Measure-Object WorkingSetSize -Sum | ForEach-Object { $_.Sum }") % (pid, pid)
+        try:
+            out = subprocess.run(["powershell", "-NoProfile", "-Command", ps], capture_output=True, text=True, timeout=30)
+            return int(out.stdout.strip() or 0) / (1024 * 1024)
+        except Exception:
+            return None
+    pids = {pid}
+    try:
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    with open(f"/proc/{entry}/stat") as f:
+                        if int(f.read().rsplit(")", 1)[1].split()[1]) == pid:
+                            pids.add(int(entry))
+                except OSError:
+                    continue
+        total_kb = 0
+        for p in pids:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+        return total_kb / 1024.0
+    except OSError:
+        return None
+
+
+def stop_tree(proc: subprocess.Popen):
+    if os.name == "nt":
+        # taskkill /T también cierra el proceso hijo que crea el bootloader onefile
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(proc.pid)], capture_output=True)
+    else:
+        proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def measure_service_start(exe: str, idle_seconds: float):
+    """(ms hasta que /health responde, RSS en reposo en MB) de `exe --service`."""
+    workdir = tempfile.mkdtemp(prefix="ainside-build-")
+    port = free_port()
+    env = dict(os.environ, HOME=workdir, USERPROFILE=workdir,
+               # Sin red: el servicio no debe llamar al license-check real durante la medición.
+               AINSIDE_FUNCTIONS_BASE="http://127.0.0.1:9/functions/v1")
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([os.path.abspath(exe), "--service", f"--port={port}", "--no-shm"],
+                            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = t0 + 60
+        start_ms = None
+        while time.perf_counter() < deadline and proc.poll() is None:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                conn.request("GET", "/health")
+                if conn.getresponse().status == 200:
+                    start_ms = (time.perf_counter() - t0) * 1000.0
+                    break
+            except OSError:
+                time.sleep(0.01)
+        if start_ms is None:
+            return None, None
+        time.sleep(idle_seconds)
+        return start_ms, tree_rss_mb(proc.pid)
+    finally:
+        stop_tree(proc)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def report(targets, runs: int, idle_seconds: float) -> dict:
+    results = {}
+    for target in targets:
+        exe = TARGETS[target]["artifact"]
+        if not os.path.exists(exe):
+            print(f"[WARN] {exe} no existe; se omite {target}")
+            continue
+        starts, rss = [], []
+        for _ in range(max(1, runs)):
+            start_ms, rss_mb = measure_service_start(exe, idle_seconds)
+            if start_ms is not None:
+                starts.append(start_ms)
+            if rss_mb is not None:
+                rss.append(rss_mb)
+        ordered = sorted(starts)
+        results[target] = {
+            "artifact": exe,
+            "size_mb": round(artifact_size_mb(target), 2),
+            "cold_start_ms": round(starts[0], 1) if starts else None,   # primera ejecución tras compilar
+            "start_ms_median": round(ordered[len(ordered) // 2], 1) if starts else None,
+            "idle_rss_mb": round(max(rss), 1) if rss else None,
+            "runs": len(starts),
+        }
+
+    print("\n" + "=" * 60)
+    print(f"{'target':<10}{'tamaño MB':>12}{'arranque ms':>14}{'mediana ms':>13}{'RSS MB':>10}")
+    for target, r in results.items():
+        fmt = lambda v: "-" if v is None else f"{v}"
+        print(f"{target:<10}{fmt(r['size_mb']):>12}{fmt(r['cold_start_ms']):>14}{fmt(r['start_ms_median']):>13}{fmt(r['idle_rss_mb']):>10}")
+    print("=" * 60)
+    os.makedirs("dist", exist_ok=True)
+    with open(os.path.join("dist", "build-report.json"), "w", encoding="utf-8") as f:
+        json.dump({"timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "targets": results}, f, indent=2)
+    print("Informe guardado en dist/build-report.json")
+    return results
+
+
+def build_exe(targets, version: str, force_clean: bool = False) -> bool:
+    print("=" * 60)
+    print("CREANDO EJECUTABLES: " + ", ".join(TARGETS[t]["name"] + EXE_SUFFIX for t in targets))
+    print("=" * 60)
+
+    # Verificar que existe HWID.py
+    if not os.path.exists(SOURCE):
+        print("\n[ERROR] No se encuentra scripts/HWID.py")
+        return False
+
+    if any(TARGETS[t].get("assets") for t in targets):
+        # Con cache propia: si nada cambió no regenera nada
+        if subprocess.run([sys.executable, os.path.join("scripts", "build-assets.py")]).returncode != 0:
+            print(f"[WARN] No se pudieron generar los assets; se usa lo que haya en {ASSETS_DIR}")
+
+    write_version(version)
+    print(f"\nVersión grabada en los exe: {version}")
+    cache = load_cache()
+    summary = []
+    for target in targets:
+        started = time.perf_counter()
+        if not write_spec(target):
+            return False
+        inputs = cache_inputs(target)
+        key = cache_key(inputs)
+        status, reason, clean = cache_decision(cache.get(target), inputs, target, force_clean)
+        print(f"\n[cache:{target}] {'HIT ' if status == 'hit' else 'MISS'} clave={key[:12]} ({reason})")
+        if status != "hit":
+            cache.pop(target, None)
+            save_cache(cache)  # una compilación fallida no debe dejar una entrada válida
+            if not build_target(target, clean):
+                return False
+            cache[target] = {
+                "key": key,
+                "inputs": inputs,
+                "artifact": artifact_fingerprint(target),
+                "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }
+            save_cache(cache)
+        summary.append((target, status, reason, time.perf_counter() - started))
+
+    print("\n" + "=" * 60)
+    print("CACHE DE COMPILACION")
+    for target, status, reason, seconds in summary:
+        label = {"hit": "HIT (omitido)", "incremental": "MISS incremental", "clean": "MISS limpio"}[status]
+        print(f"  {target:<10}{label:<20}{seconds:7.1f} s  {reason}")
+
+    print("\n" + "=" * 60)
+    print("¡EXITO! Ejecutable creado")
+    print("=" * 60)
+    print("\nUSO:")
+    if "gui" in targets:
+        print("  HWID.exe                 → Muestra el HWID del PC")
+        print("  HWID.exe --service       → Inicia servicio en localhost:8787")
+    if "service" in targets:
+        print("  HWID-service\\HWID-service.exe --service   → Servicio sin GUI (arranque rápido)")
+    print("\nDISTRIBUCION:")
+    print("  - Incluir HWID.exe en el paquete ZIP")
+    if "service" in targets:
+        print("  - Para la tarea de inicio, usar la carpeta HWID-service completa")
+    print("  - Ya NO necesita Python instalado")
+    print("  - Funciona en cualquier Windows")
+    print("  - Incluye la clave pública dentro del .exe")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compila HWID.py con PyInstaller")
+    parser.add_argument("--target", choices=["gui", "service", "all"], default="gui")
+    parser.add_argument("--report-only", action="store_true", help="No compilar; solo medir los artefactos existentes")
+    parser.add_argument("--clean", action="store_true", help="Ignorar la cache y compilar desde cero")
+    parser.add_argument("--version", help="Versión grabada en los exe (por defecto la fecha del último commit)")
+    parser.add_argument("--no-report", action="store_true", help="No medir tras compilar")
+    parser.add_argument("--runs", type=int, default=3, help="Arranques medidos por target")
+    parser.add_argument("--idle-seconds", type=float, default=3.0, help="Espera antes de medir el RSS en reposo")
+    args = parser.parse_args()
+    targets = ["gui", "service"] if args.target == "all" else [args.target]
+
     # Cambiar al directorio del proyecto
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_dir = os.path.dirname(script_dir)
     os.chdir(project_dir)
-    
-    # Compilar
-    if build_exe():
-        print("\n[OK] Proceso completado")
-        sys.exit(0)
-    else:
-        print("\n[ERROR] Proceso fallido")
-        sys.exit(1)
+
+    if not args.report_only:
+        # Verificar PyInstaller
+        try:
+            import PyInstaller  # noqa: F401
+        except ImportError:
+            print("[ERROR] PyInstaller no está instalado")
+            print("\nInstalar con:")
+            print("  pip install pyinstaller")
+            sys.exit(1)
+
+        # Compilar
+        if not build_exe(targets, args.version or default_version(), args.clean):
+            print("\n[ERROR] Proceso fallido")
+            sys.exit(1)
+
+    if not args.no_report:
+        report(targets, args.runs, args.idle_seconds)
+    print("\n[OK] Proceso completado")
+    sys.exit(0)
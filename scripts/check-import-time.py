@@ -0,0 +1,130 @@
+# Presupuesto de arranque de los modos sin GUI de HWID.py (-X importtime)
+# Ejecuta HWID.py --cli y HWID.py --service con `python -X importtime`, suma
+# el tiempo de import acumulado de los módulos de primer nivel y falla
+# (exit 1) si:
+#   - algún modo importa un módulo de GUI/opcional que no necesita
+#     (tkinter, ttkbootstrap, PIL, pyperclip, webbrowser; requests y asyncio
+#     tampoco deben cargarse al arrancar), o
+#   - el tiempo total supera el presupuesto del modo.
+# Se toma el mínimo de --repeat ejecuciones para no medir ruido del sistema.
+#
+# Uso:
+#   python scripts/check-import-time.py
+#   python scripts/check-import-time.py --repeat 9 --budget-cli-ms 80 --budget-service-ms 100
+#   python scripts/check-import-time.py --module old/HWID.py     (comparar contra otra versión)
+
+import argparse
+import http.client
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+FORBIDDEN = {
+    "cli": {"tkinter", "_tkinter", "ttkbootstrap", "PIL", "pyperclip", "webbrowser", "requests", "asyncio"},
+    "service": {"tkinter", "_tkinter", "ttkbootstrap", "PIL", "pyperclip", "webbrowser", "requests", "asyncio"},
+}
+
+
+def parse_importtime(text: str):
+    """[(self_us, cumulative_us, nombre, nivel)] de la salida de -X importtime."""
+    rows = []
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cum_us, name = line.split(":", 1)[1].split("|")
+            stripped = name.rstrip()
+            level = (len(stripped) - len(stripped.lstrip())) // 2
+            rows.append((int(self_us), int(cum_us), stripped.strip(), level))
+        except ValueError:
+            continue
+    return rows
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run_mode(module: str, mode: str, workdir: str) -> str:
+    env = dict(os.environ, HOME=workdir, USERPROFILE=workdir, PYTHONDONTWRITEBYTECODE="1")
+    # --cli guarda my_hwid.txt junto al script: se ejecuta una copia en workdir
+    # para no dejar archivos en el árbol.
+    module = shutil.copy(module, os.path.join(workdir, os.path.basename(module)))
+    if mode == "cli":
+        proc = subprocess.run([sys.executable, "-X", "importtime", module, "--cli"], cwd=workdir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, timeout=60)
+        return proc.stderr
+
+    port = free_port()
+    err_path = os.path.join(workdir, "importtime.txt")
+    with open(err_path, "w") as err:
+        proc = subprocess.Popen([sys.executable, "-X", "importtime", module, "--service", f"--port={port}", "--no-shm"],
+                                cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=err)
+        try:
+            deadline = time.monotonic() + 20
+            while time.monotonic() < deadline:
+                try:
+                    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                    conn.request("GET", "/health")
+                    if conn.getresponse().status == 200:
+                        break
+                except OSError:
+                    time.sleep(0.02)
+            else:
+                raise RuntimeError("el servicio no respondió a /health")
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+    with open(err_path) as f:
+        return f.read()
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Comprueba el presupuesto de import de los modos sin GUI de HWID.py")
+    parser.add_argument("--module", default=os.path.join(script_dir, "HWID.py"))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-cli-ms", type=float, default=90.0)
+    parser.add_argument("--budget-service-ms", type=float, default=110.0)
+    parser.add_argument("--top", type=int, default=8, help="Módulos más lentos a listar por modo")
+    args = parser.parse_args()
+
+    budgets = {"cli": args.budget_cli_ms, "service": args.budget_service_ms}
+    failed = False
+    for mode in ("cli", "service"):
+        best = None
+        for _ in range(max(1, args.repeat)):
+            workdir = tempfile.mkdtemp(prefix="ainside-importtime-")
+            try:
+                rows = parse_importtime(run_mode(args.module, mode, workdir))
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+            total_us = sum(cum for _, cum, _, level in rows if level == 0)
+            if best is None or total_us < best[0]:
+                best = (total_us, rows)
+
+        total_us, rows = best
+        loaded = {name.split(".")[0] for _, _, name, _ in rows}
+        bad = sorted(loaded & FORBIDDEN[mode])
+        total_ms = total_us / 1000.0
+        over = total_ms > budgets[mode]
+        status = "FAIL" if (bad or over) else "OK"
+        failed = failed or bad or over
+        print(f"[{status}] --{mode}: {total_ms:.1f} ms de imports (presupuesto {budgets[mode]:.0f} ms)")
+        if bad:
+            print(f"       importa módulos que este modo no necesita: {', '.join(bad)}")
+        top = sorted((r for r in rows if r[3] == 0), key=lambda r: -r[1])[: args.top]
+        for _, cum, name, _ in top:
+            print(f"       {cum / 1000.0:8.1f} ms  {name}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
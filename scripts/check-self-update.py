@@ -0,0 +1,187 @@
+# Prueba de la auto-actualización de HWID.exe contra un servidor de archivos local
+# Genera una clave RSA de prueba (openssl), publica tres "versiones" de un exe
+# sintético con package-release.py (exe completo + deltas + manifiesto firmado)
+# y ejecuta `HWID.py --update --update-exe=...` sobre copias, comprobando:
+#   - v2 → v3 y v1 → v3 por delta (se descarga el delta, no el exe)
+#   - exe desconocido → descarga completa
+#   - delta corrupto → vuelve a la descarga completa
+#   - manifiesto manipulado → rechazado, el exe no cambia
+#   - exe al día → no descarga nada
+#   - versión instalada más nueva → rechazado (sin bajar de versión)
+#   - versión instalada "20260101-2" → se actualiza a 20260101-0003 (orden numérico, no de texto)
+#   - versión grabada en el exe más nueva, sin update_state.json → rechazado
+#   - firmar con una clave que no es la pública → error, no se escribe nada
+# Sale con 1 si algún caso falla.
+#
+# Uso:
+#   python scripts/check-self-update.py
+#   python scripts/check-self-update.py --size-mb 20
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+class CountingHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        return
+
+    def do_GET(self):
+        srv = self.server
+        path = self.path.split("?", 1)[0].lstrip("/")
+        with srv.lock:
+            srv.served.append(path)
+        tamper = srv.tamper.get(path)
+        if tamper is None:
+            return super().do_GET()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(tamper)))
+        self.end_headers()
+        self.wfile.write(tamper)
+
+
+def load_module(path: str, name: str):
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def make_versions(size: int, seed: int = 7):
+    """Tres exes sintéticos: cada versión cambia e inserta datos como lo haría una recompilación."""
+    rnd = random.Random(seed)
+    v1 = bytearray(rnd.getrandbits(8) for _ in range(size))
+    v2 = bytearray(v1)
+    mid = size // 2
+    v2[mid:mid] = bytes(rnd.getrandbits(8) for _ in range(5000))   # inserción: desplaza el resto
+    v2[1000:1400] = bytes(rnd.getrandbits(8) for _ in range(400))   # cambio en el sitio
+    v3 = bytearray(v2)
+    v3[size // 3:size // 3 + 3000] = b""                             # borrado
+    v3[-2000:] = bytes(rnd.getrandbits(8) for _ in range(2000))
+    return bytes(v1), bytes(v2), bytes(v3)
+
+
+def sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_dir = os.path.dirname(script_dir)
+    parser = argparse.ArgumentParser(description="Prueba la auto-actualización de HWID.exe con un servidor local")
+    parser.add_argument("--size-mb", type=float, default=4.0, help="Tamaño del exe sintético")
+    args = parser.parse_args()
+    if not shutil.which("openssl"):
+        print("[ERROR] Se necesita openssl para generar la clave de prueba")
+        return 1
+
+    workdir = tempfile.mkdtemp(prefix="ainside-update-")
+    os.chdir(project_dir)
+    try:
+        key = os.path.join(workdir, "test-private.pem")
+        pub = os.path.join(workdir, "test-public.pem")
+        subprocess.run(["openssl", "genrsa", "-out", key, "2048"], check=True, capture_output=True)
+        subprocess.run(["openssl", "rsa", "-in", key, "-pubout", "-out", pub], check=True, capture_output=True)
+        os.environ["AINSIDE_UPDATE_PUBLIC_KEY"] = pub
+
+        packager = load_module(os.path.join(script_dir, "package-release.py"), "ainside_package_release")
+        out = os.path.join(workdir, "release")
+        versions = make_versions(int(args.size_mb * 1024 * 1024))
+        for i, data in enumerate(versions, 1):
+            exe = os.path.join(workdir, f"build-v{i}.exe")
+            with open(exe, "wb") as f:
+                f.write(data)
+            packager.publish_update(out, f"20260101-000{i}", exe, key, history=3, jobs=1)
+        v1, v2, v3 = versions
+
+        update_dir = os.path.join(out, packager.UPDATE_DIR)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), partial(CountingHandler, directory=update_dir))
+        server.lock, server.served, server.tamper = threading.Lock(), [], {}
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        manifest_url = f"http://127.0.0.1:{server.server_address[1]}/update-manifest.json"
+        with open(os.path.join(update_dir, "update-manifest.json"), "rb") as f:
+            envelope = json.load(f)
+        payload = json.loads(envelope["payloadJson"])
+        delta_from_v2 = next(d["url"] for d in payload["deltas"] if d["from"] == sha(v2))
+
+        def run_case(name, start: bytes, expect: bytes, expect_delta: bool, expect_full: bool, tamper=None,
+                     installed=None, build=None):
+            case_dir = tempfile.mkdtemp(dir=workdir)
+            module = os.path.join(script_dir, "HWID.py")
+            if build:  # versión grabada por build-hwid-exe.py junto al programa
+                module = shutil.copy(module, os.path.join(case_dir, "HWID.py"))
+                with open(os.path.join(case_dir, "build_version.txt"), "w", encoding="ascii") as f:
+                    f.write(build + "\n")
+            exe = os.path.join(case_dir, "HWID.exe")
+            with open(exe, "wb") as f:
+                f.write(start)
+            if installed:  # estado que deja una actualización anterior
+                os.makedirs(os.path.join(case_dir, ".ainside_tool"))
+                with open(os.path.join(case_dir, ".ainside_tool", "update_state.json"), "w", encoding="utf-8") as f:
+                    json.dump({"version": installed}, f)
+            server.served.clear()
+            server.tamper = tamper or {}
+            env = dict(os.environ, HOME=case_dir, USERPROFILE=case_dir)
+            proc = subprocess.run([sys.executable, module, "--update",
+                                   f"--update-exe={exe}", f"--update-manifest={manifest_url}"],
+                                  env=env, capture_output=True, text=True, timeout=120)
+            with open(exe, "rb") as f:
+                result = f.read()
+            used_delta = any(p.startswith("deltas/") for p in server.served)
+            used_full = any(p.endswith(".exe") for p in server.served)
+            ok = result == expect and used_delta == expect_delta and used_full == expect_full
+            print(f"[{'OK' if ok else 'FAIL'}] {name:<28} exit={proc.returncode} delta={used_delta} full={used_full}")
+            if not ok:
+                print("       " + (proc.stdout + proc.stderr).strip().replace("\n", "\n       "))
+            return ok
+
+        full = payload["exe"]["size"]
+        for d in payload["deltas"]:
+            print(f"delta desde {d['from'][:12]}: {d['size']} bytes ({100.0 * d['size'] / full:.2f} % de {full})")
+        tampered = dict(envelope, payloadJson=envelope["payloadJson"].replace(sha(v3), sha(v1)))
+        results = [
+            run_case("v2 -> v3 por delta", v2, v3, True, False),
+            run_case("v1 -> v3 por delta", v1, v3, True, False),
+            run_case("exe desconocido -> completo", b"otro exe" * 1000, v3, False, True),
+            run_case("delta corrupto -> completo", v2, v3, True, True,
+                     tamper={delta_from_v2: b"AIDL" + b"\0" * 200}),
+            run_case("manifiesto manipulado", v2, v2, False, False,
+                     tamper={"update-manifest.json": json.dumps(tampered).encode("utf-8")}),
+            run_case("al día", v3, v3, False, False),
+            run_case("instalada más nueva", v2, v2, False, False, installed="20260101-0004"),
+            run_case("instalada 20260101-2", v2, v3, True, False, installed="20260101-2"),
+            run_case("exe grabado más nuevo", v2, v2, False, False, build="20260101-0004"),
+        ]
+
+        # Clave de firma que no corresponde a la pública: error y nada escrito
+        other_key = os.path.join(workdir, "other-private.pem")
+        subprocess.run(["openssl", "genrsa", "-out", other_key, "2048"], check=True, capture_output=True)
+        wrong_out = os.path.join(workdir, "release-wrong-key")
+        try:
+            packager.publish_update(wrong_out, "20260101-0005", os.path.join(workdir, "build-v3.exe"), other_key,
+                                    history=3, jobs=1)
+            refused = False
+        except RuntimeError:
+            refused = True
+        ok = refused and not os.path.exists(wrong_out)
+        print(f"[{'OK' if ok else 'FAIL'}] {'clave de firma equivocada':<28} error={refused} "
+              f"escrito={os.path.exists(wrong_out)}")
+        results.append(ok)
+        server.shutdown()
+        return 0 if all(results) else 1
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,443 @@
+# Empaquetado de los ZIP de distribución de TradeStation
+# Arma cada bundle a partir de scripts/release-bundles.json (qué archivo va a
+# qué ruta dentro del ZIP) en lugar de hacerlo a mano.
+#
+#   - Compresión en paralelo: cada miembro se comprime (deflate) en un hilo;
+#     zlib libera el GIL, así que escala con los núcleos.
+#   - Reutilización: el resultado comprimido se guarda en build/release-cache/
+#     con el SHA-256 del contenido como clave; si el archivo no cambió no se
+#     vuelve a comprimir.
+#   - Reproducible: orden fijo, fechas fijas (SOURCE_DATE_EPOCH o la fecha
+#     del último commit), permisos fijos y sin metadatos del sistema que
+#     empaqueta. El mismo árbol produce los mismos bytes.
+#   - Verificación: dist/release/SHA256SUMS (formato `sha256sum -c`) y
+#     dist/release/manifest.json con el hash de cada ZIP y de cada miembro.
+#   - Auto-actualización (--update): copia dist/HWID.exe a
+#     dist/release/hwid-tool/HWID-<versión>.exe, genera deltas binarios (AIDL,
+#     formato en HWID.py) desde las --delta-history versiones anteriores y
+#     escribe update-manifest.json firmado (RS256, con openssl) con la clave
+#     privada que corresponde a license-public.pem. Se publica la carpeta
+#     hwid-tool/ tal cual en AINSIDE_UPDATE_BASE.
+#
+# Uso:
+#   python scripts/package-release.py                       (todos los bundles)
+#   python scripts/package-release.py --bundle installer
+#   python scripts/package-release.py --version 20260113-0738 --jobs 8
+#   python scripts/package-release.py --update --sign-key /ruta/segura/license-private.pem
+#   cd dist/release && sha256sum -c SHA256SUMS
+
+import argparse
+import base64
+import glob
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+DEFAULT_MANIFEST = os.path.join("scripts", "release-bundles.json")
+DEFAULT_OUT = os.path.join("dist", "release")
+HWID_MODULE = os.path.join("scripts", "HWID.py")
+UPDATE_EXE = os.path.join("dist", "HWID.exe")
+UPDATE_DIR = "hwid-tool"
+DELTA_BLOCK = 64
+DELTA_MAX_RATIO = 0.8  # un delta más grande que esto respecto al exe completo no compensa
+CACHE_DIR = os.path.join("build", "release-cache")
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP_MAX = 0xFFFFFFFF  # sin ZIP64: los bundles son de pocos MB
+FLAG_UTF8 = 0x800
+
+
+# --------- Manifiesto ---------
+def load_manifest(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    bundles = data.get("bundles")
+    if not isinstance(bundles, dict) or not bundles:
+        raise ValueError(f"{path}: falta 'bundles'")
+    return bundles
+
+
+def expand_members(name: str, bundles: dict, seen=(), warned=None) -> list:
+    """[(ruta en el ZIP, ruta de origen, ejecutable)] del bundle, con `include` resuelto."""
+    if name in seen:
+        raise ValueError(f"include circular en el bundle {name}")
+    bundle = bundles[name]
+    warned = set() if warned is None else warned
+    out = {}
+    for inc in bundle.get("include", []):
+        for dest, src, exe in expand_members(inc, bundles, seen + (name,), warned):
+            out[dest] = (src, exe)
+    for m in bundle.get("members", []):
+        src, dest, exe = m["src"], m.get("dest") or os.path.basename(m["src"]), bool(m.get("executable"))
+        if os.path.isdir(src):
+            for root, dirs, files in os.walk(src):
+                dirs.sort()
+                for fn in sorted(files):
+                    full = os.path.join(root, fn)
+                    rel = os.path.relpath(full, src).replace(os.sep, "/")
+                    out[f"{dest.rstrip('/')}/{rel}"] = (full, exe or os.access(full, os.X_OK))
+        elif os.path.isfile(src):
+            out[dest] = (src, exe)
+        elif m.get("optional"):
+            if src not in warned:
+                warned.add(src)
+                print(f"[WARN] {name}: {src} no existe (opcional, se omite)")
+        else:
+            raise FileNotFoundError(f"{name}: falta {src}")
+    return sorted((dest, src, exe) for dest, (src, exe) in out.items())
+
+
+def default_epoch() -> int:
+    env = os.environ.get("SOURCE_DATE_EPOCH")
+    if env:
+        return int(env)
+    try:
+        out = subprocess.run(["git", "log", "-1", "--format=%ct"], capture_output=True, text=True, check=True)
+        return int(out.stdout.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return 315532800  # 1980-01-01, la fecha mínima de ZIP
+
+
+# --------- Compresión (con cache por contenido) ---------
+class Compressed:
+    __slots__ = ("sha256", "crc", "size", "method", "data", "reused")
+
+    def __init__(self, sha256, crc, size, method, data, reused):
+        self.sha256, self.crc, self.size, self.method, self.data, self.reused = sha256, crc, size, method, data, reused
+
+
+def compress_file(path: str, level: int, use_cache: bool) -> Compressed:
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    crc = zlib.crc32(raw) & 0xFFFFFFFF
+    # La salida de deflate depende del nivel y de la versión de zlib: ambos van en la clave
+    cache_path = os.path.join(CACHE_DIR, f"{digest}-{level}-{zlib.ZLIB_RUNTIME_VERSION}")
+    if use_cache:
+        try:
+            with open(cache_path, "rb") as f:
+                blob = f.read()
+            return Compressed(digest, crc, len(raw), blob[0], blob[1:], True)
+        except OSError:
+            pass
+    comp = zlib.compressobj(level, zlib.DEFLATED, -15)
+    data = comp.compress(raw) + comp.flush()
+    method = ZIP_DEFLATED
+    if len(data) >= len(raw):  # PNG, DLL ya comprimidas: guardar tal cual
+        method, data = ZIP_STORED, raw
+    if use_cache:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(bytes([method]) + data)
+        os.replace(tmp, cache_path)
+    return Compressed(digest, crc, len(raw), method, data, False)
+
+
+# --------- Escritura ZIP determinista ---------
+def dos_datetime(epoch: int):
+    t = time.gmtime(max(epoch, 315532800))
+    return ((t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+            ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday)
+
+
+def write_zip(path: str, entries, epoch: int) -> str:
+    """Escribe el ZIP a partir de miembros ya comprimidos; devuelve su SHA-256."""
+    dos_time, dos_date = dos_datetime(epoch)
+    h = hashlib.sha256()
+    central = []
+    offset = 0
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        def emit(chunk: bytes):
+            f.write(chunk)
+            h.update(chunk)
+
+        for dest, exe, c in entries:
+            name = dest.encode("utf-8")
+            flags = 0 if dest.isascii() else FLAG_UTF8
+            if c.size > ZIP_MAX or len(c.data) > ZIP_MAX or offset > ZIP_MAX:
+                raise ValueError(f"{dest}: demasiado grande para ZIP sin ZIP64")
+            emit(struct.pack("<4s5H3L2H", b"PK\x03\x04", 20, flags, c.method, dos_time, dos_date,
+                             c.crc, len(c.data), c.size, len(name), 0) + name)
+            emit(c.data)
+            mode = 0o100755 if exe else 0o100644
+            central.append(struct.pack("<4s4B4H3L5H2L", b"PK\x01\x02", 20, 3, 20, 0, flags, c.method, dos_time, dos_date,
+                                       c.crc, len(c.data), c.size, len(name), 0, 0, 0, 0, mode << 16, offset) + name)
+            offset += 30 + len(name) + len(c.data)
+        cd = b"".join(central)
+        emit(cd)
+        emit(struct.pack("<4s4H2LH", b"PK\x05\x06", 0, 0, len(central), len(central), len(cd), offset, 0))
+    os.replace(tmp, path)
+    return h.hexdigest()
+
+
+def sha256_path(path: str):
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# --------- Auto-actualización: deltas y manifiesto firmado ---------
+def load_hwid_module():
+    spec = importlib.util.spec_from_file_location("ainside_hwid_release", HWID_MODULE)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def make_delta(source: bytes, target: bytes, hwid) -> bytes:
+    """Delta AIDL v1 de source a target. Los bloques de DELTA_BLOCK bytes de
+    source se indexan en posiciones alineadas; target se recorre byte a byte
+    solo mientras no hay coincidencia, y cada coincidencia se extiende hacia
+    atrás y hacia delante (comparando por trozos) antes de saltarla entera."""
+    index = {}
+    for off in range(0, len(source) - DELTA_BLOCK + 1, DELTA_BLOCK):
+        index.setdefault(source[off:off + DELTA_BLOCK], off)
+    ops = []
+
+    def insert(data: bytes):
+        if data:
+            ops.append(b"I" + hwid._DELTA_INSERT.pack(len(data)) + data)
+
+    n, m = len(target), len(source)
+    lit_start = p = 0
+    while p + DELTA_BLOCK <= n:
+        s = index.get(target[p:p + DELTA_BLOCK])
+        if s is None:
+            p += 1
+            continue
+        back = 0
+        while p - back > lit_start and s - back > 0 and target[p - back - 1] == source[s - back - 1]:
+            back += 1
+        end_t, end_s = p + DELTA_BLOCK, s + DELTA_BLOCK
+        step = 4096
+        while step:
+            while end_t + step <= n and end_s + step <= m and target[end_t:end_t + step] == source[end_s:end_s + step]:
+                end_t += step
+                end_s += step
+            step //= 8
+        insert(target[lit_start:p - back])
+        ops.append(b"C" + hwid._DELTA_COPY.pack(s - back, end_t - (p - back)))
+        lit_start = p = end_t
+    insert(target[lit_start:])
+    header = hwid._DELTA_HEADER.pack(hwid.DELTA_MAGIC, hwid.DELTA_VERSION, hashlib.sha256(source).digest(),
+                                     hashlib.sha256(target).digest(), n)
+    return header + zlib.compress(b"".join(ops), 9)
+
+
+def delta_job(job):
+    """(ruta del delta, tamaño) — se ejecuta en otro proceso: make_delta es Python puro."""
+    source_path, target_path, out_path = job
+    hwid = load_hwid_module()
+    with open(source_path, "rb") as f:
+        source = f.read()
+    with open(target_path, "rb") as f:
+        target = f.read()
+    delta = make_delta(source, target, hwid)
+    if hwid._delta_apply(source, delta) != target:  # el cliente debe poder aplicarlo
+        raise RuntimeError(f"el delta {out_path} no reproduce el exe")
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(delta)
+    os.replace(tmp, out_path)
+    return out_path, len(delta)
+
+
+def sign_payload(payload_json: str, key_path: str) -> str:
+    if not shutil.which("openssl"):
+        raise RuntimeError("se necesita openssl para firmar el manifiesto")
+    out = subprocess.run(["openssl", "dgst", "-sha256", "-sign", key_path], input=payload_json.encode("utf-8"),
+                         capture_output=True, check=True)
+    return base64.urlsafe_b64encode(out.stdout).rstrip(b"=").decode("ascii")
+
+
+def signed_manifest(payload: dict, key_path: str, hwid) -> dict:
+    """Sobre firmado del manifiesto, ya verificado con la clave pública que usa
+    HWID.py; RuntimeError si no verifica (clave de firma equivocada)."""
+    payload_json = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    envelope = {"alg": "RS256", "payloadJson": payload_json, "signature": sign_payload(payload_json, key_path)}
+    try:
+        hwid._verify_update_manifest(envelope, hwid._update_public_key())
+    except Exception as e:
+        raise RuntimeError(f"el manifiesto no verifica con la clave pública que usa HWID.py: {e}")
+    return envelope
+
+
+def publish_update(out_dir: str, version: str, exe_path: str, key_path: str, history: int, jobs: int) -> int:
+    hwid = load_hwid_module()
+    exe_name = f"HWID-{version}.exe"
+    current_sha = sha256_path(exe_path)
+    if current_sha is None:
+        raise RuntimeError(f"no existe {exe_path}")
+    # Antes de escribir nada: una clave que no corresponde a license-public.pem
+    # publicaría un manifiesto que ningún cliente acepta.
+    signed_manifest({"product": hwid.UPDATE_PRODUCT, "version": version,
+                     "exe": {"url": exe_name, "sha256": current_sha}}, key_path, hwid)
+
+    update_dir = os.path.join(out_dir, UPDATE_DIR)
+    os.makedirs(os.path.join(update_dir, "deltas"), exist_ok=True)
+    current = os.path.join(update_dir, exe_name)
+    shutil.copyfile(exe_path, current)
+
+    # Versiones anteriores publicadas, de la más nueva a la más antigua por versión
+    # numérica (no alfabética: "…-10000" debe ir después de "…-9999")
+    previous, seen = [], {current_sha}
+    published = glob.glob(os.path.join(update_dir, "HWID-*.exe"))
+    for path in sorted(published, key=lambda p: hwid._version_key(os.path.basename(p)[5:-4]), reverse=True):
+        sha = sha256_path(path)
+        if sha not in seen:
+            seen.add(sha)
+            previous.append((path, sha))
+        if len(previous) >= history:
+            break
+
+    jobs_todo, deltas = [], []
+    for path, sha in previous:
+        delta_path = os.path.join(update_dir, "deltas", f"{sha[:16]}-{current_sha[:16]}.aidl")
+        if not os.path.exists(delta_path):  # el nombre identifica origen y destino: reutilizable
+            jobs_todo.append((path, current, delta_path))
+        deltas.append((sha, delta_path))
+    workers = max(1, min(jobs, len(jobs_todo)))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(delta_job, jobs_todo))
+    else:
+        for job in jobs_todo:
+            delta_job(job)
+
+    full_size = os.path.getsize(current)
+    entries = []
+    for sha, delta_path in deltas:
+        size = os.path.getsize(delta_path)
+        if size > full_size * DELTA_MAX_RATIO:
+            print(f"[WARN] delta {os.path.basename(delta_path)} ocupa {size} bytes; se omite")
+            continue
+        entries.append({"from": sha, "url": "deltas/" + os.path.basename(delta_path),
+                        "size": size, "sha256": sha256_path(delta_path)})
+
+    payload = {
+        "product": hwid.UPDATE_PRODUCT,
+        "version": version,
+        "issuedAt": int(time.time() * 1000),
+        "exe": {"url": exe_name, "size": full_size, "sha256": current_sha},
+        "deltas": entries,
+    }
+    envelope = signed_manifest(payload, key_path, hwid)
+    manifest_path = os.path.join(update_dir, "update-manifest.json")
+    with open(manifest_path, "w", encoding="utf-8", newline="\n") as f:
+        json.dump(envelope, f, indent=2)
+        f.write("\n")
+
+    print(f"Actualización {version}: exe {full_size / (1024 * 1024):.2f} MB, {len(entries)} deltas "
+          f"({len(jobs_todo)} nuevos) en {update_dir}")
+    for e in entries:
+        print(f"  desde {e['from'][:12]}: {e['size']} bytes ({100.0 * e['size'] / full_size:.1f} %)")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Empaqueta los ZIP de distribución de TradeStation")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    parser.add_argument("--bundle", action="append", help="Bundle a generar (repetible; por defecto todos)")
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument("--version", help="Sustituye {version} en el nombre (por defecto la fecha del último commit)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--level", type=int, default=9, choices=range(1, 10), metavar="1-9")
+    parser.add_argument("--no-cache", action="store_true", help="Comprimir todo de nuevo sin usar build/release-cache")
+    parser.add_argument("--update", action="store_true", help="Publicar también la auto-actualización de HWID.exe")
+    parser.add_argument("--update-exe", default=UPDATE_EXE)
+    parser.add_argument("--sign-key", default=os.environ.get("AINSIDE_UPDATE_SIGNING_KEY"),
+                        help="Clave privada RSA (PEM) para firmar update-manifest.json")
+    parser.add_argument("--delta-history", type=int, default=3, help="Versiones anteriores con delta")
+    args = parser.parse_args()
+
+    # Rutas del manifiesto relativas a la raíz del proyecto
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    t0 = time.perf_counter()
+    try:
+        bundles = load_manifest(args.manifest)
+        names = args.bundle or sorted(bundles)
+        unknown = [n for n in names if n not in bundles]
+        if unknown:
+            raise ValueError("bundles desconocidos: " + ", ".join(unknown))
+        warned = set()
+        members = {n: expand_members(n, bundles, warned=warned) for n in names}
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+    epoch = default_epoch()
+    version = args.version or time.strftime("%Y%m%d-%H%M", time.gmtime(epoch))
+
+    # Cada archivo de origen se comprime una sola vez aunque esté en varios bundles
+    sources = sorted({src for entries in members.values() for _, src, _ in entries})
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        compressed = dict(zip(sources, pool.map(lambda s: compress_file(s, args.level, not args.no_cache), sources)))
+
+    os.makedirs(args.out, exist_ok=True)
+    result = {"version": version, "source_date_epoch": epoch, "bundles": {}}
+    print("=" * 72)
+    print(f"{'bundle':<12}{'miembros':>9}{'reusados':>10}{'MB':>8}  archivo")
+    for name in names:
+        filename = bundles[name]["output"].format(version=version)
+        out_path = os.path.join(args.out, filename)
+        entries = [(dest, exe, compressed[src]) for dest, src, exe in members[name]]
+        before = sha256_path(out_path)
+        digest = write_zip(out_path, entries, epoch)
+        size = os.path.getsize(out_path)
+        result["bundles"][name] = {
+            "file": filename,
+            "size": size,
+            "sha256": digest,
+            "members": [{"path": dest, "size": c.size, "sha256": c.sha256} for dest, _, c in entries],
+        }
+        reused = sum(1 for _, _, c in entries if c.reused)
+        note = " (sin cambios)" if before == digest else ""
+        print(f"{name:<12}{len(entries):>9}{reused:>10}{size / (1024 * 1024):>8.2f}  {filename}{note}")
+    print("=" * 72)
+
+    # Se reescriben con todos los bundles ya presentes en --out para no perder los de otras ejecuciones
+    manifest_path = os.path.join(args.out, "manifest.json")
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        if previous.get("version") == version:
+            result["bundles"] = {**previous.get("bundles", {}), **result["bundles"]}
+    except (OSError, ValueError):
+        pass
+    with open(manifest_path, "w", encoding="utf-8", newline="\n") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+        f.write("\n")
+    with open(os.path.join(args.out, "SHA256SUMS"), "w", encoding="utf-8", newline="\n") as f:
+        for b in sorted(result["bundles"].values(), key=lambda b: b["file"]):
+            f.write(f"{b['sha256']}  {b['file']}\n")
+    print(f"SHA-256 en {os.path.join(args.out, 'SHA256SUMS')} y {manifest_path}")
+    if args.update:
+        if not args.sign_key:
+            print("[ERROR] --update necesita --sign-key (o AINSIDE_UPDATE_SIGNING_KEY)")
+            return 1
+        try:
+            publish_update(args.out, version, args.update_exe, args.sign_key, args.delta_history, args.jobs)
+        except (OSError, RuntimeError, subprocess.CalledProcessError) as e:
+            print(f"[ERROR] No se pudo publicar la actualización: {e}")
+            return 1
+    print(f"[OK] {time.perf_counter() - t0:.2f} s ({len(sources)} archivos, {args.jobs} hilos)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())